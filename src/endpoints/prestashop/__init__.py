@@ -18,5 +18,5 @@
 # from .warehouse import PrestaWarehouse
 # from .language_async import PrestaLanguageAync
 # from .shop import PrestaShopShop
-# from .pricelist import PriceListRequester
+# from .pricelist import PriceListRequester, PriceListRequesterAsync
 # from .customer import PrestaCustomer
@@ -301,11 +301,15 @@ class PrestaShop:
 
         Args:
             url (str): The base URL.
-            params (dict): The parameters for the request.
+            params (dict): The parameters for the request. A dict `filter` becomes `filter[<field>]` parameters.
 
         Returns:
             str: The prepared URL with parameters.
         """
+        search_filter = params.get('filter')
+        if isinstance(search_filter, dict):
+            # `{'reference': '[a|b]'}` -> `filter[reference]=[a|b]`
+            params = {**{k: v for k, v in params.items() if k != 'filter'}, **{f'filter[{name}]': value for name, value in search_filter.items()}}
         req: PreparedRequest = PreparedRequest()
         req.prepare_url(url, params)
         return req.url
@@ -1,20 +1,36 @@
+## \file /src/endpoints/prestashop/api/api_async.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.endpoints.prestashop.api.api_async
+	:platform: Windows, Unix
+	:synopsis: Async client for the PrestaShop webservice API.
+
+All requests of a `PrestaShopAsync` instance share one `aiohttp.ClientSession` with a keep-alive
+`TCPConnector` (connection pool, per-host limit, DNS cache). The session is created lazily inside the running
+event loop and closed with `close()` or by leaving the `async with` block. The number of requests in flight
+is bounded by a semaphore (`concurrency`), so callers can simply `asyncio.gather()` thousands of calls.
+"""
+
+import asyncio
+import json
 import os
-import sys
 from enum import Enum
-from http.client import HTTPConnection
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
 from xml.etree import ElementTree
 from xml.parsers.expat import ExpatError
 
-from requests import Session
 from requests.models import PreparedRequest
 
+import aiohttp
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
 import header
 from src import gs
 from src.logger.exceptions import PrestaShopAuthenticationError, PrestaShopException
 from src.logger.logger import logger
-from src.utils.convertors.base64 import base64_to_tmpfile
 from src.utils.convertors.dict import dict2xml
 from src.utils.convertors.xml2dict import xml2dict
 from src.utils.file import save_text_file
@@ -22,10 +38,6 @@ from src.utils.image import save_image_from_url_async
 from src.utils.jjson import j_dumps, j_loads, j_loads_ns
 from src.utils.printer import pprint
 
-import asyncio
-import aiohttp
-from aiohttp import ClientSession, ClientTimeout
-
 
 class Format(Enum):
     """Data types return (JSON, XML)
@@ -46,66 +58,56 @@ class PrestaShopAsync:
     allowing for CRUD operations, searching, and uploading images. It also provides
     error handling for responses and methods to handle the API's data.
 
+    Args:
+        api_domain (str): The domain of the PrestaShop shop (e.g., https://myPrestaShop.com).
+        api_key (str): The API key generated from PrestaShop.
+        data_format (str): Default data format ('JSON' or 'XML'). Defaults to 'JSON'.
+        debug (bool): Log every request. Defaults to True.
+        concurrency (int): Maximum number of requests in flight.
+        limit (int): Total size of the connection pool.
+        limit_per_host (int): Maximum number of connections to the shop.
+        keepalive_timeout (float): How long an idle connection is kept open (seconds).
+        ttl_dns_cache (int): DNS cache lifetime (seconds).
+        timeout (float): Total timeout of a request (seconds).
+
     Example usage:
 
     .. code-block:: python
 
         async def main():
-            api = PrestaShopAsync(
-                API_DOMAIN='https://your-prestashop-domain.com',
-                API_KEY='your_api_key',
-                default_lang=1,
-                debug=True,
+            async with PrestaShopAsync(
+                api_domain='https://your-prestashop-domain.com',
+                api_key='your_api_key',
                 data_format='JSON',
-            )
-
-            await api.ping()
-
-            data = {
-                'tax': {
-                    'rate': 3.000,
-                    'active': '1',
-                    'name': {
-                        'language': {
-                            'attrs': {'id': '1'},
-                            'value': '3% tax'
+                concurrency=20,
+            ) as api:
+
+                await api.ping()
+
+                data = {
+                    'tax': {
+                        'rate': 3.000,
+                        'active': '1',
+                        'name': {
+                            'language': {
+                                'attrs': {'id': '1'},
+                                'value': '3% tax'
+                            }
                         }
                     }
                 }
-            }
-
-            # Create tax record
-            rec = await api.create('taxes', data)
-
-            # Update the same tax record
-            update_data = {
-                'tax': {
-                    'id': str(rec['id']),
-                    'rate': 3.000,
-                    'active': '1',
-                    'name': {
-                        'language': {
-                            'attrs': {'id': '1'},
-                            'value': '3% tax'
-                        }
-                    }
-                }
-            }
-
-            update_rec = await api.write('taxes', update_data)
 
-            # Remove this tax
-            await api.unlink('taxes', str(rec['id']))
+                # Create tax record
+                rec = await api.create('taxes', data)
 
-            # Search the first 3 taxes with '5' in the name
-            import pprint
-            recs = await api.search('taxes', filter='[name]=%[5]%', limit='3')
+                # Read many records concurrently through the same connection pool
+                taxes = await asyncio.gather(*(api.read('taxes', i) for i in range(1, 50)))
 
-            for rec in recs:
-                pprint(rec)
+                # Search the first 3 taxes with '5' in the name
+                recs = await api.search('taxes', filter='[name]=%[5]%', limit='3')
 
-            # Create binary (product image)
-            await api.create_binary('images/products/22', 'img.jpeg', 'image')
+                # Create binary (product image)
+                await api.create_binary('images/products/22', 'img.jpeg', 'image')
 
         if __name__ == "__main__":
             asyncio.run(main())
@@ -123,28 +125,95 @@ class PrestaShopAsync:
                 api_domain:str,
                 api_key:str,
                 data_format: str = 'JSON',
-                debug: bool = True) -> None:
+                debug: bool = True,
+                concurrency: int = 20,
+                limit: int = 100,
+                limit_per_host: int = 20,
+                keepalive_timeout: float = 30,
+                ttl_dns_cache: int = 300,
+                timeout: float = 60) -> None:
         """! Initialize the PrestaShopAsync class.
 
-        Args:
-            data_format (str, optional): Default data format ('JSON' or 'XML'). Defaults to 'JSON'.
-            default_lang (int, optional): Default language ID. Defaults to 1.
-            debug (bool, optional): Activate debug mode. Defaults to True.
-
-        Raises:
-            PrestaShopAuthenticationError: When the API key is wrong or does not exist.
-            PrestaShopException: For generic PrestaShop WebServices errors.
+        The HTTP session is not opened here: it is created on the first request inside the running event loop.
         """
-        self.API_DOMAIN = api_domain
+        api_domain = api_domain.rstrip('/')
+        self.API_DOMAIN = api_domain + '/' if api_domain.endswith('/api') else api_domain + '/api/'
         self.API_KEY = api_key
         self.debug = debug
         self.data_format = data_format
 
-        self.client = ClientSession(
-            auth=aiohttp.BasicAuth(self.API_KEY, ''),
-            timeout=ClientTimeout(total=60)
-        )
+        self.concurrency = concurrency
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.timeout = timeout
+
+        self.client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._client_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> 'PrestaShopAsync':
+        await self._get_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def _get_client(self) -> ClientSession:
+        """! Return the shared session, creating it (and the connection pool) on first use.
+
+        The session, its lock and the semaphore belong to the event loop that created them. An instance reused
+        in another loop (`asyncio.run()` per shard of the scenario runner, `CategoryTree.for_api()`) gets new ones.
+
+        Returns:
+            ClientSession: Session shared by all requests of this instance.
+        """
+        loop = asyncio.get_running_loop()
+        if self.client and not self.client.closed and self._loop is loop:
+            return self.client
+
+        if self._loop is not loop:
+            # Swapped before any `await`: concurrent first requests of the new loop share one lock
+            stale, self.client = self.client, None
+            self._loop = loop
+            self._client_lock = asyncio.Lock()
+            self._semaphore = None
+            if stale is not None:
+                await self._close_stale(stale)
+
+        async with self._client_lock:
+            if not self.client or self.client.closed:
+                connector = TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                    enable_cleanup_closed=True,
+                )
+                self.client = ClientSession(
+                    connector=connector,
+                    auth=aiohttp.BasicAuth(self.API_KEY, ''),
+                    timeout=ClientTimeout(total=self.timeout),
+                )
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self.client
+
+    @staticmethod
+    async def _close_stale(client: ClientSession) -> None:
+        """! Close a session of a previous event loop (its transports may belong to a closed loop)."""
+        try:
+            if not client.closed:
+                await client.close()
+        except Exception as ex:
+            logger.debug('Error closing the session of a previous event loop', ex, False)
 
+    async def close(self) -> None:
+        """! Close the session and all pooled connections."""
+        if self.client and not self.client.closed:
+            await self.client.close()
+        self.client = None
 
     async def ping(self) -> bool:
         """! Test if the webservice is working perfectly asynchronously.
@@ -152,13 +221,16 @@ class PrestaShopAsync:
         Returns:
             bool: Result of the ping test. Returns `True` if the webservice is working, otherwise `False`.
         """
-        async with self.client.request(
-            method='HEAD',
-            url=self.API_DOMAIN
-        ) as response:
-            return await self._check_response(response.status, response)
+        client = await self._get_client()
+        try:
+            async with self._semaphore, client.request(method='HEAD', url=self.API_DOMAIN) as response:
+                self.ps_version = response.headers.get('psws-version', self.ps_version)
+                return await self._check_response(response.status, response)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            logger.error(f'Нет соединения с {self.API_DOMAIN}', ex, False)
+            return False
 
-    def _check_response(self, status_code: int, response, method: Optional[str] = None, url: Optional[str] = None,
+    async def _check_response(self, status_code: int, response, method: Optional[str] = None, url: Optional[str] = None,
                         headers: Optional[dict] = None, data: Optional[dict] = None) -> bool:
         """! Check the response status code and handle errors asynchronously.
 
@@ -176,10 +248,10 @@ class PrestaShopAsync:
         if status_code in (200, 201):
             return True
         else:
-            self._parse_response_error(response, method, url, headers, data)
+            await self._parse_response_error(response, method, url, headers, data)
             return False
 
-    def _parse_response_error(self, response, method: Optional[str] = None, url: Optional[str] = None,
+    async def _parse_response_error(self, response, method: Optional[str] = None, url: Optional[str] = None,
                               headers: Optional[dict] = None, data: Optional[dict] = None):
         """! Parse the error response from PrestaShop API asynchronously.
 
@@ -190,33 +262,30 @@ class PrestaShopAsync:
             headers (dict, optional): The headers used in the request.
             data (dict, optional): The data sent in the request.
         """
+        text: str = await response.text() if method != 'HEAD' else ''
         if self.data_format == 'JSON':
             status_code = response.status
             if not status_code in (200, 201):
-                text = response.text()
-                logger.critical(f"""response status code: {status_code}
+                logger.error(f"""response status code: {status_code}
                     url: {response.request_info.url}
+                    method: {method}
                     --------------
                     headers: {response.headers}
                     --------------
-                    response text: {text}""")
+                    response text: {text}""", None, False)
             return response
         else:
-            error_answer = self._parse(response.text())
+            code = message = None
+            error_answer = self._parse(text) if text else None
             if isinstance(error_answer, dict):
                 error_content = (error_answer
-                                 .get('PrestaShop', {})
                                  .get('errors', {})
                                  .get('error', {}))
                 if isinstance(error_content, list):
                     error_content = error_content[0]
                 code = error_content.get('code')
                 message = error_content.get('message')
-            elif isinstance(error_answer, ElementTree.Element):
-                error = error_answer.find('errors/error')
-                code = error.find('code').text
-                message = error.find('message').text
-            logger.error(f'XML response error: {message} \n Code: {code}')
+            logger.error(f'XML response error: {message} \n Code: {code} \n Status: {response.status}', None, False)
             return code, message
 
     def _prepare(self, url: str, params: dict) -> str:
@@ -224,11 +293,15 @@ class PrestaShopAsync:
 
         Args:
             url (str): The base URL.
-            params (dict): The parameters for the request.
+            params (dict): The parameters for the request. A dict `filter` becomes `filter[<field>]` parameters.
 
         Returns:
             str: The prepared URL with parameters.
         """
+        search_filter = params.get('filter')
+        if isinstance(search_filter, dict):
+            # `{'reference': '[a|b]'}` -> `filter[reference]=[a|b]`
+            params = {**{k: v for k, v in params.items() if k != 'filter'}, **{f'filter[{name}]': value for name, value in search_filter.items()}}
         req = PreparedRequest()
         req.prepare_url(url, params)
         return req.url
@@ -238,7 +311,7 @@ class PrestaShopAsync:
               resource_id: Optional[Union[int, str]] = None,
               resource_ids: Optional[Union[int, Tuple[int]]] = None,
               method: str = 'GET',
-              data: Optional[dict] = None,
+              data: Optional[dict | str] = None,
               headers: Optional[dict] = None,
               search_filter: Optional[Union[str, dict]] = None,
               display: Optional[Union[str, list]] = 'full',
@@ -254,7 +327,7 @@ class PrestaShopAsync:
             resource_id (int | str, optional): The ID of the resource.
             resource_ids (int | tuple, optional): The IDs of multiple resources.
             method (str, optional): The HTTP method (GET, POST, PUT, DELETE).
-            data (dict, optional): The data to be sent with the request.
+            data (dict | str, optional): The data to be sent with the request.
             headers (dict, optional): Additional headers for the request.
             search_filter (str | dict, optional): Filter for the request.
             display (str | list, optional): Fields to display in the response.
@@ -267,90 +340,73 @@ class PrestaShopAsync:
         Returns:
             dict | None: The response from the API or `False` on failure.
         """
-        self.debug = False
-        if self.debug:
-            # import sys
-            # original_stderr = sys.stderr
-            # f = open('stderr.log', 'w')
-            # sys.stderr = f
-            
-            # prepared_url = self._prepare(f'{self.API_DOMAIN}/api/{resource}/{resource_id}' if resource_id else f'{self.API_DOMAIN}/api/{resource}',
-            #                       {'filter': search_filter,
-            #                        'display': display,
-            #                        'schema': schema,
-            #                        'sort': sort,
-            #                        'limit': limit,
-            #                        'language': language,
-            #                        'output_format': io_format})
-            
-            # request_data = dict2xml(data) if data and io_format == 'XML' else data
-            
-            # with self.client.request(
-            #     method=method,
-            #     url=prepared_url,
-            #     data=request_data,
-            #     headers=headers,
-            # ) as response:
-
-            #     sys.stderr = original_stderr
-
-            #     if not self._check_response(response.status, response, method, prepared_url, headers, request_data):
-            #         return False
-
-            #     if io_format == 'JSON':
-            #         return response.json()
-            #     else:
-            #         return self._parse(await response.text())
-            ...
+        prepared_url = self._prepare(f'{self.API_DOMAIN}{resource}/{resource_id}' if resource_id else f'{self.API_DOMAIN}{resource}',
+                              {'filter': search_filter,
+                               'display': display,
+                               'schema': schema,
+                               'sort': sort,
+                               'limit': limit,
+                               'language': language,
+                               'output_format': io_format})
+
+        request_headers: dict = (
+            {'Content-Type': 'application/json', 'Accept': 'application/json'}
+            if io_format == 'JSON'
+            else {'Content-Type': 'application/xml', 'Accept': 'application/xml'}
+        )
+        if headers:
+            request_headers.update(headers)
+
+        if isinstance(data, dict):
+            request_data = dict2xml(data) if io_format == 'XML' else json.dumps(data, ensure_ascii=False)
         else:
-            prepared_url = self._prepare(f'{self.API_DOMAIN}{resource}/{resource_id}' if resource_id else f'{self.API_DOMAIN}{resource}',
-                                  {'filter': search_filter,
-                                   'display': display,
-                                   'schema': schema,
-                                   'sort': sort,
-                                   'limit': limit,
-                                   'language': language,
-                                   'output_format': io_format})
-            
-            request_data = dict2xml(data) if data and io_format == 'XML' else data
-            
-            with self.client.request(
-                method=method,
-                url=prepared_url,
-                data=request_data,
-                headers=headers,
-            ) as response:
-
-                if not self._check_response(response.status, response, method, prepared_url, headers, request_data):
-                    return False
-
-                if io_format == 'JSON':
-                    return response.json()
-                else:
-                    return self._parse(await response.text())
-
-
-    def _parse(self, text: str) -> dict | ElementTree.Element | bool:
-        """! Parse XML or JSON response from the API asynchronously.
+            request_data = data
+
+        if self.debug:
+            logger.debug(f'{method} {prepared_url}', None, False)
+
+        client = await self._get_client()
+        try:
+            async with self._semaphore:
+                async with client.request(
+                    method=method,
+                    url=prepared_url,
+                    data=request_data,
+                    headers=request_headers,
+                ) as response:
+
+                    if not await self._check_response(response.status, response, method, prepared_url, request_headers, request_data):
+                        return False
+
+                    if method == 'DELETE':
+                        return True
+
+                    return self._parse(await response.text(), io_format)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            logger.error(f'Ошибка запроса {method} {prepared_url}', ex, False)
+            return
+
+    def _parse(self, text: str, io_format: Optional[str] = None) -> dict | bool:
+        """! Parse XML or JSON response from the API.
 
         Args:
             text (str): Response text.
+            io_format (str, optional): The data format ('JSON' or 'XML'). Defaults to `self.data_format`.
 
         Returns:
-            dict | ElementTree.Element | bool: Parsed data or `False` on failure.
+            dict | bool: Parsed data or `False` on failure.
         """
         try:
-            if self.data_format == 'JSON':
-              data = j_loads(text)
-              return data.get('PrestaShop', {}) if 'PrestaShop' in data else data
-            else:
-                tree = ElementTree.fromstring(text)
-                return tree
-        except (ExpatError, ValueError) as ex:
+            if not text:
+                return {}
+            data: dict = j_loads(text) if (io_format or self.data_format) == 'JSON' else xml2dict(text)
+            return data.get('prestashop', {}) if 'prestashop' in data else data
+        except (ExpatError, ElementTree.ParseError, ValueError) as ex:
             logger.error(f'Parsing Error: {str(ex)}')
             return False
 
-    async def create(self, resource: str, data: dict) -> Optional[dict]:
+    async def create(self, resource: str, data: dict, **kwargs) -> Optional[dict]:
         """! Create a new resource in PrestaShop API asynchronously.
 
         Args:
@@ -360,7 +416,8 @@ class PrestaShopAsync:
         Returns:
              dict: Response from the API.
         """
-        return await self._exec(resource=resource, method='POST', data=data, io_format=self.data_format)
+        kwargs.setdefault('io_format', self.data_format)
+        return await self._exec(resource=resource, method='POST', data=data, **kwargs)
 
     async def read(self, resource: str, resource_id: Union[int, str], **kwargs) -> Optional[dict]:
         """! Read a resource from the PrestaShop API asynchronously.
@@ -372,7 +429,8 @@ class PrestaShopAsync:
         Returns:
             dict: Response from the API.
         """
-        return await self._exec(resource=resource, resource_id=resource_id, method='GET', io_format= self.data_format)
+        kwargs.setdefault('io_format', self.data_format)
+        return await self._exec(resource=resource, resource_id=resource_id, method='GET', **kwargs)
 
     async def write(self, resource: str, data: dict) -> Optional[dict]:
         """! Update an existing resource in the PrestaShop API asynchronously.
@@ -397,7 +455,7 @@ class PrestaShopAsync:
         Returns:
             bool: `True` if successful, `False` otherwise.
         """
-        return await self._exec(resource=resource, resource_id=resource_id, method='DELETE', io_format=self.data_format)
+        return bool(await self._exec(resource=resource, resource_id=resource_id, method='DELETE', io_format=self.data_format))
 
     async def search(self, resource: str, filter: Optional[Union[str, dict]] = None, **kwargs) -> List[dict]:
         """! Search for resources in the PrestaShop API asynchronously.
@@ -409,11 +467,14 @@ class PrestaShopAsync:
         Returns:
              List[dict]: List of resources matching the search criteria.
         """
-        return await self._exec(resource=resource, search_filter=filter, method='GET', io_format=self.data_format, **kwargs)
+        kwargs.setdefault('io_format', self.data_format)
+        return await self._exec(resource=resource, search_filter=filter, method='GET', **kwargs)
 
     async def create_binary(self, resource: str, file_path: str, file_name: str) -> dict:
         """! Upload a binary file to a PrestaShop API resource asynchronously.
 
+        The file is sent as the multipart field `image`, as the PrestaShop image API expects.
+
         Args:
             resource (str): API resource (e.g., 'images/products/22').
             file_path (str): Path to the binary file.
@@ -422,15 +483,25 @@ class PrestaShopAsync:
         Returns:
             dict: Response from the API.
         """
-        with open(file_path, 'rb') as file:
-            headers = {'Content-Type': 'application/octet-stream'}
-            async with self.client.post(
-                url=f'{self.API_DOMAIN}{resource}',
-                headers=headers,
-                data=file.read()
-            ) as response:
+        try:
+            content: bytes = await asyncio.to_thread(Path(file_path).read_bytes)
+        except OSError as ex:
+            logger.error(f'Ошибка чтения файла {file_path}', ex, False)
+            return {'error': str(ex)}
 
-               return response.json()
+        form = aiohttp.FormData()
+        form.add_field('image', content, filename=str(file_name or os.path.basename(file_path)), content_type='image/jpeg')
+
+        client = await self._get_client()
+        try:
+            async with self._semaphore:
+                async with client.post(url=f'{self.API_DOMAIN}{resource}', data=form) as response:
+                    if not await self._check_response(response.status, response, 'POST', resource):
+                        return {'error': response.status}
+                    return self._parse(await response.text(), 'XML')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            logger.error(f'Ошибка при загрузке изображения:', ex, False)
+            return {'error': str(ex)}
 
     def _save(self, file_name: str, data: dict):
         """! Save data to a file.
@@ -451,7 +522,8 @@ class PrestaShopAsync:
         Returns:
             dict | None: Data from the API or `False` on failure.
         """
-        data = await self._exec(resource=resource, method='GET', io_format=self.data_format, **kwargs)
+        kwargs.setdefault('io_format', self.data_format)
+        data = await self._exec(resource=resource, method='GET', **kwargs)
         if data:
             self._save(f'{resource}.json', data)
             return data
@@ -503,10 +575,11 @@ class PrestaShopAsync:
             dict | None: Response from the API or `False` on failure.
         """
         url_parts = img_url.rsplit('.', 1)
-        url_without_extension = url_parts[0]
         extension = url_parts[1] if len(url_parts) > 1 else ''
         filename = str(resource_id) + f'_{img_name}.{extension}'
-        png_file_path = await save_image_from_url(img_url, filename)
+        png_file_path = await save_image_from_url_async(img_url, filename)
+        if not png_file_path:
+            return False
         response = await self.create_binary(resource, png_file_path, img_name)
         self.remove_file(png_file_path)
         return response
@@ -524,14 +597,7 @@ class PrestaShopAsync:
         Returns:
             dict | None: Response from the API or `False` on failure.
         """
-        url_parts = img_url.rsplit('.', 1)
-        url_without_extension = url_parts[0]
-        extension = url_parts[1] if len(url_parts) > 1 else ''
-        filename = str(resource_id) + f'_{img_name}.{extension}'
-        png_file_path = await save_image_from_url(img_url, filename)
-        response = await self.create_binary(resource, png_file_path, img_name)
-        self.remove_file(png_file_path)
-        return response
+        return await self.upload_image_async(resource, resource_id, img_url, img_name)
 
     async def get_product_images(self, product_id: int) -> Optional[dict]:
         """! Get images for a product asynchronously.
@@ -542,4 +608,4 @@ class PrestaShopAsync:
         Returns:
             dict | None: List of product images or `False` on failure.
         """
-        return await self._exec(f'products/{product_id}/images', method='GET', io_format=self.data_format)
\ No newline at end of file
+        return await self._exec(f'products/{product_id}/images', method='GET', io_format=self.data_format)
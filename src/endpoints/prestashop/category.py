@@ -22,6 +22,7 @@ import asyncio
 from src.logger.logger import logger
 from src.utils.jjson import j_loads, j_dumps
 from src.endpoints.prestashop.api import PrestaShop, PrestaShopAsync
+from src.endpoints.prestashop.category_tree import CategoryTree
 
 
 class PrestaCategory(PrestaShop):
@@ -41,6 +42,7 @@ class PrestaCategory(PrestaShop):
             >>> category = PrestaCategory(api_key='your_api_key', api_domain='your_domain')
         """
         super().__init__(api_key=api_key, api_domain=api_domain, *args, **kwargs)
+        self.category_tree: CategoryTree = CategoryTree.for_api(self)
 
     def get_parent_categories_list(
         self, id_category: str | int, parent_categories_list: Optional[List[int | str]] = None
@@ -64,22 +66,14 @@ class PrestaCategory(PrestaShop):
             >>> print(parent_categories)
             [2, 10]
         """
+        parent_categories_list = parent_categories_list or []
         if not id_category:
             logger.error('Missing category ID.')
-            return parent_categories_list or []
-
-        category: Optional[Dict] = super().get(
-            'categories', resource_id=id_category, display='full', io_format='JSON'
-        )
-        if not category:
-            logger.error('Issue with retrieving categories.')
-            return parent_categories_list or []
-
-        _parent_category: int = int(category['id_parent'])
-        parent_categories_list = parent_categories_list or []
-        parent_categories_list.append(_parent_category)
-
-        if _parent_category <= 2:
             return parent_categories_list
-        else:
-            return self.get_parent_categories_list(_parent_category, parent_categories_list)
+
+        # Родительские категории берутся из дерева категорий, загруженного одним запросом
+        parents: List[int] = self.category_tree.get_ancestors(id_category, self)
+        if not parents and int(id_category) > 2:
+            logger.error(f'Issue with retrieving categories. Category {id_category} not found.')
+        parent_categories_list.extend(parents)
+        return parent_categories_list
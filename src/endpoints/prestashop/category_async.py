@@ -15,6 +15,7 @@ import asyncio
 from src.logger.logger import logger
 from src.utils.jjson import j_loads, j_dumps
 from src.endpoints.prestashop.api import PrestaShop, PrestaShopAsync
+from src.endpoints.prestashop.category_tree import CategoryTree
 
 
 
@@ -31,31 +32,41 @@ class PrestaCategoryAsync(PrestaShopAsync):
             raise ValueError('Both api_domain and api_key parameters are required.')
 
         super().__init__(api_domain, api_key)
+        self.category_tree: CategoryTree = CategoryTree.for_api(self)
 
-    async def get_parent_categories_list_async(self, id_category: int|str , additional_categories_list: Optional[List[int] | int] = []) -> List[int]:
-        """! Asynchronously retrieve parent categories for a given category."""
+    async def get_parent_categories_list_async(self, id_category: int|str , additional_categories_list: Optional[List[int] | int] = None) -> List[int]:
+        """! Asynchronously retrieve parent categories for a given category and additional categories.
+
+        Parent categories are resolved from `self.category_tree` (one request for the whole tree).
+
+        Returns:
+            List[int]: Parent categories of all given categories, without duplicates, up to the root category 2.
+        """
         try:
             id_category:int = id_category if isinstance(id_category, int) else int(id_category)
         except Exception as ex:
             logger.error(f"Недопустимый формат категории{id_category}", ex)
+            return []
 
-        additional_categories_list:list = additional_categories_list if isinstance(additional_categories_list, list) else [additional_categories_list]
-        additional_categories_list.append(id_category)
+        if additional_categories_list is None:
+            additional_categories_list = []
+        categories_list:list = list(additional_categories_list) if isinstance(additional_categories_list, list) else [additional_categories_list]
+        categories_list.append(id_category)
 
         out_categories_list:list = []
 
-        for c in additional_categories_list:
-
+        for c in categories_list:
             try:
-                parent:int = await super().read('categories', resource_id=c, display='full', io_format='JSON')
+                parents:List[int] = await self.category_tree.get_ancestors_async(c, self)
             except Exception as ex:
                 logger.error(f"Недопустимый формат категории", ex)
-                continue            
-                
-            if parent <=2:
-                return out_categories_list # Дошли до верха. Дерево категорий начинается с 2
+                continue
+
+            for parent in parents: # Дерево категорий начинается с 2, `parents` заканчивается на нем
+                if parent not in out_categories_list:
+                    out_categories_list.append(parent)
 
-            out_categories_list.append(parent)
+        return out_categories_list
 
 
 
@@ -0,0 +1,273 @@
+## \file /src/endpoints/prestashop/category_tree.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+```rst
+  .. module:: src.endpoints.prestashop.category_tree
+```
+Индекс дерева категорий PrestaShop.
+====================================
+Все категории магазина загружаются одним запросом `categories?display=[id,id_parent]`
+и хранятся в памяти (и в файле кэша) в виде словаря `id -> id_parent`.
+Родительские категории вычисляются из памяти, без запросов к API. Индекс перезагружается по истечении `ttl`
+или если запрошена категория, которой нет в индексе (например, созданная после загрузки).
+
+Один индекс используется всеми клиентами одного магазина, синхронными и асинхронными: `CategoryTree.for_api(api)`.
+Индекс не хранит клиента - загрузку выполняет клиент, переданный в вызов.
+
+Пример:
+```python
+api = PrestaShop(api_key, api_domain)
+tree = CategoryTree.for_api(api)
+tree.get_ancestors(11, api)                   # [5, 3, 2]
+await tree.get_ancestors_async(11, api_async)  # для `PrestaShopAsync`
+```
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import header
+from src import gs
+from src.logger.logger import logger
+from src.utils.jjson import j_loads, j_dumps
+
+
+class CategoryTree:
+    """Индекс `id категории -> id родительской категории` одного магазина.
+
+    Args:
+        api_domain (str): Домен магазина.
+        ttl (float): Время жизни индекса (секунды).
+        cache_path (Optional[Path]): Файл кэша индекса. Позволяет нескольким процессам не загружать
+            дерево категорий повторно. `None` - файл в `gs.path.tmp`, `False` - только память.
+        root_id (int): Корневая категория магазина. Дерево категорий PrestaShop начинается с 2.
+    """
+
+    _instances: Dict[str, 'CategoryTree'] = {}
+
+    def __init__(self, api_domain: str = '', ttl: float = 3600, cache_path: Optional[Path | bool] = None, root_id: int = 2) -> None:
+        self.api_domain = api_domain
+        self.ttl = ttl
+        self.root_id = root_id
+        self.parents: Dict[int, int] = {}
+        self.loaded_at: float = 0
+
+        if cache_path is None:
+            host: str = urlparse(api_domain).netloc or 'default'
+            cache_path = Path(gs.path.tmp) / 'prestashop' / f'categories_{host}.json'
+        self.cache_path: Optional[Path] = Path(cache_path) if cache_path else None
+
+        self._lock = threading.Lock()
+        # `asyncio.Lock` привязан к циклу событий: у каждого цикла свой замок
+        self._async_locks: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+        # Время последней перезагрузки из-за неизвестной категории. Не чаще одного раза в минуту.
+        self._last_miss_reload: float = 0
+
+    @classmethod
+    def for_api(cls, api, **kwargs) -> 'CategoryTree':
+        """Возвращает общий индекс для магазина клиента `api`.
+
+        Args:
+            api: Клиент `PrestaShop` или `PrestaShopAsync`.
+            **kwargs: Параметры `CategoryTree` для первого создания индекса.
+
+        Returns:
+            CategoryTree: Индекс категорий магазина.
+        """
+        key: str = cls._api_domain(api)
+        tree: Optional[CategoryTree] = cls._instances.get(key)
+        if tree is None:
+            tree = cls._instances[key] = cls(key, **kwargs)
+        return tree
+
+    @staticmethod
+    def _api_domain(api) -> str:
+        return getattr(api, 'api_domain', None) or getattr(api, 'API_DOMAIN', None) or ''
+
+    @property
+    def is_stale(self) -> bool:
+        """Индекс не загружен или устарел. После неудачной загрузки повтор - не раньше чем через минуту."""
+        return time.time() - self.loaded_at > (self.ttl if self.parents else 60)
+
+    # --------------------------------------------------------------------------
+    #                  Загрузка
+    # --------------------------------------------------------------------------
+
+    def load(self, api, force: bool = False) -> bool:
+        """Загружает индекс через синхронный клиент `PrestaShop` (или из файла кэша).
+
+        Args:
+            api: Синхронный клиент `PrestaShop` магазина.
+            force (bool): Игнорировать файл кэша и загрузить категории из API.
+
+        Returns:
+            bool: `True`, если индекс загружен.
+        """
+        with self._lock:
+            if not force and self._load_cache():
+                return True
+            response = api._exec(resource='categories', display='[id,id_parent]', data_format='JSON')
+            return self._index(response)
+
+    async def load_async(self, api, force: bool = False) -> bool:
+        """Загружает индекс через асинхронный клиент `PrestaShopAsync` (или из файла кэша).
+
+        Args:
+            api: Асинхронный клиент `PrestaShopAsync` магазина.
+            force (bool): Игнорировать файл кэша и загрузить категории из API.
+
+        Returns:
+            bool: `True`, если индекс загружен.
+        """
+        loop = asyncio.get_running_loop()
+        lock: Optional[asyncio.Lock] = self._async_locks.get(loop)
+        if lock is None:
+            lock = self._async_locks[loop] = asyncio.Lock()
+        async with lock:
+            if not force and self._load_cache():
+                return True
+            response = await api._exec(resource='categories', display='[id,id_parent]', io_format='JSON')
+            return self._index(response)
+
+    def ensure(self, api) -> None:
+        """Загружает индекс через синхронный клиент `api`, если индекс не загружен или устарел."""
+        if self.is_stale:
+            self.load(api)
+
+    async def ensure_async(self, api) -> None:
+        """Загружает индекс через асинхронный клиент `api`, если индекс не загружен или устарел."""
+        if self.is_stale:
+            await self.load_async(api)
+
+    def _index(self, response: Optional[dict]) -> bool:
+        """Строит индекс из ответа API `{'categories': [{'id': ..., 'id_parent': ...}, ...]}`."""
+        categories = (response or {}).get('categories') if isinstance(response, dict) else None
+        if not categories:
+            logger.error(f'Не удалось загрузить дерево категорий', None, False)
+            self.loaded_at = time.time()
+            return False
+
+        parents: Dict[int, int] = {}
+        for category in categories if isinstance(categories, list) else [categories]:
+            try:
+                parents[int(category['id'])] = int(category.get('id_parent') or 0)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        self.parents = parents
+        self.loaded_at = time.time()
+        logger.debug(f'Загружено категорий: {len(parents)}', None, False)
+
+        if self.cache_path:
+            j_dumps({'loaded_at': self.loaded_at, 'parents': {str(k): v for k, v in parents.items()}}, self.cache_path)
+        return True
+
+    def _load_cache(self) -> bool:
+        """Загружает индекс из файла кэша, если файл не старше `ttl`."""
+        if not self.cache_path or not self.cache_path.exists():
+            return False
+        data: dict = j_loads(self.cache_path) or {}
+        loaded_at: float = data.get('loaded_at') or 0
+        if not data.get('parents') or time.time() - loaded_at > self.ttl:
+            return False
+        self.parents = {int(k): int(v) for k, v in data['parents'].items()}
+        self.loaded_at = loaded_at
+        return True
+
+    def _should_reload_on_miss(self) -> bool:
+        if time.time() - self._last_miss_reload < 60:
+            return False
+        self._last_miss_reload = time.time()
+        return True
+
+    # --------------------------------------------------------------------------
+    #                  Запросы к индексу
+    # --------------------------------------------------------------------------
+
+    def ancestors(self, id_category: int | str) -> Optional[List[int]]:
+        """Возвращает родительские категории из памяти, от ближайшей до корневой включительно.
+
+        Args:
+            id_category (int | str): ID категории.
+
+        Returns:
+            Optional[List[int]]: Список ID родительских категорий или `None`, если категории нет в индексе.
+        """
+        try:
+            cat_id: int = int(id_category)
+        except (TypeError, ValueError):
+            return None
+        if cat_id <= self.root_id:
+            return []
+        if cat_id not in self.parents:
+            return None
+
+        out: List[int] = []
+        while cat_id > self.root_id and cat_id in self.parents:
+            cat_id = self.parents[cat_id]
+            if not cat_id or cat_id in out:  # <- защита от циклов в данных магазина
+                break
+            out.append(cat_id)
+        return out
+
+    def get_ancestors(self, id_category: int | str, api) -> List[int]:
+        """Родительские категории для синхронного клиента. Загружает индекс при необходимости.
+
+        Args:
+            id_category (int | str): ID категории.
+            api: Синхронный клиент `PrestaShop` магазина.
+
+        Returns:
+            List[int]: Список ID родительских категорий.
+        """
+        self.ensure(api)
+        result = self.ancestors(id_category)
+        if result is None and self._should_reload_on_miss():
+            self.load(api, force=True)
+            result = self.ancestors(id_category)
+        return result or []
+
+    async def get_ancestors_async(self, id_category: int | str, api) -> List[int]:
+        """Родительские категории для асинхронного клиента. Загружает индекс при необходимости.
+
+        Args:
+            id_category (int | str): ID категории.
+            api: Асинхронный клиент `PrestaShopAsync` магазина.
+
+        Returns:
+            List[int]: Список ID родительских категорий.
+        """
+        await self.ensure_async(api)
+        result = self.ancestors(id_category)
+        if result is None and self._should_reload_on_miss():
+            await self.load_async(api, force=True)
+            result = self.ancestors(id_category)
+        return result or []
+
+    def expand(self, categories: Iterable[int | str]) -> List[int]:
+        """Возвращает категории вместе со всеми их родительскими категориями, без повторов.
+
+        Индекс должен быть загружен (`ensure()`/`ensure_async()`).
+
+        Args:
+            categories (Iterable[int | str]): ID категорий.
+
+        Returns:
+            List[int]: Категории и их родительские категории в порядке обхода.
+        """
+        out: Dict[int, None] = {}
+        for c in categories:
+            try:
+                out.setdefault(int(c))
+            except (TypeError, ValueError):
+                continue
+            for parent in self.ancestors(c) or []:
+                out.setdefault(parent)
+        return list(out)
@@ -6,23 +6,108 @@
 .. module:: src.endpoints.prestashop
     :platform: Windows, Unix
     :synopsis: Модуль для работы с запросами списка цен PrestaShop.
+
+Быстрое обновление цен и остатков
+---------------------------------
+
+`PriceListRequester.request_prices()` читает текущие цены товаров магазина по артикулу (`reference`)
+пакетами по `batch_size` - одним запросом `products?filter[reference]=[a|b|...]` на пакет.
+`modify_product_price()` изменяет цену одного товара запросом `PATCH` - передается только поле `price`.
+
+`PriceListRequesterAsync` делает то же на асинхронном API:
+
+- `request_prices()` - цены и остатки (`stock_availables`) пакетов товаров, пакеты запрашиваются одновременно;
+- `push()` - отправляет в магазин только изменившиеся поля (`price` товара, `quantity` остатка)
+  запросами `PATCH` пакетами по `batch_size`. Значения, совпадающие с текущими в магазине, не отправляются.
+  Если веб-сервис не поддерживает `PATCH` (`partial=False`), запись читается и отправляется целиком (`PUT`).
+
+Сбор изменившихся цен и остатков у поставщиков - `src.suppliers.price_refresh`.
 """
 
 
 import sys
 import os
+import asyncio
 from attr import attr, attrs
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union, Dict, Any, List
+from typing import Union, Dict, Any, Iterable, List, Optional
+from xml.sax.saxutils import escape
 
 import header
 from src import gs
 from src.logger.logger import logger
 from src.utils.jjson import j_loads, j_loads_ns
-from .api import PrestaShop
+from .api import PrestaShop, PrestaShopAsync
 from types import SimpleNamespace
 
 
+# Поля товара и остатка, которые обновляются при быстром обновлении
+PRICE: str = 'price'
+QUANTITY: str = 'quantity'
+
+# Точность сравнения цен
+_PRICE_TOLERANCE: float = 1e-6
+
+
+@dataclass
+class PriceChange:
+    """Изменение цены и/или остатка товара магазина.
+
+    Attributes:
+        reference (str): Артикул товара (`reference`).
+        price (Optional[float]): Новая цена. `None` - цена не изменилась.
+        quantity (Optional[int]): Новый остаток. `None` - остаток не изменился.
+        id_product (Optional[int]): id товара в магазине. Определяется по `reference`, если не задан.
+        id_stock_available (Optional[int]): id остатка товара. Определяется по `id_product`, если не задан.
+        key (Optional[str]): Ключ товара вызывающего кода (например, ключ `ChangeStore`).
+        pushed (tuple): Отправленные в магазин поля.
+        failed (tuple): Поля, которые не удалось отправить.
+        error (Optional[str]): Причина, по которой изменение не отправлено.
+    """
+
+    reference: str
+    price: Optional[float] = None
+    quantity: Optional[int] = None
+    id_product: Optional[int] = None
+    id_stock_available: Optional[int] = None
+    key: Optional[str] = None
+    pushed: tuple = ()
+    failed: tuple = ()
+    error: Optional[str] = None
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for i in range(0, len(items), max(1, size)):
+        yield items[i:i + size]
+
+
+def _filter_values(values: Iterable[Any]) -> str:
+    """Значение фильтра веб-сервиса `[a|b|c]`. Значения с символами `[`, `]`, `|` в фильтр не попадают."""
+    return '[' + '|'.join(str(v) for v in values if not any(c in str(v) for c in '[]|')) + ']'
+
+
+def _records(response: Any, resource: str) -> List[dict]:
+    """Записи ресурса из ответа веб-сервиса (JSON: `{'products': [...]}`, пустой результат - `[]`)."""
+    if not isinstance(response, dict):
+        return []
+    records = response.get(resource) or []
+    if isinstance(records, dict):
+        # Ответ в XML: `{'products': {'product': [...] | {...}}}`
+        records = next(iter(records.values()), [])
+    return records if isinstance(records, list) else [records]
+
+
+def _xml_payload(item: str, values: Dict[str, Any]) -> str:
+    """XML частичного обновления записи (`PATCH`): `<prestashop><product><id>..</id><price>..</price></product></prestashop>`."""
+    fields: str = ''.join(f'<{name}>{escape(str(value))}</{name}>' for name, value in values.items())
+    return f'<?xml version="1.0" encoding="UTF-8"?><prestashop><{item}>{fields}</{item}></prestashop>'
+
+
+def _format_price(price: float) -> str:
+    return f'{float(price):.6f}'
+
+
 class PriceListRequester(PrestaShop):
     """
     Класс для запроса списка цен.
@@ -31,33 +116,52 @@ class PriceListRequester(PrestaShop):
         PrestaShop: Базовый класс для работы с API PrestaShop.
     """
 
-    def __init__(self, api_credentials: Dict[str, str]) -> None:
+    batch_size: int = 100
+
+    def __init__(self, api_credentials: Dict[str, str], batch_size: Optional[int] = None) -> None:
         """
         Инициализирует объект класса PriceListRequester.
 
         Args:
             api_credentials (Dict[str, str]): Словарь с учетными данными для API,
                 включая 'api_domain' и 'api_key'.
+            batch_size (Optional[int]): Количество товаров в одном запросе цен. По умолчанию - 100.
 
         Returns:
             None
         """
         super().__init__(api_credentials['api_domain'], api_credentials['api_key'])
+        if batch_size is not None:
+            self.batch_size = batch_size
 
     def request_prices(self, products: List[str]) -> Dict[str, float]:
         """
         Запрашивает список цен для указанных товаров.
 
+        Цены читаются пакетами по `batch_size` товаров: один запрос
+        `products?filter[reference]=[a|b|...]&display=[id,reference,price]` на пакет.
+
         Args:
-            products (List[str]): Список товаров, для которых требуется получить цены.
+            products (List[str]): Артикулы (`reference`) товаров, для которых требуется получить цены.
 
         Returns:
             Dict[str, float]: Словарь, где ключами являются товары, а значениями - их цены.
-                Например: {'product1': 10.99, 'product2': 5.99}
+                Например: {'product1': 10.99, 'product2': 5.99}. Товаров, не найденных в магазине, в словаре нет.
         """
-        # Здесь код для отправки запроса на получение цен из источника данных
-        ...
-        return {}
+        prices: Dict[str, float] = {}
+        for chunk in _chunks(list(dict.fromkeys(str(p) for p in products)), self.batch_size):
+            response = self.search(
+                'products',
+                filter={'reference': _filter_values(chunk)},
+                display='[id,reference,price]',
+                data_format='JSON',
+            )
+            for record in _records(response, 'products'):
+                try:
+                    prices[str(record['reference'])] = float(record['price'])
+                except (KeyError, TypeError, ValueError) as ex:
+                    logger.error(f'Ошибка чтения цены товара {record}', ex, False)
+        return prices
 
     def update_source(self, new_source: str) -> None:
         """
@@ -71,16 +175,195 @@ class PriceListRequester(PrestaShop):
         """
         self.source = new_source
 
-    def modify_product_price(self, product: str, new_price: float) -> None:
+    def modify_product_price(self, product: str | int, new_price: float) -> bool:
         """
         Модифицирует цену указанного товара.
 
+        Отправляется только поле `price` (`PATCH products/<id>`), остальные поля товара не читаются и не перезаписываются.
+
         Args:
-            product (str): Название товара.
+            product (str | int): id товара в магазине (`int`) или его артикул (`reference`).
             new_price (float): Новая цена товара.
 
         Returns:
-            None
+            bool: `True`, если цена изменена.
         """
-        # Здесь код для изменения цены товара в источнике данных
-        ...
\ No newline at end of file
+        id_product: Optional[int] = product if isinstance(product, int) else None
+        if id_product is None:
+            response = self.search('products', filter={'reference': _filter_values([product])}, display='[id]', data_format='JSON')
+            records: List[dict] = _records(response, 'products')
+            if not records:
+                logger.error(f'Товар {product} не найден в магазине', None, False)
+                return False
+            id_product = int(records[0]['id'])
+
+        response = self._exec(
+            resource='products',
+            resource_id=id_product,
+            method='PATCH',
+            data=_xml_payload('product', {'id': id_product, PRICE: _format_price(new_price)}),
+            display=None,
+            data_format='XML',
+        )
+        return bool(response)
+
+
+class PriceListRequesterAsync(PrestaShopAsync):
+    """
+    Асинхронный запрос и обновление цен и остатков товаров магазина.
+
+    Args:
+        *args: Аргументы `PrestaShopAsync` (`api_domain`, `api_key`, ...).
+        batch_size (int): Количество товаров в одном пакете чтения и отправки. По умолчанию - 100.
+        partial (bool): Обновлять поля запросом `PATCH`. `False` - запись читается и отправляется целиком (`PUT`).
+        **kwargs: Именованные аргументы `PrestaShopAsync`.
+
+    Example:
+        >>> async with PriceListRequesterAsync(api_domain, api_key) as api:
+        ...     changes = await api.push([PriceChange('SKU-1', price=10.5), PriceChange('SKU-2', quantity=0)])
+    """
+
+    batch_size: int = 100
+    partial: bool = True
+
+    def __init__(self, *args, batch_size: Optional[int] = None, partial: Optional[bool] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if partial is not None:
+            self.partial = partial
+
+    async def request_prices(self, references: Iterable[str]) -> Dict[str, dict]:
+        """
+        Запрашивает цены и остатки товаров по артикулам.
+
+        Пакеты по `batch_size` товаров запрашиваются одновременно (число запросов ограничено `concurrency`):
+        на пакет - один запрос `products` и один запрос `stock_availables`.
+
+        Args:
+            references (Iterable[str]): Артикулы (`reference`) товаров.
+
+        Returns:
+            Dict[str, dict]: `{reference: {'id_product', 'price', 'id_stock_available', 'quantity'}}`.
+                Товаров, не найденных в магазине, в словаре нет.
+        """
+        chunks: List[list] = list(_chunks(list(dict.fromkeys(str(r) for r in references)), self.batch_size))
+        result: Dict[str, dict] = {}
+        for chunk_result in await asyncio.gather(*(self._request_chunk(chunk) for chunk in chunks)):
+            result.update(chunk_result)
+        return result
+
+    async def _request_chunk(self, references: List[str]) -> Dict[str, dict]:
+        products: List[dict] = _records(
+            await self.search('products', filter={'reference': _filter_values(references)}, display='[id,reference,price]', io_format='JSON'),
+            'products',
+        )
+        result: Dict[str, dict] = {}
+        for record in products:
+            try:
+                result[str(record['reference'])] = {'id_product': int(record['id']), PRICE: float(record['price'])}
+            except (KeyError, TypeError, ValueError) as ex:
+                logger.error(f'Ошибка чтения цены товара {record}', ex, False)
+        if not result:
+            return result
+
+        by_id: Dict[int, dict] = {item['id_product']: item for item in result.values()}
+        stocks: List[dict] = _records(
+            await self.search(
+                'stock_availables',
+                filter={'id_product': _filter_values(by_id), 'id_product_attribute': '[0]'},
+                display='[id,id_product,quantity]',
+                io_format='JSON',
+            ),
+            'stock_availables',
+        )
+        for record in stocks:
+            try:
+                item: Optional[dict] = by_id.get(int(record['id_product']))
+                if item is not None:
+                    item['id_stock_available'] = int(record['id'])
+                    item[QUANTITY] = int(record['quantity'])
+            except (KeyError, TypeError, ValueError) as ex:
+                logger.error(f'Ошибка чтения остатка товара {record}', ex, False)
+        return result
+
+    async def push(self, changes: Iterable[PriceChange]) -> List[PriceChange]:
+        """
+        Отправляет в магазин изменившиеся цены и остатки.
+
+        Изменения обрабатываются пакетами по `batch_size`: для пакета одним запросом читаются
+        текущие значения (и id товаров и остатков), затем одновременно отправляются только поля,
+        значения которых в магазине отличаются.
+
+        Args:
+            changes (Iterable[PriceChange]): Изменения.
+
+        Returns:
+            List[PriceChange]: Те же изменения с заполненными `id_product`, `id_stock_available`, `pushed`, `failed` и `error`.
+        """
+        changes = list(changes)
+        for batch in _chunks(changes, self.batch_size):
+            current: Dict[str, dict] = await self.request_prices(change.reference for change in batch)
+            updates: list = []
+            for change in batch:
+                shop: Optional[dict] = current.get(str(change.reference))
+                if shop is None:
+                    change.error = 'not found'
+                    continue
+                change.id_product = change.id_product or shop['id_product']
+                change.id_stock_available = change.id_stock_available or shop.get('id_stock_available')
+                if change.price is not None and abs(float(change.price) - shop[PRICE]) > _PRICE_TOLERANCE:
+                    updates.append(self._update(change, PRICE))
+                if change.quantity is not None and int(change.quantity) != shop.get(QUANTITY):
+                    if change.id_stock_available:
+                        updates.append(self._update(change, QUANTITY))
+                    else:
+                        change.failed += (QUANTITY,)
+                        change.error = 'no stock_available'
+            await asyncio.gather(*updates)
+        return changes
+
+    async def _update(self, change: PriceChange, name: str) -> None:
+        """Обновляет одно поле: `price` товара или `quantity` остатка."""
+        if name == PRICE:
+            resource, item, resource_id, value = 'products', 'product', change.id_product, _format_price(change.price)
+        else:
+            resource, item, resource_id, value = 'stock_availables', 'stock_available', change.id_stock_available, int(change.quantity)
+
+        if self.partial:
+            response = await self._exec(
+                resource=resource,
+                resource_id=resource_id,
+                method='PATCH',
+                data=_xml_payload(item, {'id': resource_id, name: value}),
+                display=None,
+                io_format='XML',
+            )
+        else:
+            response = await self._put_field(resource, item, resource_id, name, value)
+
+        if response:
+            change.pushed += (name,)
+        else:
+            change.failed += (name,)
+            change.error = f'{name} not updated'
+
+    async def _put_field(self, resource: str, item: str, resource_id: int, name: str, value: Any) -> Optional[dict]:
+        """Обновление поля без `PATCH`: запись читается и отправляется целиком."""
+        record: Optional[dict] = await self.read(resource, resource_id, display=None, io_format='XML')
+        record = (record or {}).get(item) if isinstance(record, dict) else None
+        if not record:
+            return None
+        record[name] = value
+        if item == 'product':
+            # Поля только для чтения - веб-сервис отклоняет запись с ними
+            record.pop('manufacturer_name', None)
+            record.pop(QUANTITY, None)
+        return await self._exec(
+            resource=resource,
+            resource_id=resource_id,
+            method='PUT',
+            data={'prestashop': {item: record}},
+            display=None,
+            io_format='XML',
+        )
@@ -22,6 +22,7 @@ import header
 from src import gs
 from src.endpoints.prestashop.api import PrestaShop
 from src.endpoints.prestashop.category import PrestaCategory
+from src.endpoints.prestashop.category_tree import CategoryTree
 from src.endpoints.prestashop.product_fields import ProductFields
 from src.endpoints.prestashop.utils.xml_json_convertor import dict2xml, xml2dict, presta_fields_to_xml
 
@@ -83,6 +84,8 @@ class PrestaProduct(PrestaShop):
             *args,
             **kwargs,
         )
+        # Дерево категорий магазина, общее для всех клиентов с тем же `api_domain`
+        self.category_tree: CategoryTree = CategoryTree.for_api(self)
 
     def get_product_schema(self, resource_id: Optional[str | int] = None, schema: Optional[str] = 'blank') -> dict:
         """Get the schema for the product resource from PrestaShop.
@@ -122,14 +125,23 @@ class PrestaProduct(PrestaShop):
     def _add_parent_categories(self, f: ProductFields) -> None:
         """Calculates and appends all parent categories for a list of category IDs to the ProductFields object.
 
+        Parent categories are taken from `self.category_tree`, which loads the whole category tree
+        with a single request. If a category is missing from the tree, its parents are requested one by one.
+
         Args:
             f (ProductFields): The ProductFields object to append parent categories to.
         """
-        for _c in f.additional_categories:
+        for _c in list(f.additional_categories):
             cat_id: int = int(_c['id'])  # {'id':'value'}
             if cat_id in (1, 2):  # <-- корневые категории prestashop Здесь можно добавить другие фильтры
                 continue
 
+            parents: List[int] = self.category_tree.get_ancestors(cat_id, self)
+            if parents:
+                for parent in parents:
+                    f.additional_category_append(parent)
+                continue
+
             while cat_id > 2:
                 cat_id: Optional[int] = self.get_parent_category(cat_id)
                 if cat_id:
@@ -1,24 +1,41 @@
-
-
 # -*- coding: utf-8 -*-
 """
-.. module:: src.product.product 
+.. module:: src.product.product
     :platform: Windows, Unix
     :synopsis: Interaction between website, product, and PrestaShop.
 Defines the behavior of a product in the project.
 
+Bulk import
+-----------
+`PrestaProductAsync.add_products()` streams products through bounded stages connected by queues:
+
+    categories -> serialize -> create -> image
+
+Every stage runs its own workers concurrently. Queues have a fixed size, so a slow stage (usually `create`)
+holds back the stages before it instead of buffering the whole import in memory. Every product gets an
+`ImportResult`. Products that failed at some stage are put to `retry_queue` and are retried from the stage
+where they failed (a created product is not created twice).
+
+.. code-block:: python
+
+    async with PrestaProductAsync(api_domain, api_key) as p:
+        results = await p.add_products(products, concurrency=10)
+        failed = [r for r in results if not r.ok]
 """
 
 import asyncio
+import io
+import json
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterable, Callable, Iterable, Optional
 
 import header
 from src import gs
-from src.endpoints.prestashop.api import PrestaShopAsync 
-from src.endpoints.prestashop.category_async import PrestaCategoryAsync
+from src.endpoints.prestashop.api import PrestaShopAsync
+from src.endpoints.prestashop.category_tree import CategoryTree
 
 from src.endpoints.prestashop.product_fields import ProductFields
+from src.logger.exceptions import PrestaShopException
 from src.utils.convertors.any import any2dict
 
 from src.utils.jjson import j_dumps, j_loads, j_loads_ns
@@ -26,24 +43,58 @@ from src.utils.printer import pprint as print
 from src.logger import logger
 
 
+@dataclass
+class ImportResult:
+    """Result of importing one product with `PrestaProductAsync.add_products()`.
+
+    Attributes:
+        index (int): Position of the product in the input.
+        fields (ProductFields): The product.
+        ok (bool): The product was created and its image uploaded.
+        id_product (Optional[int]): ID of the created product.
+        stage (str): Last stage the product passed, or the stage where it failed.
+        error (Optional[str]): Error of the failed stage.
+        attempts (int): Number of passes through the pipeline.
+    """
+
+    index: int
+    fields: ProductFields
+    ok: bool = False
+    id_product: Optional[int] = None
+    stage: str = ''
+    error: Optional[str] = None
+    attempts: int = 0
+    payload: Any = field(default=None, repr=False)
+    completed: set = field(default_factory=set, repr=False)
+
+
 class PrestaProductAsync(PrestaShopAsync):
     """Manipulations with the product.
     Initially, I instruct the grabber to fetch data from the product page,
     and then work with the PrestaShop API.
     """
 
-    def __init__(self, *args, **kwargs):
+    # Pipeline stages in order of execution
+    stages: tuple = ('categories', 'serialize', 'create', 'image')
+
+    def __init__(self, *args, post_format: str = 'XML', retry_queue_size: int = 10000, **kwargs):
         """
         Initializes a Product object.
 
         Args:
-            *args: Variable length argument list.
-            **kwargs: Arbitrary keyword arguments.
+            *args: Arguments of `PrestaShopAsync` (`api_domain`, `api_key`, ...).
+            post_format (str): Format of the product body sent to the API ('XML' or 'JSON').
+            retry_queue_size (int): Capacity of `retry_queue`. When it is full, the oldest failed product is dropped.
+            **kwargs: Keyword arguments of `PrestaShopAsync` (`concurrency`, `limit_per_host`, ...).
         """
         PrestaShopAsync.__init__(self, *args, **kwargs)
-        self.presta_category_async = PrestaCategoryAsync(*args, **kwargs)
-
-
+        self.post_format = post_format
+        self.retry_queue: asyncio.Queue = asyncio.Queue(maxsize=retry_queue_size)
+        # Дерево категорий магазина: загружается одним запросом и используется всеми товарами
+        self.category_tree: CategoryTree = CategoryTree.for_api(self)
+        # id категории -> id родительской категории (или задача, которая его получает).
+        # Используется для категорий, которых нет в `category_tree`.
+        self._category_parents: Dict[int, asyncio.Future] = {}
 
     async def add_new_product_async(self, f: ProductFields) -> ProductFields | None:
         """
@@ -55,28 +106,253 @@ class PrestaProductAsync(PrestaShopAsync):
         Returns:
             ProductFields | None: Returns the `ProductFields` object with `id_product` set, if the product was added successfully, `None` otherwise.
         """
+        result: ImportResult = (await self.add_products([f], retries=0, keep_failed=False))[0]
+        if not result.ok:
+            logger.error(f"Товар не был добавлен в базу данных Prestashop. Этап: {result.stage}, ошибка: {result.error}")
+            return
+        return f
 
-        f.additional_categories = await self.presta_category_async.get_parent_categories_list(f.id_category_default)
-        
-        presta_product_dict:dict = f.to_dict()
-        
-        new_f:ProductFields = await self.create('products', presta_product_dict)
+    async def add_products(
+        self,
+        products: Iterable[ProductFields | ImportResult] | AsyncIterable[ProductFields],
+        concurrency: int = 10,
+        category_workers: int = 4,
+        queue_size: int = 100,
+        retries: int = 2,
+        on_result: Optional[Callable[[ImportResult], Any]] = None,
+        keep_failed: bool = True,
+    ) -> List[ImportResult]:
+        """
+        Imports products through the bounded pipeline `categories -> serialize -> create -> image`.
 
-        if not new_f:
-            logger.error(f"Товар не был добавлен в базу данных Presyashop")
-            ...
-            return
+        Args:
+            products: Products to import (iterable or async iterable). `ImportResult` items of a previous call
+                (e.g. taken from `retry_queue`) continue from the stage where they failed.
+            concurrency (int): Workers of the `create` and `image` stages.
+            category_workers (int): Workers of the category resolution stage.
+            queue_size (int): Capacity of the queue in front of every stage.
+            retries (int): How many times failed products are passed through the pipeline again.
+            on_result (Optional[Callable[[ImportResult], Any]]): Called for every product as soon as it is
+                imported, or after its last failed attempt.
+            keep_failed (bool): Put products that still failed after all retries to `retry_queue`.
+
+        Returns:
+            List[ImportResult]: Results in input order. Products that still failed after all retries
+            are also left in `retry_queue` (with `keep_failed`).
+        """
+        results: List[ImportResult] = []
+
+        async def items():
+            if isinstance(products, AsyncIterable):
+                async for f in products:
+                    yield f
+            else:
+                for f in products:
+                    yield f
+
+        async def source():
+            async for f in items():
+                item = f if isinstance(f, ImportResult) else ImportResult(index=len(results), fields=f)
+                results.append(item)
+                yield item
+
+        async def report(item: ImportResult) -> None:
+            if on_result:
+                try:
+                    ret = on_result(item)
+                    if asyncio.iscoroutine(ret):
+                        await ret
+                except Exception as ex:
+                    logger.error(f'Ошибка обработчика результата товара #{item.index}', ex, False)
 
-        if await self.create_binary(f'images/products/{new_f.id_product}', f.local_image_path, new_f.id_product):
-            return True
+        attempt: int = 0
+        pending = source()
+        while True:
+            failed: List[ImportResult] = []
+            await self._run_pipeline(pending, concurrency, category_workers, queue_size, failed, report)
+            if not failed or attempt >= retries:
+                for item in failed:
+                    await report(item)
+                    if keep_failed:
+                        self._keep_failed(item)
+                break
 
+            attempt += 1
+            logger.info(f'Повтор импорта {len(failed)} товаров, попытка {attempt} из {retries}')
+            pending = self._iterate(failed)
+
+        ok: int = sum(1 for r in results if r.ok)
+        logger.info(f'Импорт товаров: {ok} из {len(results)} успешно')
+        return results
+
+    def _keep_failed(self, item: ImportResult) -> None:
+        """Puts a failed product to `retry_queue`; the oldest one is dropped when the queue is full."""
+        if self.retry_queue.full():
+            dropped: ImportResult = self.retry_queue.get_nowait()
+            logger.warning(f'Очередь повтора заполнена, товар #{dropped.index} удален из очереди')
+        self.retry_queue.put_nowait(item)
+
+    @staticmethod
+    async def _iterate(items: List[ImportResult]):
+        for item in items:
+            yield item
+
+    async def _run_pipeline(
+        self,
+        source: AsyncIterable[ImportResult],
+        concurrency: int,
+        category_workers: int,
+        queue_size: int,
+        failed: List[ImportResult],
+        report: Callable,
+    ) -> None:
+        """Runs one pass of the pipeline. Failed items are collected into `failed`."""
+        handlers: tuple = (
+            (self._stage_categories, category_workers),
+            (self._stage_serialize, 1),
+            (self._stage_create, concurrency),
+            (self._stage_image, concurrency),
+        )
+        queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in handlers]
+
+        source_error: Optional[Exception] = None
+
+        async def feed() -> None:
+            nonlocal source_error
+            try:
+                async for item in source:
+                    item.attempts += 1
+                    item.error = None
+                    await queues[0].put(item)
+            except Exception as ex:
+                # Items already fed still go through the pipeline; the error is raised after it drains
+                source_error = ex
+            for _ in range(handlers[0][1]):
+                await queues[0].put(None)
+
+        async def run_stage(i: int) -> None:
+            handler, workers = handlers[i]
+            name: str = self.stages[i]
+            inbox: asyncio.Queue = queues[i]
+            outbox: Optional[asyncio.Queue] = queues[i + 1] if i + 1 < len(handlers) else None
+
+            async def worker() -> None:
+                while (item := await inbox.get()) is not None:
+                    if name not in item.completed:
+                        try:
+                            await handler(item)
+                            item.completed.add(name)
+                            item.stage = name
+                        except Exception as ex:
+                            item.stage = name
+                            item.error = str(ex)
+                            logger.debug(f'Товар #{item.index}: ошибка на этапе `{name}`', ex, False)
+                            failed.append(item)
+                            continue
+
+                    if outbox:
+                        await outbox.put(item)
+                    else:
+                        item.ok = True
+                        await report(item)
+
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            if outbox:
+                for _ in range(handlers[i + 1][1]):
+                    await outbox.put(None)
+
+        tasks: List[asyncio.Task] = [asyncio.ensure_future(feed()), *(asyncio.ensure_future(run_stage(i)) for i in range(len(handlers)))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # A failed stage must not leave the other stages blocked on their queues
+            for task in tasks:
+                task.cancel()
+        if source_error:
+            raise source_error
+
+    async def _stage_categories(self, item: ImportResult) -> None:
+        """Adds the default category and all parent categories to the product associations.
+
+        Parents are taken from `category_tree`; categories missing from the tree are read level by level.
+        """
+        f: ProductFields = item.fields
+        if f.id_category_default:
+            f.additional_category_append(f.id_category_default)
+
+        for _c in list(f.additional_categories or []):
+            cat_id: Optional[int] = int(_c['id'])
+            parents: List[int] = await self.category_tree.get_ancestors_async(cat_id, self)
+            if parents:
+                for parent in parents:
+                    f.additional_category_append(parent)
+                continue
+
+            while cat_id and cat_id > 2:  # <- дерево категорий начинается с 2
+                cat_id = await self._get_parent_category(cat_id)
+                if cat_id:
+                    f.additional_category_append(cat_id)
+
+    async def _get_parent_category(self, id_category: int) -> Optional[int]:
+        """Returns the parent category. Every category is requested from the API once per instance."""
+        task: Optional[asyncio.Future] = self._category_parents.get(id_category)
+        if task is None:
+            task = asyncio.ensure_future(self._read_parent_category(id_category))
+            self._category_parents[id_category] = task
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            self._category_parents.pop(id_category, None)  # <- ошибка не кэшируется, следующий товар запросит снова
+            raise
+
+    async def _read_parent_category(self, id_category: int) -> Optional[int]:
+        response: dict = await self.read(
+            'categories', resource_id=id_category, display='[id,id_parent]', io_format='JSON'
+        )
+        if not response:
+            raise PrestaShopException(f'Категория {id_category} не найдена')
+        category: dict = response.get('category') or (response.get('categories') or [{}])[0]
+        return int(category['id_parent']) if category.get('id_parent') else None
+
+    async def _stage_serialize(self, item: ImportResult) -> None:
+        """Converts the product to the request body without building an intermediate dict for XML."""
+        f: ProductFields = item.fields
+        if self.post_format == 'XML':
+            buffer = io.StringIO()
+            buffer.write('<?xml version="1.0" encoding="UTF-8"?><prestashop>')
+            f.write_xml(buffer)
+            buffer.write('</prestashop>')
+            item.payload = buffer.getvalue()
         else:
-            logger.error(f"Не подналось изображение")
-            ...
+            buffer = io.StringIO()
+            buffer.write('{"product":')
+            f.write_json(buffer)
+            buffer.write('}')
+            item.payload = buffer.getvalue()
+
+    async def _stage_create(self, item: ImportResult) -> None:
+        """Creates the product and stores its ID."""
+        response: dict = await self.create('products', data=item.payload, io_format=self.post_format)
+        product: dict = (response or {}).get('product') or {}
+        id_product = product.get('id')
+        if not id_product:
+            raise PrestaShopException('Товар не был добавлен в базу данных Prestashop', ps_error_msg=json.dumps(response, default=str)[:500])
+        item.id_product = int(id_product)
+        item.fields.id_product = item.id_product
+        item.payload = None
+
+    async def _stage_image(self, item: ImportResult) -> None:
+        """Uploads the local product image, if the product has one."""
+        f: ProductFields = item.fields
+        if not f.local_image_path:
             return
-        ...
+        response: dict = await self.create_binary(
+            f'images/products/{item.id_product}', str(f.local_image_path), f'{item.id_product}.png'
+        )
+        if not response or 'error' in response:
+            raise PrestaShopException(f'Не подгрузилось изображение товара {item.id_product}', ps_error_msg=str(response))
+
 
-    
 async def main():
     # Example usage
     product = ProductAsync()
@@ -86,7 +362,7 @@ async def main():
         price=19.99,
         description='This is an asynchronous test product.',
     )
-    
+
     parent_categories = await Product.get_parent_categories(id_category=3)
     print(f'Parent categories: {parent_categories}')
 
@@ -100,4 +376,4 @@ async def main():
     await product.fetch_data_async()
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
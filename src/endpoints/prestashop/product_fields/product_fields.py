@@ -11,12 +11,16 @@
 
 
 import asyncio
+import json
 import re
+from copy import deepcopy
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional,  Any
+from typing import List, Dict, Optional,  Any, Callable, Iterator, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
 from types import SimpleNamespace
 
 import header
@@ -33,6 +37,226 @@ from src.utils.string.normalizer import (
 from src.logger import logger
 from src.logger.exceptions import ProductFieldException  # If you have this exception class
 
+# Схема полей (список полей и значения по умолчанию) читается с диска один раз на процесс
+_schema: Optional[tuple] = None
+
+
+def _load_schema() -> Optional[tuple]:
+    """
+    Загрузка схемы полей товара из `fields_list.txt` и `product_fields_default_values.json`.
+    Результат кэшируется на уровне модуля. Ошибка загрузки не кэшируется.
+
+    Returns:
+        Optional[tuple]: `(имена полей, шаблон значений, имена полей с изменяемыми значениями)` или `None`.
+    """
+    global _schema
+    if _schema:
+        return _schema
+
+    base_path:Path = __root__ / 'src' / 'endpoints' / 'prestashop' / 'product_fields'
+    presta_fields_list:list = read_text_file(base_path / 'fields_list.txt', as_list=True)
+    if not presta_fields_list:
+        logger.error(f"Ошибка загрузки файла со списком полей ")
+        return None
+
+    data_dict: dict = j_loads(base_path / 'product_fields_default_values.json')
+    if not data_dict:
+        logger.debug(f"Ошибка загрузки полей из файла product_fields_default_values.json")
+        return None
+
+    names: tuple = tuple(dict.fromkeys([*(name.strip() for name in presta_fields_list if name.strip()), *data_dict]))
+    template: dict = {name: None for name in names}
+    template.update(data_dict)
+    # Изменяемые значения (например, `associations`) копируются для каждого экземпляра
+    mutable: tuple = tuple(name for name, value in template.items() if isinstance(value, (dict, list)))
+    _schema = (names, template, mutable)
+    return _schema
+
+
+@lru_cache(maxsize=None)
+def _compact_class(names: tuple) -> type:
+    """
+    Создает класс компактного хранилища полей: значения хранятся в одном списке,
+    каждое поле - свойство с индексом в этом списке. Поля, которых нет в схеме, сохраняются в `__dict__`.
+
+    Args:
+        names (tuple): Имена полей схемы.
+
+    Returns:
+        type: Класс `PrestaFieldsRecord`.
+    """
+    def _field(index: int) -> property:
+        def fget(self):
+            return self._values[index]
+
+        def fset(self, value):
+            self._values[index] = value
+
+        def fdel(self):
+            self._values[index] = None
+
+        return property(fget, fset, fdel)
+
+    def __init__(self, values: list):
+        self._values = values
+
+    def __repr__(self) -> str:
+        items = [f'{name}={value!r}' for name, value in zip(names, self._values)]
+        items += [f'{name}={value!r}' for name, value in getattr(self, '__dict__', {}).items()]
+        return f'PrestaFieldsRecord({", ".join(items)})'
+
+    def __reduce__(self) -> tuple:
+        # Класс создается во время выполнения: запись восстанавливается по именам полей (очередь `multiprocessing`)
+        return _restore_compact, (names, self._values, dict(getattr(self, '__dict__', {})))
+
+    namespace: dict = {
+        '__slots__': ('_values', '__dict__'),
+        '__init__': __init__,
+        '__repr__': __repr__,
+        '__reduce__': __reduce__,
+        '_fields': names,
+    }
+    namespace.update({name: _field(i) for i, name in enumerate(names) if name.isidentifier()})
+    return type('PrestaFieldsRecord', (), namespace)
+
+
+def _restore_compact(names: tuple, values: list, extra: dict) -> Any:
+    """Восстанавливает запись `PrestaFieldsRecord` при распаковке `pickle`."""
+    record = _compact_class(names)(values)
+    record.__dict__.update(extra)
+    return record
+
+
+# Виды значений в спецификации полей `to_dict()`
+SCALAR: str = 'scalar'
+DATE: str = 'date'
+MULTILANG: str = 'multilang'
+
+# Спецификация полей товара для `to_dict()` и потоковой записи: `(поле, вид значения, пропускать только None)`.
+# Если третий элемент `False`, пропускаются все пустые значения (`''`, `0`, `None`).
+FIELD_SPEC: tuple = (
+    # -- ps_product --
+    ('id_product', SCALAR, True),
+    ('id_supplier', SCALAR, True),
+    ('id_manufacturer', SCALAR, True),
+    ('id_category_default', SCALAR, True),
+    ('id_shop_default', SCALAR, True),
+    ('id_shop', SCALAR, True),
+    ('id_tax', SCALAR, True),
+    ('on_sale', SCALAR, True),
+    ('online_only', SCALAR, True),
+    ('ean13', SCALAR, False),
+    ('isbn', SCALAR, False),
+    ('upc', SCALAR, False),
+    ('mpn', SCALAR, False),
+    ('ecotax', SCALAR, False),
+    ('minimal_quantity', SCALAR, False),
+    ('low_stock_threshold', SCALAR, False),
+    ('low_stock_alert', SCALAR, False),
+    ('price', SCALAR, False),
+    ('wholesale_price', SCALAR, False),
+    ('unity', SCALAR, False),
+    ('unit_price_ratio', SCALAR, False),
+    ('additional_shipping_cost', SCALAR, False),
+    ('reference', SCALAR, False),
+    ('supplier_reference', SCALAR, False),
+    ('location', SCALAR, False),
+    ('width', SCALAR, False),
+    ('height', SCALAR, False),
+    ('depth', SCALAR, False),
+    ('weight', SCALAR, False),
+    ('volume', SCALAR, False),
+    ('out_of_stock', SCALAR, False),
+    ('additional_delivery_times', SCALAR, False),
+    ('quantity_discount', SCALAR, False),
+    ('customizable', SCALAR, False),
+    ('uploadable_files', SCALAR, False),
+    ('text_fields', SCALAR, False),
+    ('active', SCALAR, True),
+    ('redirect_type', SCALAR, False),
+    ('id_type_redirected', SCALAR, False),
+    ('available_for_order', SCALAR, True),
+    ('available_date', DATE, False),
+    ('show_condition', SCALAR, True),
+    ('condition', SCALAR, False),
+    ('show_price', SCALAR, True),
+    ('indexed', SCALAR, True),
+    ('visibility', SCALAR, False),
+    ('cache_is_pack', SCALAR, True),
+    ('cache_has_attachments', SCALAR, True),
+    ('is_virtual', SCALAR, True),
+    ('cache_default_attribute', SCALAR, False),
+    ('date_add', DATE, False),
+    ('date_upd', DATE, False),
+    ('advanced_stock_management', SCALAR, True),
+    ('pack_stock_type', SCALAR, False),
+    ('state', SCALAR, False),
+    ('product_type', SCALAR, False),
+    ('id_default_image', SCALAR, False),
+    # -- ps_product_lang --
+    ('description', MULTILANG, False),
+    ('description_short', MULTILANG, False),
+    ('link_rewrite', MULTILANG, False),
+    ('meta_description', MULTILANG, False),
+    ('meta_keywords', MULTILANG, False),
+    ('meta_title', MULTILANG, False),
+    ('name', MULTILANG, False),
+    ('available_now', MULTILANG, False),
+    ('available_later', MULTILANG, False),
+    ('delivery_in_stock', MULTILANG, False),
+    ('delivery_out_stock', MULTILANG, False),
+    ('delivery_additional_message', MULTILANG, False),
+    ('affiliate_short_link', MULTILANG, False),
+    ('affiliate_text', MULTILANG, False),
+    ('affiliate_summary', MULTILANG, False),
+    ('affiliate_summary_2', MULTILANG, False),
+    ('affiliate_image_small', MULTILANG, False),
+    ('affiliate_image_medium', MULTILANG, False),
+    ('affiliate_image_large', MULTILANG, False),
+    ('ingredients', MULTILANG, False),
+    ('specification', MULTILANG, False),
+    ('how_to_use', MULTILANG, False),
+)
+
+# Ассоциации товара: `(ключ в associations, ключи элемента)`
+ASSOCIATION_SPEC: tuple = (
+    ('categories', ('id',)),
+    ('images', ('id',)),
+    ('combinations', ('id',)),
+    ('product_option_values', ('id',)),
+    ('product_features', ('id', 'id_feature_value')),
+    ('tags', ('id',)),
+    ('stock_availables', ('id', 'id_product_attribute')),
+    ('attachments', ('id',)),
+    ('accessories', ('id',)),
+    ('product_bundle', ('id', 'id_product_attribute', 'quantity')),
+)
+
+
+def _write_xml(write: Callable[[str], Any], tag: str, value: Any) -> None:
+    """
+    Записывает значение как XML-элемент по тем же правилам, что и `presta_fields_to_xml()`:
+    ключи `@...` - атрибуты, `#text` - текст, список - повторяющиеся элементы.
+    """
+    if isinstance(value, list):
+        for item in value:
+            _write_xml(write, tag, item)
+        return
+
+    if not isinstance(value, dict):
+        write(f'<{tag}>{escape(str(value))}</{tag}>')
+        return
+
+    attrs: str = ''.join(f' {key[1:]}={quoteattr(str(val))}' for key, val in value.items() if key.startswith('@'))
+    write(f'<{tag}{attrs}>')
+    for key, val in value.items():
+        if key == '#text':
+            write(escape(str(val)))
+        elif not key.startswith('@'):
+            _write_xml(write, key, val)
+    write(f'</{tag}>')
+
+
 @dataclass
 class ProductFields:
     """Класс, описывающий поля товара в формате API PrestaShop.
@@ -40,10 +264,14 @@ class ProductFields:
     1. Английский
     2. Иврит
     3. Русский
+
+    Схема полей загружается один раз на процесс, экземпляр создается копированием шаблона.
+    `compact=True` хранит поля в одном списке вместо `SimpleNamespace` (массовый импорт товаров).
     """
 
     presta_fields: SimpleNamespace = field(init=False)
     id_lang:int = field(default=1)
+    compact: bool = field(default=False)
 
     def __post_init__(self):
         """"""
@@ -57,33 +285,25 @@ class ProductFields:
         Returns:
             bool: True, если загрузка прошла успешно, иначе False.
         """
-        base_path:Path = __root__ / 'src' / 'endpoints' / 'prestashop'
-        presta_fields_list:list =  read_text_file(base_path / 'product_fields' / 'fields_list.txt', as_list=True) 
-        if not presta_fields_list:
-            logger.error(f"Ошибка загрузки файла со списком полей ")
-            ...
+        schema = _load_schema()
+        if not schema:
             return False
+        names, template, mutable = schema
 
         try:
-            self.presta_fields:SimpleNamespace = SimpleNamespace(**{key: None for key in presta_fields_list})
-        except Exception as ex:
-            logger.error(f"Ошибка конвертации", ex)
-            ...
-            return
+            values: dict = dict(template)
+            for name in mutable:
+                values[name] = deepcopy(template[name])
 
-        data_dict: dict = j_loads (base_path  / 'product_fields' / 'product_fields_default_values.json')
-        if not data_dict:
-            logger.debug(f"Ошибка загрузки полей из файла product_fields_default_values.json")
-            ...
-            return False
-        try:
-            for name, value in data_dict.items():
-                setattr(self.presta_fields, name, value )
+            if self.compact:
+                self.presta_fields = _compact_class(names)(list(values.values()))
+            else:
+                self.presta_fields:SimpleNamespace = SimpleNamespace(**values)
             return True
         except Exception as ex:
-            logger.error(f"Exception ", ex)
+            logger.error(f"Ошибка конвертации", ex)
             ...
-            return False 
+            return False
 
 
     def _set_multilang_value(self, field_name: str, value: str, id_lang: Optional[int | str] = None) -> bool:
@@ -1354,6 +1574,42 @@ class ProductFields:
         if 'product_bundle' in self.presta_fields.associations:
             del self.presta_fields.associations['product_bundle']
 
+    def iter_items(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Проходит по спецификации полей `FIELD_SPEC` и `ASSOCIATION_SPEC` за один проход
+        и возвращает пары `(ключ, значение)` для PrestaShop API. Промежуточный словарь не создается.
+
+        Yields:
+            Tuple[str, Any]: Ключ и значение поля. Скалярные значения - строки,
+            мультиязычные - в формате `_format_multilang_value()`, последним идет `associations`.
+        """
+        presta_fields = self.presta_fields
+
+        for name, kind, keep_empty in FIELD_SPEC:
+            value = getattr(presta_fields, name, None)
+            if value is None or (not keep_empty and not value):
+                continue
+            if kind is SCALAR:
+                yield name, str(value)
+            elif kind is MULTILANG:
+                yield name, self._format_multilang_value(value)
+            else:
+                yield name, value.isoformat() if isinstance(value, datetime) else str(value)
+
+        associations: dict = getattr(presta_fields, 'associations', None)
+        if not associations:
+            return
+
+        associations_dict: dict = {}
+        for name, keys in ASSOCIATION_SPEC:
+            items = associations.get(name)
+            if items:
+                associations_dict[name] = [
+                    {key: str(item[key]) if item[key] is not None else None for key in keys} for item in items
+                ]
+        if associations_dict:  # Только если есть что добавлять, добавляем ключ associations
+            yield 'associations', associations_dict
+
     def to_dict(self) -> Dict[str, Any]:
         """
         Преобразует объект ProductFields в словарь для PrestaShop API,
@@ -1363,207 +1619,40 @@ class ProductFields:
         Returns:
             Dict[str, Any]: Словарь с полями, готовый для PrestaShop API.
         """
-        product_dict = {}
-
-        # -- ps_product fields --
-        def str_val(value: Any) -> Optional[str]:
-            """Helper function to convert values to strings, handling None."""
-            return str(value) if value is not None else None
-
-        if self.id_product is not None:
-            product_dict["id_product"] = str_val(self.id_product)
-        if self.id_supplier is not None:
-            product_dict["id_supplier"] = str_val(self.id_supplier)
-        if self.id_manufacturer is not None:
-            product_dict["id_manufacturer"] = str_val(self.id_manufacturer)
-        if self.id_category_default is not None:
-            product_dict["id_category_default"] = str_val(self.id_category_default)
-        if self.id_shop_default is not None:
-            product_dict["id_shop_default"] = str_val(self.id_shop_default)
-        if self.id_shop is not None:
-            product_dict["id_shop"] = str_val(self.id_shop)
-        if self.id_tax is not None:
-            product_dict["id_tax"] = str_val(self.id_tax)
-        if self.on_sale is not None:
-            product_dict["on_sale"] = str_val(self.on_sale)
-        if self.online_only is not None:
-            product_dict["online_only"] = str_val(self.online_only)
-        if self.ean13:
-            product_dict["ean13"] = str_val(self.ean13)
-        if self.isbn:
-            product_dict["isbn"] = str_val(self.isbn)
-        if self.upc:
-            product_dict["upc"] = str_val(self.upc)
-        if self.mpn:
-            product_dict["mpn"] = str_val(self.mpn)
-        if self.ecotax:
-            product_dict["ecotax"] = str_val(self.ecotax)
-        if self.minimal_quantity:
-            product_dict["minimal_quantity"] = str_val(self.minimal_quantity)
-        if self.low_stock_threshold:
-            product_dict["low_stock_threshold"] = str_val(self.low_stock_threshold)
-        if self.low_stock_alert:
-            product_dict["low_stock_alert"] = str_val(self.low_stock_alert)
-        if self.price:
-            product_dict["price"] = str_val(self.price)
-        if self.wholesale_price:
-            product_dict["wholesale_price"] = str_val(self.wholesale_price)
-        if self.unity:
-            product_dict["unity"] = str_val(self.unity)
-        if self.unit_price_ratio:
-            product_dict["unit_price_ratio"] = str_val(self.unit_price_ratio)
-        if self.additional_shipping_cost:
-            product_dict["additional_shipping_cost"] = str_val(self.additional_shipping_cost)
-        if self.reference:
-            product_dict["reference"] = str_val(self.reference)
-        if self.supplier_reference:
-            product_dict["supplier_reference"] = str_val(self.supplier_reference)
-        if self.location:
-            product_dict["location"] = str_val(self.location)
-        if self.width:
-            product_dict["width"] = str_val(self.width)
-        if self.height:
-            product_dict["height"] = str_val(self.height)
-        if self.depth:
-            product_dict["depth"] = str_val(self.depth)
-        if self.weight:
-            product_dict["weight"] = str_val(self.weight)
-        if self.volume:
-            product_dict["volume"] = str_val(self.volume)
-        if self.out_of_stock:
-            product_dict["out_of_stock"] = str_val(self.out_of_stock)
-        if self.additional_delivery_times:
-            product_dict["additional_delivery_times"] = str_val(self.additional_delivery_times)
-        if self.quantity_discount:
-            product_dict["quantity_discount"] = str_val(self.quantity_discount)
-        if self.customizable:
-            product_dict["customizable"] = str_val(self.customizable)
-        if self.uploadable_files:
-            product_dict["uploadable_files"] = str_val(self.uploadable_files)
-        if self.text_fields:
-            product_dict["text_fields"] = str_val(self.text_fields)
-        if self.active is not None:
-            product_dict["active"] = str_val(self.active)
-        if self.redirect_type:
-            product_dict["redirect_type"] = str_val(self.redirect_type)
-        if self.id_type_redirected:
-            product_dict["id_type_redirected"] = str_val(self.id_type_redirected)
-        if self.available_for_order is not None:
-            product_dict["available_for_order"] = str_val(self.available_for_order)
-        if self.available_date:
-            product_dict["available_date"] = str_val(self.available_date.isoformat() if isinstance(self.available_date,datetime) else self.available_date)
-        if self.show_condition is not None:
-            product_dict["show_condition"] = str_val(self.show_condition)
-        if self.condition:
-            product_dict["condition"] = str_val(self.condition)
-        if self.show_price is not None:
-            product_dict["show_price"] = str_val(self.show_price)
-        if self.indexed is not None:
-            product_dict["indexed"] = str_val(self.indexed)
-        if self.visibility:
-            product_dict["visibility"] = str_val(self.visibility)
-        if self.cache_is_pack is not None:
-            product_dict["cache_is_pack"] = str_val(self.cache_is_pack)
-        if self.cache_has_attachments is not None:
-            product_dict["cache_has_attachments"] = str_val(self.cache_has_attachments)
-        if self.is_virtual is not None:
-            product_dict["is_virtual"] = str_val(self.is_virtual)
-        if self.cache_default_attribute:
-            product_dict["cache_default_attribute"] = str_val(self.cache_default_attribute)
-        if self.date_add:
-           product_dict["date_add"] = str_val(self.date_add.isoformat() if isinstance(self.date_add,datetime) else self.date_add)
-        if self.date_upd:
-           product_dict["date_upd"] = str_val(self.date_upd.isoformat()  if isinstance(self.date_upd,datetime) else self.date_upd)
-        if self.advanced_stock_management is not None:
-            product_dict["advanced_stock_management"] = str_val(self.advanced_stock_management)
-        if self.pack_stock_type:
-            product_dict["pack_stock_type"] = str_val(self.pack_stock_type)
-        if self.state:
-            product_dict["state"] = str_val(self.state)
-        if self.product_type:
-            product_dict["product_type"] = str_val(self.product_type)
-        if self.id_default_image:
-            product_dict["id_default_image"] = str_val(self.id_default_image)
-
-            
-        # -- ps_product_lang fields --
-        if self.description:
-            product_dict["description"] = self._format_multilang_value(self.description)
-        if self.description_short:
-            product_dict["description_short"] = self._format_multilang_value(self.description_short)
-        if self.link_rewrite:
-            product_dict["link_rewrite"] = self._format_multilang_value(self.link_rewrite)
-        if self.meta_description:
-            product_dict["meta_description"] = self._format_multilang_value(self.meta_description)
-        if self.meta_keywords:
-            product_dict["meta_keywords"] = self._format_multilang_value(self.meta_keywords)
-        if self.meta_title:
-            product_dict["meta_title"] = self._format_multilang_value(self.meta_title)
-        if self.name:
-            product_dict["name"] = self._format_multilang_value(self.name)
-        if self.available_now:
-            product_dict["available_now"] = self._format_multilang_value(self.available_now)
-        if self.available_later:
-            product_dict["available_later"] = self._format_multilang_value(self.available_later)
-        if self.delivery_in_stock:
-            product_dict["delivery_in_stock"] = self._format_multilang_value(self.delivery_in_stock)
-        if self.delivery_out_stock:
-            product_dict["delivery_out_stock"] = self._format_multilang_value(self.delivery_out_stock)
-        if self.delivery_additional_message:
-            product_dict["delivery_additional_message"] = self._format_multilang_value(self.delivery_additional_message)
-        if self.affiliate_short_link:
-            product_dict["affiliate_short_link"] = self._format_multilang_value(self.affiliate_short_link)
-        if self.affiliate_text:
-            product_dict["affiliate_text"] = self._format_multilang_value(self.affiliate_text)
-        if self.affiliate_summary:
-            product_dict["affiliate_summary"] = self._format_multilang_value(self.affiliate_summary)
-        if self.affiliate_summary_2:
-            product_dict["affiliate_summary_2"] = self._format_multilang_value(self.affiliate_summary_2)
-        if self.affiliate_image_small:
-            product_dict["affiliate_image_small"] = self._format_multilang_value(self.affiliate_image_small)
-        if self.affiliate_image_medium:
-            product_dict["affiliate_image_medium"] = self._format_multilang_value(self.affiliate_image_medium)
-        if self.affiliate_image_large:
-            product_dict["affiliate_image_large"] = self._format_multilang_value(self.affiliate_image_large)
-        if self.ingredients:
-            product_dict["ingredients"] = self._format_multilang_value(self.ingredients)
-        if self.specification:
-            product_dict["specification"] = self._format_multilang_value(self.specification)
-        if self.how_to_use:
-            product_dict["how_to_use"] = self._format_multilang_value(self.how_to_use)
-
-
-        # Добавление associations, если они есть
-        associations_dict = {}
-        if hasattr(self.presta_fields, 'associations') and self.presta_fields.associations:
-
-            if 'categories' in self.presta_fields.associations and self.presta_fields.associations['categories']:
-            #if self.additional_categories:
-                associations_dict['categories'] = [{'id': str_val(cat['id'])} for cat in self.additional_categories]
-            if 'images' in self.presta_fields.associations and self.presta_fields.associations['images']:
-                associations_dict['images'] = [{'id': str_val(img['id'])} for img in self.presta_fields.associations['images']]
-            if 'combinations' in self.presta_fields.associations and self.presta_fields.associations['combinations']:
-                associations_dict['combinations'] = [{'id': str_val(comb['id'])} for comb in self.presta_fields.associations['combinations']]
-            if 'product_option_values' in self.presta_fields.associations and self.presta_fields.associations['product_option_values']:
-                associations_dict['product_option_values'] = [{'id': str_val(val['id'])} for val in self.presta_fields.associations['product_option_values']]
-            if 'product_features' in self.presta_fields.associations and self.presta_fields.associations['product_features']:
-                associations_dict['product_features'] = [{'id': str_val(feat['id']), 'id_feature_value': str_val(feat['id_feature_value'])} for feat in self.presta_fields.associations['product_features']]
-            if 'tags' in self.presta_fields.associations and self.presta_fields.associations['tags']:
-            #if self.tags:
-                associations_dict['tags'] = [{'id': str_val(tag['id'])} for tag in self.presta_fields.associations['tags']]
-            if 'stock_availables' in self.presta_fields.associations and self.presta_fields.associations['stock_availables']:
-                associations_dict['stock_availables'] = [{'id': str_val(stock['id']), 'id_product_attribute': str_val(stock['id_product_attribute'])} for stock in self.presta_fields.associations['stock_availables']]
-            if 'attachments' in self.presta_fields.associations and self.presta_fields.associations['attachments']:
-                associations_dict['attachments'] = [{'id': str_val(attach['id'])} for attach in self.presta_fields.associations['attachments']]
-            if 'accessories' in self.presta_fields.associations and self.presta_fields.associations['accessories']:
-                associations_dict['accessories'] = [{'id': str_val(acc['id'])} for acc in self.presta_fields.associations['accessories']]
-            if 'product_bundle' in self.presta_fields.associations and self.presta_fields.associations['product_bundle']:
-                associations_dict['product_bundle'] = [{'id': str_val(bundle['id']), 'id_product_attribute': str_val(bundle['id_product_attribute']), 'quantity': str_val(bundle['quantity'])} for bundle in self.presta_fields.associations['product_bundle']]
-
-            if associations_dict:  # Только если есть что добавлять, добавляем ключ associations
-                product_dict["associations"] = associations_dict
-
-        return product_dict
+        return dict(self.iter_items())
+
+    def write_json(self, stream: TextIO) -> None:
+        """
+        Записывает товар в поток как JSON-объект, поле за полем, без промежуточного словаря.
+        Для массовой выгрузки вызывается для каждого товара (например, по одному объекту на строку).
+
+        Args:
+            stream (TextIO): Поток для записи, например открытый файл.
+        """
+        write = stream.write
+        separator: str = '{'
+        for key, value in self.iter_items():
+            write(separator)
+            write(json.dumps(key))
+            write(':')
+            write(json.dumps(value, ensure_ascii=False, default=str))
+            separator = ','
+        write('}' if separator == ',' else '{}')
+
+    def write_xml(self, stream: TextIO, root: str = 'product') -> None:
+        """
+        Записывает товар в поток как XML-элемент `<product>` в формате `presta_fields_to_xml()`,
+        без промежуточного словаря и дерева `ElementTree`.
+
+        Args:
+            stream (TextIO): Поток для записи.
+            root (str): Имя корневого элемента товара.
+        """
+        write = stream.write
+        write(f'<{root}>')
+        for key, value in self.iter_items():
+            _write_xml(write, key, value)
+        write(f'</{root}>')
 
     def _format_multilang_value(self, data: Any) -> List[Dict[str, str]]:
         """
@@ -22,4 +22,4 @@
 
 
 # from .supplier import Supplier
-# from .graber import Graber, Context, close_pop_up
+# from .graber import Graber, close_pop_up, current_graber
@@ -0,0 +1,63 @@
+## \file /src/suppliers/_experiments/test_scenario_runner_merge.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Проверка `_merge_stored()` инкрементального сбора
+=================================================
+
+Частично собранный товар дополняется значениями из хранилища изменений для обоих видов
+`ProductFields.presta_fields`: `SimpleNamespace` и компактной записи (`compact=True`).
+
+```rst
+.. module:: src.suppliers._experiments.test_scenario_runner_merge
+```
+"""
+
+import unittest
+
+import header
+from src.endpoints.prestashop.product_fields.product_fields import ProductFields
+from src.suppliers.change_store import ProductState
+from src.suppliers.scenario_runner import _merge_stored
+
+
+class TestMergeStored(unittest.TestCase):
+
+    def setUp(self):
+        self.state = ProductState(
+            'key',
+            values={
+                'name': {'language': [{'attrs': {'id': '1'}, 'value': 'Stored name'}]},
+                'description': None,
+                'reference': 'REF-1',
+                'price': 10.0,
+                'id_presta': 5,              # <- ключ обновления цен, не поле товара
+            },
+        )
+
+    def check(self, fields: ProductFields) -> None:
+        fields.presta_fields.price = 12.5  # <- собрано заново
+        fields.presta_fields.description = 'Fresh description'
+        _merge_stored(fields, self.state, ('price',))
+
+        self.assertEqual(fields.presta_fields.name, self.state.values['name'])
+        self.assertEqual(fields.presta_fields.reference, 'REF-1')
+        self.assertEqual(fields.presta_fields.price, 12.5)
+        self.assertEqual(fields.presta_fields.description, 'Fresh description')
+        self.assertFalse(hasattr(fields.presta_fields, 'id_presta'))
+
+    def test_namespace(self):
+        self.check(ProductFields())
+
+    def test_compact(self):
+        self.check(ProductFields(compact=True))
+
+    def test_no_state(self):
+        fields = ProductFields()
+        _merge_stored(fields, None, ())
+        self.assertIsNone(fields.presta_fields.reference)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,286 @@
+## \file /src/suppliers/category_harvester.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Сбор ссылок на товары со страниц категорий: бесконечная прокрутка и листалка
+=============================================================================
+
+`CategoryHarvester` заменяет фиксированное количество `Driver.scroll()` с паузами:
+
+- страница прокручивается вниз, пока `MutationObserver` сообщает о новых ссылках на товары.
+  Один раунд прокрутки заканчивается, как только DOM затих на `idle_ms` (или через `round_timeout`),
+  а не через фиксированную паузу;
+- затем выполняется листалка из секции `pagination` локаторов категории:
+  - `page_param` (или `url_template`) - URL страниц предсказуемы, следующие страницы загружаются
+    параллельно через `HttpDriver` пачками по `concurrency`, пока пачка не перестанет давать новые товары;
+  - `next` - локатор ссылки "следующая страница", страницы открываются по очереди в браузере;
+- ссылки выдаются асинхронным итератором по мере появления, без повторов.
+
+Секция `pagination` файла `locators/category.json`:
+```json
+"pagination": {
+    "next": { "attribute": "href", "by": "XPATH", "selector": "//a[contains(@class, 's-pagination-next')]", ... },
+    "page_param": "page",
+    "start": 2,
+    "max_pages": 20,
+    "concurrency": 4
+}
+```
+
+Пример:
+```python
+harvester = CategoryHarvester(s.driver, s.locators['category'])
+async for product_url in harvester.harvest(category_url):
+    ...
+```
+
+```rst
+.. module:: src.suppliers.category_harvester
+```
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urldefrag, urlencode, urlparse, urlunparse
+
+import header
+from src.logger.logger import logger
+
+
+# Раунд прокрутки: прокручивает страницу вниз и ждет, пока DOM затихнет на `idleMs`.
+# Возвращает ссылки всех элементов локатора (абсолютные, если атрибут - свойство элемента: `href`, `src`).
+SCROLL_ROUND_SCRIPT: str = """
+const [by, selector, attribute, idleMs, timeoutMs, done] = arguments;
+const collect = () => {
+    let nodes = [];
+    if (by === 'xpath') {
+        const result = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (let i = 0; i < result.snapshotLength; i++) { nodes.push(result.snapshotItem(i)); }
+    } else {
+        nodes = Array.from(document.querySelectorAll(selector));
+    }
+    return nodes.map(node => {
+        const value = (attribute in node && typeof node[attribute] === 'string') ? node[attribute] : node.getAttribute(attribute);
+        if (value) { return value; }
+        const link = node.querySelector ? node.querySelector('a[href]') : null;
+        return link ? link.href : null;
+    }).filter(Boolean);
+};
+let idle = null, finished = false;
+const finish = () => {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(idle);
+    clearTimeout(deadline);
+    done(collect());
+};
+const observer = new MutationObserver(() => { clearTimeout(idle); idle = setTimeout(finish, idleMs); });
+observer.observe(document.body || document.documentElement, { childList: true, subtree: true });
+const deadline = setTimeout(finish, timeoutMs);
+idle = setTimeout(finish, idleMs);
+window.scrollTo(0, Math.max(document.body ? document.body.scrollHeight : 0, document.documentElement.scrollHeight));
+"""
+
+# Типы локаторов, которые раунд прокрутки выполняет в браузере
+_SCRIPT_BY: Dict[str, str] = {'XPATH': 'xpath', 'CSS_SELECTOR': 'css', 'CSS': 'css'}
+
+
+def _locator_value(locator: Any, key: str, default: Any = None) -> Any:
+    return locator.get(key, default) if isinstance(locator, dict) else getattr(locator, key, default)
+
+
+def default_key(url: str) -> str:
+    """Ключ дедупликации ссылки: URL без фрагмента."""
+    return urldefrag(url)[0]
+
+
+class CategoryHarvester:
+    """Сборщик ссылок на товары категории.
+
+    Args:
+        driver: `Driver` (браузер) или `HttpDriver`.
+        locators (dict | SimpleNamespace): Локаторы категории (`product_links` и необязательная секция `pagination`).
+        http: `HttpDriver` для параллельной загрузки страниц с предсказуемыми URL.
+            По умолчанию создается из `driver` (`HttpDriver.from_driver()`) при первой необходимости.
+        idle_ms (int): Раунд прокрутки заканчивается, если DOM не менялся столько миллисекунд.
+        round_timeout (float): Максимальная длительность раунда прокрутки (секунды).
+        max_rounds (int): Максимум раундов прокрутки на одной странице.
+        key (Callable[[str], str]): Ключ дедупликации ссылок.
+    """
+
+    def __init__(
+        self,
+        driver: Any,
+        locators: dict | SimpleNamespace,
+        http: Any = None,
+        idle_ms: int = 1200,
+        round_timeout: float = 10,
+        max_rounds: int = 50,
+        key: Callable[[str], str] = default_key,
+    ) -> None:
+        self.driver = driver
+        self.product_links = _locator_value(locators, 'product_links')
+        pagination = _locator_value(locators, 'pagination') or {}
+        self.pagination: dict = vars(pagination) if isinstance(pagination, SimpleNamespace) else dict(pagination)
+        self.http = http
+        self._own_http: bool = False
+        self.idle_ms = idle_ms
+        self.round_timeout = round_timeout
+        self.max_rounds = max_rounds
+        self.key = key
+        self.seen: set = set()
+
+    async def harvest(self, url: Optional[str] = None) -> AsyncIterator[str]:
+        """Выдает ссылки на товары категории по мере их появления, без повторов.
+
+        Args:
+            url (Optional[str]): URL категории. `None` - текущая страница драйвера.
+        """
+        if not self.product_links:
+            logger.error('Нет локатора `product_links` категории')
+            return
+        if url and not await self.driver.navigate(url):
+            return
+        category_url: str = url or self.driver.current_url
+
+        try:
+            async for link in self._scroll_page():
+                yield link
+
+            max_pages: int = int(self.pagination.get('max_pages') or 50)
+            if self.pagination.get('page_param') or self.pagination.get('url_template'):
+                async for link in self._fetch_pages(category_url, max_pages):
+                    yield link
+            elif self.pagination.get('next'):
+                async for link in self._follow_next(max_pages):
+                    yield link
+        finally:
+            if self._own_http and self.http:
+                await self.http.close()
+                self.http, self._own_http = None, False
+
+        logger.info(f'Категория {category_url}: собрано ссылок на товары: {len(self.seen)}')
+
+    def _new(self, links: Any) -> List[str]:
+        """Ссылки, которых еще не было."""
+        if not links:
+            return []
+        links = [links] if isinstance(links, str) else links
+        new: List[str] = []
+        for link in links:
+            if isinstance(link, list):
+                new.extend(self._new(link))
+                continue
+            if not isinstance(link, str) or not link:
+                continue
+            key: str = self.key(link)
+            if key not in self.seen:
+                self.seen.add(key)
+                new.append(link)
+        return new
+
+    # --------------------------------------------------------------------------
+    #                  Прокрутка
+    # --------------------------------------------------------------------------
+
+    async def _scroll_page(self) -> AsyncIterator[str]:
+        """Прокручивает текущую страницу, пока раунд прокрутки дает новые ссылки."""
+        by: Optional[str] = _SCRIPT_BY.get(str(_locator_value(self.product_links, 'by', '')).upper())
+        if not by or not hasattr(self.driver, 'execute_async_script'):
+            # Без браузера или для локатора, который не выполняется скриптом - один проход локатором
+            for link in self._new(await self.driver.execute_locator(self.product_links)):
+                yield link
+            return
+
+        selector: str = _locator_value(self.product_links, 'selector')
+        attribute: str = _locator_value(self.product_links, 'attribute') or 'href'
+        try:
+            from src.webdriver.readiness import ensure_script_timeout
+
+            # Общий таймаут скриптов сессии; срок раунда соблюдает сам скрипт (`timeoutMs`)
+            await asyncio.to_thread(ensure_script_timeout, self.driver, self.round_timeout + 5)
+        except Exception as ex:
+            logger.debug('Ошибка установки таймаута скриптов', ex, False)
+        for _ in range(self.max_rounds):
+            try:
+                links = await asyncio.to_thread(
+                    self.driver.execute_async_script, SCROLL_ROUND_SCRIPT,
+                    by, selector, attribute, self.idle_ms, int(self.round_timeout * 1000),
+                )
+            except Exception as ex:
+                logger.debug('Ошибка раунда прокрутки', ex, False)
+                break
+            new: List[str] = self._new(links)
+            if not new:
+                break  # <- DOM затих, новых ссылок нет - конец ленты
+            for link in new:
+                yield link
+
+    # --------------------------------------------------------------------------
+    #                  Листалка
+    # --------------------------------------------------------------------------
+
+    def page_url(self, category_url: str, page: int) -> str:
+        """URL страницы `page` категории по `url_template` (`{url}`, `{page}`) или `page_param`."""
+        template: Optional[str] = self.pagination.get('url_template')
+        if template:
+            return template.format(url=category_url, page=page)
+        parsed = urlparse(category_url)
+        query: dict = dict(parse_qsl(parsed.query, keep_blank_values=True))
+        query[self.pagination['page_param']] = str(page)
+        return urlunparse(parsed._replace(query=urlencode(query), fragment=''))
+
+    async def _fetch_pages(self, category_url: str, max_pages: int) -> AsyncIterator[str]:
+        """Предсказуемые URL: загружает страницы параллельно пачками, пока пачка дает новые ссылки."""
+        http = await self._http()
+        if not http:
+            return
+        concurrency: int = int(self.pagination.get('concurrency') or 4)
+        page: int = int(self.pagination.get('start') or 2)
+        while page <= max_pages:
+            batch: List[str] = [self.page_url(category_url, p) for p in range(page, min(page + concurrency, max_pages + 1))]
+            page += len(batch)
+            found: int = 0
+            async for http_page in http.fetch_many(batch, concurrency=concurrency):
+                for link in self._new(await http_page.execute_locator(self.product_links)):
+                    found += 1
+                    yield link
+            if not found:
+                break  # <- страницы за последней пустые или повторяют последнюю
+
+    async def _follow_next(self, max_pages: int) -> AsyncIterator[str]:
+        """Ссылка "следующая страница": открывает страницы по очереди и прокручивает каждую."""
+        visited: set = {self.driver.current_url}
+        for _ in range(max_pages - 1):
+            next_url = await self.driver.execute_locator(self.pagination['next'])
+            next_url = next_url[0] if isinstance(next_url, list) and next_url else next_url
+            if not isinstance(next_url, str) or not next_url or next_url in visited:
+                break
+            visited.add(next_url)
+            if not await self.driver.navigate(next_url):
+                break
+            async for link in self._scroll_page():
+                yield link
+
+    async def _http(self) -> Any:
+        if self.http is None:
+            if hasattr(self.driver, 'fetch_many'):
+                self.http = self.driver
+            else:
+                try:
+                    from src.webdriver.http_driver import HttpDriver
+
+                    self.http = HttpDriver.from_driver(self.driver)
+                    self._own_http = True
+                except Exception as ex:
+                    logger.error('Ошибка создания HttpDriver для листалки', ex, False)
+        return self.http
+
+
+async def iterate(urls: Iterable[str]) -> AsyncIterator[str]:
+    """Список ссылок (результат `get_list_products_in_category()` поставщика) как асинхронный итератор."""
+    for url in urls:
+        yield url
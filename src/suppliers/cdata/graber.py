@@ -12,14 +12,14 @@
     ------------------
     Перед отправкой запроса к вебдрайверу можно совершить предварительные действия через декоратор. 
     Декоратор по умолчанию находится в родительском классе. Для того, чтобы декоратор сработал надо передать значение 
-    в `Context.locator`, Если надо реализовать свой декоратор - раскоментируйте строки с декоратором и переопределите его поведение
+    в `self.locator_for_decorator`, Если надо реализовать свой декоратор - раскоментируйте строки с декоратором и переопределите его поведение
 
 """
 
 
 from typing import Any
 import header
-from src.suppliers.graber import Graber as Grbr, Context, close_pop_up
+from src.suppliers.graber import Graber as Grbr, close_pop_up
 from src.webdriver.driver import Driver
 from src.logger.logger import logger
 
@@ -57,7 +57,7 @@ class Graber(Grbr):
         """Инициализация класса сбора полей товара."""
         self.supplier_prefix = 'cdata'
         super().__init__(supplier_prefix=self.supplier_prefix, driver=driver, lang_index=lang_index)
-        # Устанавливаем глобальные настройки через Context
+        # Настройки декоратора хранятся в экземпляре грабера
         
-        Context.locator_for_decorator = None # <- если будет уастановлено значение - то оно выполнится в декораторе `@close_pop_up`
+        self.locator_for_decorator = None # <- если будет уастановлено значение - то оно выполнится в декораторе `@close_pop_up`
 
@@ -0,0 +1,216 @@
+## \file /src/suppliers/change_store.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Хранилище изменений товаров для инкрементального сбора
+=======================================================
+
+Для каждого товара поставщика (ключ - `supplier_prefix` + id товара или URL) хранятся:
+
+- отпечатки регионов страницы (`Graber.change_regions`: блок цены, наличие, описание) -
+  короткий хеш значения локатора региона;
+- последние собранные значения полей;
+- время последней проверки (`seen`) и последнего полного сбора (`grabbed`).
+
+`Graber.grab_page_incremental()` сравнивает отпечатки регионов текущей страницы с сохраненными
+и собирает только поля изменившихся регионов (или пропускает товар целиком). Ночной прогон
+тогда зависит от количества изменений, а не от размера каталога.
+
+Данные хранятся в SQLite (`gs.path.data/changes/<supplier_prefix>.sqlite`, режим WAL):
+процессы-воркеры `scenario_runner` пишут в одно хранилище одновременно.
+
+Пример:
+```python
+store = ChangeStore('amazon')
+fields = await graber.grab_page_incremental(store)
+if fields is None:
+    ...  # <- товар не изменился
+```
+
+```rst
+.. module:: src.suppliers.change_store
+```
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import header
+from src import gs
+from src.logger.logger import logger
+from src.suppliers.category_harvester import default_key
+
+
+def fingerprint(value: Any) -> str:
+    """Отпечаток значения локатора региона.
+
+    Пробелы в строках схлопываются: перенос строки или отступ в разметке не считается изменением.
+
+    Args:
+        value (Any): Значение локатора (строка, список, число, `None`).
+
+    Returns:
+        str: 16 шестнадцатеричных символов.
+    """
+    def _canonical(v: Any) -> Any:
+        if isinstance(v, str):
+            return ' '.join(v.split())
+        if isinstance(v, (list, tuple)):
+            return [_canonical(i) for i in v]
+        if isinstance(v, dict):
+            return {str(k): _canonical(i) for k, i in v.items()}
+        return v
+
+    data: bytes = json.dumps(_canonical(value), ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+@dataclass
+class ProductState:
+    """Сохраненное состояние товара.
+
+    Attributes:
+        key (str): Ключ товара.
+        url (Optional[str]): URL страницы товара.
+        regions (Dict[str, str]): Отпечатки регионов `{регион: отпечаток}`.
+        values (Dict[str, Any]): Последние собранные значения полей.
+        seen (float): Время последней проверки (unix time).
+        grabbed (float): Время последнего полного сбора (unix time).
+    """
+
+    key: str
+    url: Optional[str] = None
+    regions: Dict[str, str] = field(default_factory=dict)
+    values: Dict[str, Any] = field(default_factory=dict)
+    seen: float = 0
+    grabbed: float = 0
+
+
+class ChangeStore:
+    """Хранилище отпечатков и последних значений товаров поставщика.
+
+    Args:
+        supplier_prefix (str): Префикс поставщика.
+        root (Optional[str | Path]): Каталог хранилища. По умолчанию `gs.path.data/changes`.
+        max_age (Optional[float]): Товар, полностью собранный раньше `max_age` секунд назад,
+            собирается заново целиком, даже если регионы не изменились. По умолчанию - 30 дней, `0` - без ограничения.
+    """
+
+    max_age: Optional[float] = 30 * 24 * 3600
+
+    def __init__(self, supplier_prefix: str, root: Optional[str | Path] = None, max_age: Optional[float] = None) -> None:
+        self.supplier_prefix = supplier_prefix
+        self.root = Path(root) if root else Path(gs.path.data) / 'changes'
+        self.path: Path = self.root / f'{supplier_prefix}.sqlite'
+        if max_age is not None:
+            self.max_age = max_age
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Соединение с базой (создается при первом обращении, в процессе, который его использует)."""
+        if self._connection is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS products ('
+                ' key TEXT PRIMARY KEY, url TEXT, regions TEXT NOT NULL, field_values TEXT NOT NULL,'
+                ' seen REAL NOT NULL, grabbed REAL NOT NULL)'
+            )
+        return self._connection
+
+    def key(self, url: Optional[str] = None, product_id: Optional[Any] = None) -> str:
+        """Ключ товара: id товара, если он известен до сбора, иначе URL без фрагмента."""
+        return f'{self.supplier_prefix}:{product_id}' if product_id else f'{self.supplier_prefix}:{default_key(url or "")}'
+
+    def get(self, key: str) -> Optional[ProductState]:
+        """Состояние товара или `None`, если товар еще не собирался."""
+        try:
+            row = self.connection.execute(
+                'SELECT url, regions, field_values, seen, grabbed FROM products WHERE key = ?', (key,)
+            ).fetchone()
+        except sqlite3.Error as ex:
+            logger.error(f'Ошибка чтения состояния товара {key}', ex, False)
+            return None
+        if not row:
+            return None
+        url, regions, values, seen, grabbed = row
+        return ProductState(key, url, json.loads(regions), json.loads(values), seen, grabbed)
+
+    def expired(self, state: ProductState) -> bool:
+        """Товар пора собрать целиком (`max_age`)."""
+        return bool(self.max_age) and time.time() - state.grabbed > self.max_age
+
+    def put(
+        self,
+        key: str,
+        regions: Dict[str, str],
+        values: Optional[Dict[str, Any]] = None,
+        url: Optional[str] = None,
+        full: bool = False,
+    ) -> None:
+        """Сохраняет отпечатки регионов и значения собранных полей.
+
+        Args:
+            key (str): Ключ товара.
+            regions (Dict[str, str]): Отпечатки регионов.
+            values (Optional[Dict[str, Any]]): Значения собранных полей. Объединяются с сохраненными.
+            url (Optional[str]): URL страницы товара.
+            full (bool): Товар собран целиком - обновляется время полного сбора.
+                Товар, впервые записанный не полным сбором (`src.suppliers.price_refresh`), остается несобранным (`grabbed = 0`).
+        """
+        now: float = time.time()
+        state: Optional[ProductState] = self.get(key)
+        merged: Dict[str, Any] = {**(state.values if state else {}), **(values or {})}
+        grabbed: float = now if full else state.grabbed if state else 0
+        try:
+            self.connection.execute(
+                'INSERT INTO products (key, url, regions, field_values, seen, grabbed) VALUES (?, ?, ?, ?, ?, ?)'
+                ' ON CONFLICT(key) DO UPDATE SET url = excluded.url, regions = excluded.regions,'
+                ' field_values = excluded.field_values, seen = excluded.seen, grabbed = excluded.grabbed',
+                (
+                    key,
+                    url or (state.url if state else None),
+                    json.dumps(regions, sort_keys=True),
+                    json.dumps(merged, ensure_ascii=False, default=str),
+                    now,
+                    grabbed,
+                ),
+            )
+        except sqlite3.Error as ex:
+            logger.error(f'Ошибка записи состояния товара {key}', ex, False)
+
+    def touch(self, key: str) -> None:
+        """Отмечает проверку неизменившегося товара."""
+        try:
+            self.connection.execute('UPDATE products SET seen = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error as ex:
+            logger.error(f'Ошибка записи состояния товара {key}', ex, False)
+
+    def urls(self) -> List[str]:
+        """URL всех товаров хранилища, давно проверенные - первыми."""
+        try:
+            return [row[0] for row in self.connection.execute('SELECT url FROM products WHERE url IS NOT NULL ORDER BY seen')]
+        except sqlite3.Error as ex:
+            logger.error('Ошибка чтения хранилища изменений', ex, False)
+            return []
+
+    def delete(self, key: str) -> None:
+        """Удаляет состояние товара - следующий сбор будет полным."""
+        self.connection.execute('DELETE FROM products WHERE key = ?', (key,))
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
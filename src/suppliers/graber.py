@@ -44,49 +44,53 @@ from types import SimpleNamespace
 from typing import Callable
 # from langdetect import detect
 from functools import wraps
+from contextvars import ContextVar
 
 import header
 from header import __root__
 from src import gs
 
+from src.webdriver.locator import CompiledLocator, load_locators, resolve_locator
 from src.endpoints.prestashop.product_fields import ProductFields
 # from src.endpoints.prestashop.category_async import PrestaCategoryAsync
 
 from src.utils.jjson import j_loads, j_loads_ns, j_dumps
 from src.utils.image import save_image, save_image_async, save_image_from_url_async
 from src.utils.file import read_text_file
-from src.utils.string.normalizer import( normalize_string, 
-                                        normalize_int, 
-                                        normalize_float, 
-                                        normalize_boolean, 
+from src.utils.string.normalizer import( normalize_boolean, 
                                         normalize_sql_date, 
                                         normalize_sku )
+# Строки, целые и дробные - через общий `Normalizer` (предкомпилированные шаблоны, LRU повторяющихся значений)
+from src.utils.string.batch_normalizer import normalize_string, normalize_int, normalize_float
+from src.suppliers.change_store import ChangeStore, fingerprint
 from src.logger.exceptions import ExecuteLocatorException
 from src.utils.printer import pprint as print
 from src.logger.logger import logger
 
 
-# Глобальные настройки через объект `Context`
+# Текущий грабер задачи. Устанавливается в `Graber.grab_page_async()`: каждая задача `asyncio`
+# получает копию контекста, поэтому грабер одной задачи не виден в другой
+current_graber: ContextVar[Optional['Graber']] = ContextVar('current_graber', default=None)
+
+
 class Context:
     """
-    Класс для хранения глобальных настроек.
+    Устаревший класс глобальных настроек. Оставлен для совместимости импортов поставщиков.
+
+    Глобальные атрибуты класса общие для всех экземпляров `Graber` процесса: два грабера
+    (две вкладки, два поставщика) перезаписывали драйвер и локатор друг друга.
+    Настройки хранятся в экземпляре: `self.driver`, `self.locator_for_decorator`.
+    Грабер текущей задачи - `current_graber.get()`.
 
     Attributes:
-        driver (Optional['Driver']): Объект драйвера, используется для управления браузером или другим интерфейсом.
-        locator_for_decorator (Optional[SimpleNamespace]): Если будет установлен - выполнится декоратор `@close_pop_up`.
-            Устанавливается при инициализации поставщика, например: `Context.locator = self.locator.close_pop_up`.
-        supplier_prefix (Optional[str]): Префикс поставщика.
-
-    Example:
-        >>> context = Context()
-        >>> context.supplier_prefix = 'prefix'
-        >>> print(context.supplier_prefix)
-        prefix
+        driver (Optional['Driver']): Не используется.
+        locator_for_decorator (Optional[SimpleNamespace]): Не используется. Установите `self.locator_for_decorator`.
+        supplier_prefix (Optional[str]): Не используется.
     """
 
     # Аттрибуты класса
     driver: Optional['Driver'] = None
-    locator_for_decorator: Optional[SimpleNamespace] = None  # <- Если будет установлен - выполнится декоратор `@close_pop_up`. Устанавливается при инициализации поставщика, например: `Context.locator = self.locator.close_pop_up`
+    locator_for_decorator: Optional[SimpleNamespace] = None
     supplier_prefix: Optional[str] = None
 
 
@@ -94,14 +98,12 @@ class Context:
 # Определение декоратора для закрытия всплывающих окон
 # В каждом отдельном поставщике (`Supplier`) декоратор может использоваться в индивидуальных целях
 # Общее название декоратора `@close_pop_up` можно изменить 
-# Если декоратор не используется в поставщике - Установи `Context.locator_for_decorator = None` 
+# Если декоратор не используется в поставщике - оставьте `self.locator_for_decorator = None` 
 
 def close_pop_up() -> Callable:
     """Создает декоратор для закрытия всплывающих окон перед выполнением основной логики функции.
-    Функция `driver.execute_locator()` будет вызвана только если был указан `Context.locator_for_decorator` при инициализации экземляра класса.
-
-    Args:
-        value ('Driver'): Дополнительное значение для декоратора.
+    Локатор `locator_for_decorator` грабера выполняется один раз на страницу (см. `Graber.dismiss_pop_up()`),
+    остальные вызовы полей только проверяют флаг экземпляра - без обращений к драйверу.
 
     Returns:
         Callable: Декоратор, оборачивающий функцию.
@@ -109,15 +111,9 @@ def close_pop_up() -> Callable:
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            if Context.locator_for_decorator:
-                try:
-                    await Context.driver.execute_locator(Context.locator_for_decorator)  # Await async pop-up close  
-                    ... 
-                except ExecuteLocatorException as ex:
-                    logger.debug(f'Ошибка выполнения локатора:', ex, False)
-
-                finally:
-                    Context.locator_for_decorator = None # Отмена после первого срабатывания
+            graber = args[0] if args and isinstance(args[0], Graber) else current_graber.get()
+            if graber is not None and not graber._pop_up_done:
+                await graber.dismiss_pop_up()
 
             return await func(*args, **kwargs)  # Await the main function
         return wrapper
@@ -125,8 +121,37 @@ def close_pop_up() -> Callable:
 
 
 class Graber:
-    """Базовый класс сбора данных со страницы для всех поставщиков."""
-    
+    """Базовый класс сбора данных со страницы для всех поставщиков.
+
+    Attributes:
+        field_dependencies (dict[str, tuple[str, ...]]): Поля, функции которых читают значения других полей.
+            Используется при конкурентном сборе (`max_in_flight > 1`): зависимое поле запускается
+            только после того, как будут собраны поля, от которых оно зависит.
+        max_in_flight (int): Максимальное количество одновременных запросов к драйверу при сборе полей.
+            `1` - поля собираются последовательно.
+        default_fields (tuple[str, ...]): Поля, которые собираются, если имена полей не переданы.
+        change_regions (dict[str, tuple[str, ...]]): Регионы страницы для инкрементального сбора (`grab_page_incremental()`):
+            `{локатор региона: поля, которые собираются заново при изменении региона}`.
+        region_locators (dict[str, str]): Локаторы регионов `{регион: имя локатора или путь вложенного локатора}`,
+            например `{'price': 'price.new'}`. По умолчанию - локатор с именем региона.
+        change_identity (tuple[str, ...]): Поля, которые собираются при любом изменении товара (идентификация товара писателем).
+    """
+
+    field_dependencies: dict[str, tuple[str, ...]] = {
+        'id_product': ('id_supplier',),
+        'local_image_path': ('id_supplier', 'id_product'),
+        'locale': ('name',),
+    }
+    max_in_flight: int = 1
+    default_fields: tuple[str, ...] = ('id_product', 'name', 'description_short', 'description', 'specification', 'local_image_path')
+    change_regions: dict[str, tuple[str, ...]] = {
+        'price': ('price', 'wholesale_price'),
+        'quantity': ('quantity', 'out_of_stock', 'delivery_in_stock', 'delivery_out_stock'),
+        'description': ('description', 'description_short', 'specification'),
+    }
+    region_locators: dict[str, str] = {}
+    change_identity: tuple[str, ...] = ('id_product',)
+
     def __init__(self, supplier_prefix: str, lang_index:int, driver: 'Driver'):
         """Инициализация класса Graber.
 
@@ -135,13 +160,37 @@ class Graber:
             driver ('Driver'): Экземпляр класса Driver.
         """
         self.supplier_prefix = supplier_prefix
-        self.locator: SimpleNamespace = j_loads_ns(__root__ / 'src' / 'suppliers' / supplier_prefix / 'locators' / 'product.json')
+        # Локаторы компилируются один раз на процесс (`CompiledLocator`) и не изменяются при выполнении
+        self.locator: SimpleNamespace = load_locators(__root__ / 'src' / 'suppliers' / supplier_prefix / 'locators' / 'product.json')
         self.driver = driver
         self.fields: ProductFields = ProductFields(lang_index) # <- установка базового языка. Тип - `int`
-        Context.driver = self.driver
-        Context.supplier_prefix = None
-        Context.locator_for_decorator = None
-        """Если будет установлен локатор в Context.locator_for_decorator - выполнится декоратор `@close_pop_up`"""
+        self.locator_for_decorator: Optional[SimpleNamespace] = None
+        """Если будет установлен локатор - он выполнится декоратором `@close_pop_up` один раз на страницу"""
+        self._pop_up_done: bool = False
+        self._pop_up_lock: Optional[asyncio.Lock] = None
+        self.changed_fields: tuple[str, ...] = ()
+        self._change_locators: Optional[dict[str, CompiledLocator]] = None
+
+    async def dismiss_pop_up(self) -> None:
+        """Выполняет `locator_for_decorator` (закрытие всплывающего окна) один раз для текущей страницы.
+
+        Конкурентные поля одной страницы ждут первое выполнение, а не запускают свое.
+        Флаг сбрасывается в начале `grab_page_async()` - следующая страница закрывает окно заново.
+        """
+        if self._pop_up_done:
+            return
+        if self._pop_up_lock is None:
+            self._pop_up_lock = asyncio.Lock()
+        async with self._pop_up_lock:
+            if self._pop_up_done:
+                return
+            try:
+                if self.locator_for_decorator:
+                    await self.driver.execute_locator(self.locator_for_decorator)  # Await async pop-up close
+            except ExecuteLocatorException as ex:
+                logger.debug(f'Ошибка выполнения локатора:', ex, False)
+            finally:
+                self._pop_up_done = True
 
     async def error(self, field: str):
         """Обработчик ошибок для полей."""
@@ -176,21 +225,169 @@ class Graber:
     def grab_page(self, *args, **kwards) -> ProductFields:
         return asyncio.run(self.grab_page_async(*args, **kwards))
 
-    async def grab_page_async(self, *args, **kwards) -> ProductFields:
-        """Асинхронная функция для сбора полей продукта."""
-        async def fetch_all_data(*args, **kwards):
-            # Динамическое вызовы функций для каждого поля из args
-            # if not args: # по какой то причини не были переданы имена полей для сбора информации
-            #     args:list = read_text_file(__root__ / 'src' / 'endpoints' / 'prestashop' / 'product_fields' / 'fields_list.txt', as_list = True)
-            if not args: # по какой то причини не были переданы имена полей для сбора информации
-                args:list = ['id_product', 'name', 'description_short', 'description', 'specification', 'local_image_path']
+    async def grab_page_async(self, *args, max_in_flight: Optional[int] = None, **kwards) -> ProductFields:
+        """Асинхронная функция для сбора полей продукта.
+
+        Args:
+            *args: Имена полей для сбора. По умолчанию - `default_fields`.
+            max_in_flight (Optional[int]): Лимит одновременно выполняемых полей для драйвера.
+                Если не указан - используется `self.max_in_flight`. При значении `1` поля собираются последовательно.
+            **kwards: Значения полей, которые подставляются вместо значений из локаторов.
+
+        Returns:
+            ProductFields: Собранные поля товара.
+
+        Example:
+            >>> fields = await graber.grab_page_async('id_product', 'name', 'price', 'local_image_path', max_in_flight=8)
+        """
+        # Новая страница: всплывающее окно закрывается заново, грабер задачи доступен через `current_graber`
+        self._pop_up_done = False
+        token = current_graber.set(self)
+        try:
+            await self.dismiss_pop_up()
+            await self._grab_fields(args or self.default_fields, max_in_flight, kwards)
+        finally:
+            current_graber.reset(token)
+        return self.fields
+
+    async def grab_page_incremental(self, store: ChangeStore, *args, key: Optional[str] = None, max_in_flight: Optional[int] = None, **kwards) -> Optional[ProductFields]:
+        """Сбор полей товара с пропуском неизменившихся данных.
+
+        Сначала выполняются только локаторы регионов `change_regions` (цена, наличие, описание),
+        их отпечатки сравниваются с сохраненными в `store`:
+        - товар новый (или известен только по быстрому обновлению цен), `store.max_age` истек
+          или ни один регион не дал значения для сравнения - собираются все поля `args`;
+        - ни один регион не изменился - поля не собираются, возвращается `None`;
+        - изменились отдельные регионы - собираются только зависящие от них поля из `args` и поля `change_identity`.
+
+        Собранные поля - в `self.changed_fields`. Остальные поля `ProductFields` не заполняются,
+        их последние значения - в `store.get(key).values`.
+
+        Args:
+            store (ChangeStore): Хранилище изменений поставщика.
+            *args: Имена полей для сбора. По умолчанию - `default_fields`.
+            key (Optional[str]): Ключ товара. По умолчанию - URL текущей страницы (`store.key()`).
+            max_in_flight (Optional[int]): См. `grab_page_async()`.
+            **kwards: Значения полей, которые подставляются вместо значений из локаторов.
+
+        Returns:
+            Optional[ProductFields]: Собранные поля или `None`, если товар не изменился.
+
+        Example:
+            >>> store = ChangeStore('amazon')
+            >>> fields = await graber.grab_page_incremental(store, 'id_product', 'name', 'price', 'description')
+        """
+        url: Optional[str] = getattr(self.driver, 'current_url', None)
+        key = key or store.key(url)
+        requested: list[str] = list(dict.fromkeys(args or self.default_fields))
+
+        self._pop_up_done = False
+        token = current_graber.set(self)
+        try:
+            await self.dismiss_pop_up()
+            regions: dict[str, str] = await self._region_fingerprints()
+            state = store.get(key)
+
+            full: bool = state is None or not state.grabbed or store.expired(state) or not regions
+            if full:
+                fields: list[str] = requested
+            else:
+                changed: list[str] = [region for region, value in regions.items() if state.regions.get(region) != value]
+                dependent: set[str] = {name for region in changed for name in self.change_regions[region]}
+                fields = [name for name in requested if name in dependent]
+                if not fields:
+                    # Ничего из запрошенного не изменилось. Новые отпечатки сохраняются, если изменились другие регионы
+                    if changed:
+                        store.put(key, regions, url=url)
+                    else:
+                        store.touch(key)
+                    self.changed_fields = ()
+                    return None
+                fields = list(dict.fromkeys([*self.change_identity, *fields]))
+
+            await self._grab_fields(fields, max_in_flight, kwards)
+        finally:
+            current_graber.reset(token)
+
+        self.changed_fields = tuple(fields)
+        store.put(key, regions, {name: getattr(self.fields, name, None) for name in fields}, url=url, full=full)
+        return self.fields
+
+    async def _region_fingerprints(self) -> dict[str, str]:
+        """Отпечатки регионов `change_regions`, которые дали значение на странице.
+
+        Регионы без исполнимого локатора (нет локатора, `by`/`selector` не заданы, пространство вложенных локаторов
+        без `region_locators`) и регионы, локатор которых не вернул значения, не сравниваются.
+        """
+        if self._change_locators is None:
+            locators = {region: resolve_locator(self.locator, self.region_locators.get(region, region)) for region in self.change_regions}
+            self._change_locators = {region: locator for region, locator in locators.items() if locator}
+        locators: dict[str, CompiledLocator] = self._change_locators
+        values = await asyncio.gather(*(self.driver.execute_locator(locator) for locator in locators.values()), return_exceptions=True)
+        return {
+            region: fingerprint(value) for region, value in zip(locators, values)
+            if value is not None and value is not False and not isinstance(value, Exception)
+        }
+
+    async def _grab_fields(self, args: list[str] | tuple[str, ...], max_in_flight: Optional[int], kwards: dict) -> None:
+        """Вызывает функции полей `args` (последовательно или конкурентно, см. `grab_page_async()`)."""
+        limit: int = max_in_flight or self.max_in_flight
+        if limit <= 1:
             for filed_name in args:
                 function = getattr(self, filed_name, None)
                 if function:
                     await function(kwards.get(filed_name, '')) # Просто вызываем с await, так как все функции асинхронные
+            return
 
-        await fetch_all_data(*args, **kwards)
-        return self.fields
+        # Конкурентный сбор: независимые поля одной группы выполняются через `asyncio.gather`,
+        # количество одновременных обращений к драйверу ограничено семафором
+        semaphore = asyncio.Semaphore(limit)
+
+        async def bounded(filed_name: str, function: Callable):
+            async with semaphore:
+                return await function(kwards.get(filed_name, ''))
+
+        for stage in self._plan_fields(args):
+            tasks: dict = {name: getattr(self, name, None) for name in stage}
+            tasks = {name: function for name, function in tasks.items() if function}
+            results = await asyncio.gather(*(bounded(name, function) for name, function in tasks.items()), return_exceptions=True)
+            for name, result in zip(tasks, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Ошибка сбора поля `{name}`", result, False)
+
+    def _plan_fields(self, fields: list[str] | tuple[str, ...]) -> list[list[str]]:
+        """Разбивает поля на группы для конкурентного сбора.
+
+        Поле попадает в группу только после групп с полями, от которых оно зависит (`field_dependencies`).
+        Зависимости, которые не запрошены в `fields`, не учитываются - функция поля получит их сама.
+
+        Args:
+            fields (list[str] | tuple[str, ...]): Имена полей.
+
+        Returns:
+            list[list[str]]: Группы полей в порядке выполнения.
+
+        Example:
+            >>> graber._plan_fields(['local_image_path', 'name', 'id_product', 'id_supplier'])
+            [['name', 'id_supplier'], ['id_product'], ['local_image_path']]
+        """
+        pending: list[str] = list(dict.fromkeys(fields))
+        requested: set[str] = set(pending)
+        done: set[str] = set()
+        stages: list[list[str]] = []
+
+        while pending:
+            ready = [
+                name for name in pending
+                if not (set(self.field_dependencies.get(name, ())) & (requested - done - {name}))
+            ]
+            if not ready:  # циклическая зависимость - оставшиеся поля выполняются одной группой
+                ready = pending
+            stages.append(ready)
+            done.update(ready)
+            pending = [name for name in pending if name not in done]
+
+        return stages
 
 
 
@@ -2129,7 +2326,7 @@ class Graber:
                 Если `value` было передано, его значение подставляется в поле `ProductFields.local_image_path`.
 
         .. note:
-            Путь к изображению ведёт в директорию `tmp`.
+            Путь к изображению ведёт в директорию `tmp`. С офлайн-драйвером (`HttpDriver(offline=True)`) изображение не загружается.
 
         .. todo:
             - Как передать значение из `**kwargs` функции `grab_product_page(**kwargs)`?
@@ -2140,6 +2337,11 @@ class Graber:
             self.fields.local_image_path = value
             return True
 
+        if getattr(self.driver, 'offline', False):
+            # Офлайн-драйвер (перезапуск по архиву снимков) не обращается к сети, в том числе к CDN изображений
+            logger.debug('Офлайн-драйвер: изображение не загружается, поле `local_image_path` не заполнено', None, False)
+            return False
+
         img_path:str = str(Path(gs.path.tmp, f'{self.fields.id_supplier}_{self.fields.id_product}.png'))
 
         self.fields.local_image_path = img_path  # <- ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ DEBUG
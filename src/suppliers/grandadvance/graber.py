@@ -12,7 +12,7 @@
     ------------------
     Перед отправкой запроса к вебдрайверу можно совершить предварительные действия через декоратор. 
     Декоратор по умолчанию находится в родительском классе. Для того, чтобы декоратор сработал надо передать значение 
-    в `Context.locator`, Если надо реализовать свой декоратор - раскоментируйте строки с декоратором и переопределите его поведение
+    в `self.locator_for_decorator`, Если надо реализовать свой декоратор - раскоментируйте строки с декоратором и переопределите его поведение
 
 
 """
@@ -22,7 +22,7 @@ from typing import Any
 import header
 from header import __root__
 from src import gs
-from src.suppliers.graber import Graber as Grbr, Context, close_pop_up
+from src.suppliers.graber import Graber as Grbr, close_pop_up
 from src.utils.jjson import j_loads_ns
 from src.webdriver.driver import Driver
 from types import SimpleNamespace
@@ -44,5 +44,5 @@ class Graber(Grbr):
         config:SimpleNamespace = j_loads_ns(gs.path.src / 'suppliers' / ENDPOINT / f'{ENDPOINT}.json')
         locator: SimpleNamespace = j_loads_ns(gs.path.src / 'suppliers' / ENDPOINT / 'locators' / 'product.json')
         super().__init__(supplier_prefix=ENDPOINT, driver=driver, lang_index=lang_index)
-        Context.locator_for_decorator = locator.click_to_specifications # <- if locator not definded decorator 
+        self.locator_for_decorator = locator.click_to_specifications # <- if locator not definded decorator 
 
@@ -12,7 +12,7 @@
     ------------------
     Перед отправкой запроса к вебдрайверу можно совершить предварительные действия через декоратор. 
     Декоратор по умолчанию находится в родительском классе. Для того, чтобы декоратор сработал надо передать значение 
-    в `Context.locator`, Если надо реализовать свой декоратор - раскоментируйте строки с декоратором и переопределите его поведение
+    в `self.locator_for_decorator`, Если надо реализовать свой декоратор - раскоментируйте строки с декоратором и переопределите его поведение
 
 
 """
@@ -24,7 +24,7 @@ from functools import wraps
 
 import header
 from src import gs
-from src.suppliers.graber import Graber as Grbr, Context, close_pop_up
+from src.suppliers.graber import Graber as Grbr, close_pop_up
 from src.webdriver.driver import Driver
 from src.utils.image import save_image
 from src.logger.logger import logger
@@ -38,6 +38,6 @@ class Graber(Grbr):
     def __init__(self, driver: Driver, lang_index:int):
         """Инициализация класса сбора полей товара."""
         super().__init__(supplier_prefix=self.supplier_prefix, driver=driver, lang_index=lang_index)
-        Context.locator_for_decorator = self.locator.close_pop_up 
+        self.locator_for_decorator = self.locator.close_pop_up 
 
    
\ No newline at end of file
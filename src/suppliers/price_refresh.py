@@ -0,0 +1,288 @@
+## \file /src/suppliers/price_refresh.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Быстрое обновление цен и остатков
+=================================
+
+Полный сбор товара (`Graber.grab_page_async()`) выполняет десятки локаторов и закрывает всплывающие окна.
+Для ежедневного обновления цен и наличия достаточно нескольких полей. `refresh_prices()`:
+
+- выполняет только локаторы цены, остатка и наличия (и артикула, если он еще неизвестен) -
+  раздел `price_refresh` файла `<supplier_prefix>.json`, по умолчанию - локаторы `price`, `quantity`,
+  `available_for_order` и `reference` из `locators/product.json`;
+- страницы с `HttpDriver` читаются одновременно (`concurrency`), с браузером - по очереди;
+- значения сравниваются с последними известными в хранилище изменений (`ChangeStore`),
+  неизменившиеся товары только отмечаются проверенными;
+- изменения отправляются в PrestaShop пакетами по `batch_size` (`PriceListRequesterAsync.push()`):
+  только `price` товара и `quantity` остатка, и только если они отличаются от значений магазина.
+  Чтение страниц продолжается, пока пакет отправляется.
+
+Товар магазина определяется по артикулу (`reference`): сохраненному в хранилище, прочитанному локатором
+`reference` или по `id_product` последнего полного сбора (`<id_supplier>-<sku>`).
+
+Раздел `price_refresh` в `<supplier_prefix>.json` (поле -> имя локатора `product.json` или путь вложенного локатора,
+например `price.new`; `null` - не читать):
+```json
+"price_refresh": {
+  "locators": { "price": "price", "quantity": "quantity", "availability": "available_for_order", "reference": "reference" }
+}
+```
+
+Пример:
+```python
+async with PriceListRequesterAsync(api_domain, api_key) as api, HttpDriver() as driver:
+    stats = await refresh_prices('ksp', urls, api, driver=driver)
+```
+
+```rst
+.. module:: src.suppliers.price_refresh
+```
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import header
+from header import __root__
+from src.logger.logger import logger
+from src.utils.jjson import j_loads
+from src.utils.string.batch_normalizer import default_normalizer
+from src.utils.string.normalizer import normalize_boolean
+from src.webdriver.locator import CompiledLocator, load_locators, resolve_locator
+from src.suppliers.change_store import ChangeStore, fingerprint
+from src.endpoints.prestashop.pricelist import PRICE, QUANTITY, PriceChange, PriceListRequesterAsync
+
+
+# Поле -> имя локатора `product.json`
+DEFAULT_LOCATORS: Dict[str, Optional[str]] = {
+    PRICE: 'price',
+    QUANTITY: 'quantity',
+    'availability': 'available_for_order',
+    'reference': 'reference',
+}
+
+# Значения товара в `ChangeStore`: id товара и остатка в магазине
+ID_PRESTA: str = 'id_presta'
+ID_STOCK_AVAILABLE: str = 'id_stock_available'
+
+
+def refresh_locators(supplier_prefix: str) -> Dict[str, CompiledLocator]:
+    """Локаторы быстрого обновления поставщика `{поле: локатор}`.
+
+    Возвращаются только исполнимые локаторы (`CompiledLocator` с `by` и `selector`). Не описанные поставщиком поля
+    (`by: null`) и пространства вложенных локаторов без явного пути (`price` вместо `price.new`) пропускаются.
+    """
+    config: dict = j_loads(__root__ / 'src' / 'suppliers' / supplier_prefix / f'{supplier_prefix}.json') or {}
+    names: Dict[str, Optional[str]] = {**DEFAULT_LOCATORS, **((config.get('price_refresh') or {}).get('locators') or {})}
+    product: SimpleNamespace = load_locators(__root__ / 'src' / 'suppliers' / supplier_prefix / 'locators' / 'product.json')
+    locators: Dict[str, CompiledLocator] = {}
+    for name, locator_name in names.items():
+        locator: Optional[CompiledLocator] = resolve_locator(product, locator_name) if locator_name else None
+        if locator:
+            locators[name] = locator
+        elif locator_name:
+            logger.debug(f'{supplier_prefix}: локатор `{locator_name}` поля {name} не исполним - поле не читается', None, False)
+    return locators
+
+
+async def refresh_prices(
+    supplier_prefix: str,
+    urls: Optional[Iterable[str]],
+    api: PriceListRequesterAsync,
+    driver: Any = None,
+    store: Optional[ChangeStore] = None,
+    concurrency: int = 32,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False,
+) -> dict:
+    """Проверяет цены и остатки товаров поставщика и отправляет изменения в PrestaShop.
+
+    Args:
+        supplier_prefix (str): Префикс поставщика.
+        urls (Optional[Iterable[str]]): Страницы товаров. `None` - все товары хранилища изменений.
+        api (PriceListRequesterAsync): Клиент API магазина.
+        driver (Any): `HttpDriver` (страницы читаются одновременно) или `Driver` (по очереди).
+            По умолчанию - новый `HttpDriver`.
+        store (Optional[ChangeStore]): Хранилище изменений. По умолчанию - хранилище поставщика.
+        concurrency (int): Количество одновременно читаемых страниц.
+        batch_size (Optional[int]): Изменений в пакете отправки. По умолчанию - `api.batch_size`.
+        dry_run (bool): Только найти изменения: в магазин и в хранилище ничего не записывается.
+
+    Returns:
+        dict: `{'checked', 'unchanged', 'changed', 'pushed', 'errors'}` - количества товаров,
+            `'changes'` - список `PriceChange` изменившихся товаров.
+    """
+    locators: Dict[str, CompiledLocator] = refresh_locators(supplier_prefix)
+    if PRICE not in locators and QUANTITY not in locators and 'availability' not in locators:
+        logger.error(f'У поставщика {supplier_prefix} нет локаторов цены и наличия')
+        return {'checked': 0, 'unchanged': 0, 'changed': 0, 'pushed': 0, 'errors': 0, 'changes': []}
+
+    own_store: bool = store is None
+    if store is None:
+        store = ChangeStore(supplier_prefix)
+    own_driver: bool = driver is None
+    if driver is None:
+        from src.webdriver.http_driver import HttpDriver
+        driver = HttpDriver(concurrency=concurrency, session=supplier_prefix)
+    batch_size = batch_size or api.batch_size
+    # Отпечатки регионов `Graber.change_regions` обновляются только для тех же локаторов, что и при полном сборе
+    product: SimpleNamespace = load_locators(__root__ / 'src' / 'suppliers' / supplier_prefix / 'locators' / 'product.json')
+    regions: Tuple[str, ...] = tuple(name for name in (PRICE, QUANTITY) if name in locators and locators[name] == resolve_locator(product, name))
+    urls = list(dict.fromkeys(urls if urls is not None else store.urls()))
+
+    stats: dict = {'checked': 0, 'unchanged': 0, 'changed': 0, 'pushed': 0, 'errors': 0, 'changes': []}
+    results: asyncio.Queue = asyncio.Queue()
+    pending: List[Tuple[PriceChange, dict]] = []
+    url_iterator = iter(urls)
+
+    async def worker() -> None:
+        for url in url_iterator:  # <- общий итератор: каждый URL достается одному воркеру
+            await results.put((url, await _read(driver, url, locators, store)))
+
+    async def flush() -> None:
+        batch: List[Tuple[PriceChange, dict]] = pending[:]
+        pending.clear()
+        if not dry_run:
+            await api.push(change for change, _ in batch)
+        for change, read in batch:
+            stats['changes'].append(change)
+            if change.error:
+                stats['errors'] += 1
+                logger.warning(f'Товар {change.reference} ({change.key}): {change.error}')
+            if change.pushed:
+                stats['pushed'] += 1
+            if not dry_run:
+                _save(store, change, read, regions)
+
+    # Браузер открывает одну страницу за раз
+    workers_count: int = max(1, min(concurrency, len(urls))) if hasattr(driver, 'fetch') else 1
+    workers: List[asyncio.Task] = [asyncio.ensure_future(worker()) for _ in range(workers_count)]
+    try:
+        for _ in urls:
+            url, read = await results.get()
+            stats['checked'] += 1
+            if read is None:
+                stats['errors'] += 1
+                continue
+            if not read['reference']:
+                logger.warning(f'Артикул товара {url} неизвестен - товар не собирался целиком и нет локатора `reference`')
+                stats['errors'] += 1
+                continue
+            change: Optional[PriceChange] = _change(read)
+            if change is None:
+                if not dry_run:
+                    store.touch(read['key'])
+                stats['unchanged'] += 1
+                continue
+            stats['changed'] += 1
+            pending.append((change, read))
+            if len(pending) >= batch_size:
+                await flush()
+        if pending:
+            await flush()
+    finally:
+        for task in workers:
+            task.cancel()
+        if own_driver:
+            await driver.close()
+        if own_store:
+            store.close()
+
+    logger.info(
+        f'{supplier_prefix}: проверено {stats["checked"]}, без изменений {stats["unchanged"]}, '
+        f'изменилось {stats["changed"]}, отправлено {stats["pushed"]}, ошибок {stats["errors"]}'
+    )
+    return stats
+
+
+async def _read(driver: Any, url: str, locators: Dict[str, CompiledLocator], store: ChangeStore) -> Optional[dict]:
+    """Читает поля быстрого обновления одной страницы.
+
+    Returns:
+        Optional[dict]: `{'key', 'url', 'state', 'raw', PRICE, QUANTITY, 'reference'}` или `None`, если страница не открылась
+            или ни один локатор цены и наличия не вернул значения.
+    """
+    key: str = store.key(url)
+    state = store.get(key)
+    last: dict = state.values if state else {}
+    names: List[str] = [name for name in locators if name != 'reference' or not last.get('reference')]
+
+    try:
+        if hasattr(driver, 'fetch'):
+            page = await driver.fetch(url)
+            if page is None or page.status >= 400:
+                return None
+        else:
+            if not await driver.navigate(url):
+                return None
+            page = driver
+        values = await asyncio.gather(*(page.execute_locator(locators[name]) for name in names), return_exceptions=True)
+    except Exception as ex:
+        logger.error(f'Ошибка чтения цены товара {url}', ex, False)
+        return None
+    raw: Dict[str, Any] = {name: None if isinstance(value, Exception) or value is False else value for name, value in zip(names, values)}
+    if all(value is None for name, value in raw.items() if name != 'reference'):
+        logger.warning(f'На странице {url} не прочитано ни одно значение ({", ".join(raw)})')
+        return None
+
+    price = default_normalizer.to_float(raw[PRICE]) if raw.get(PRICE) else None
+    price = price[0] if isinstance(price, list) and price else price
+    price = float(price) if isinstance(price, (int, float)) and price > 0 else None
+
+    quantity = default_normalizer.to_int(raw[QUANTITY]) if raw.get(QUANTITY) not in (None, '') else None
+    quantity = quantity if isinstance(quantity, int) else None
+    if raw.get('availability') is not None:
+        available: bool = normalize_boolean(raw['availability'])
+        quantity = (quantity if quantity is not None else 1) if available else 0
+
+    return {
+        'key': key,
+        'url': url,
+        'state': state,
+        'raw': raw,
+        PRICE: price,
+        QUANTITY: quantity,
+        'reference': last.get('reference') or default_normalizer.to_string(raw.get('reference') or '') or last.get('id_product'),
+    }
+
+
+def _change(read: dict) -> Optional[PriceChange]:
+    """Изменение товара относительно последних известных значений или `None`."""
+    state = read['state']
+    last: dict = state.values if state else {}
+    price: Optional[float] = read[PRICE]
+    quantity: Optional[int] = read[QUANTITY]
+    last_price = last.get(PRICE)
+    price_changed: bool = price is not None and (not isinstance(last_price, (int, float)) or abs(price - last_price) > 1e-6)
+    quantity_changed: bool = quantity is not None and quantity != last.get(QUANTITY)
+    if not price_changed and not quantity_changed:
+        return None
+    return PriceChange(
+        reference=str(read['reference']),
+        price=price if price_changed else None,
+        quantity=quantity if quantity_changed else None,
+        id_product=last.get(ID_PRESTA),
+        id_stock_available=last.get(ID_STOCK_AVAILABLE),
+        key=read['key'],
+    )
+
+
+def _save(store: ChangeStore, change: PriceChange, read: dict, regions: Tuple[str, ...] = ()) -> None:
+    """Сохраняет отправленные (или уже совпадающие с магазином) значения и отпечатки их регионов."""
+    if change.id_product is None:
+        return  # <- товар не найден в магазине: значения не сохраняются, он будет проверен снова
+    state = read['state']
+    fingerprints: Dict[str, str] = dict(state.regions) if state else {}
+    values: Dict[str, Any] = {'reference': change.reference, ID_PRESTA: change.id_product}
+    if change.id_stock_available:
+        values[ID_STOCK_AVAILABLE] = change.id_stock_available
+    for name, value in ((PRICE, change.price), (QUANTITY, change.quantity)):
+        if value is None or name in change.failed:
+            continue
+        values[name] = value
+        if name in regions and read['raw'].get(name) is not None:
+            fingerprints[name] = fingerprint(read['raw'][name])
+    store.put(change.key, fingerprints, values, url=read['url'])
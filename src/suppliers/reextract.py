@@ -0,0 +1,186 @@
+## \file /src/suppliers/reextract.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Офлайн-перезапуск `Graber` по архиву снимков страниц
+=====================================================
+
+Снимки страниц (`src.webdriver.snapshot_archive`) обрабатываются заново классом `Graber` поставщика
+с движком локаторов lxml (`src.webdriver.http_driver`), без браузера и без обращений к сайту.
+Используется после исправления локаторов и для дозаполнения новых полей: снимки распределяются
+по пулу процессов, результаты записываются в файл JSON Lines
+(`{"url", "ts", "sha256", "product": {...}}` на строку).
+
+Пример:
+```python
+from src.suppliers.reextract import reextract
+
+stats = reextract('amazon', url_contains='amazon.com/', fields=['name', 'price'], processes=8)
+```
+
+Командная строка:
+```
+python -m src.suppliers.reextract amazon --url amazon.com/ --since 2026-10-01 --fields name price --processes 8
+```
+
+```rst
+.. module:: src.suppliers.reextract
+```
+"""
+
+import argparse
+import asyncio
+import importlib
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import header
+from src import gs
+from src.logger.logger import logger
+from src.suppliers.scenario_runner import ProductsWriter
+from src.webdriver.snapshot_archive import SnapshotArchive
+
+
+def reextract(
+    supplier_prefix: str,
+    url_contains: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    processes: Optional[int] = None,
+    lang_index: int = 1,
+    archive_root: Optional[str | Path] = None,
+    output: Optional[str | Path] = None,
+    chunk_size: int = 200,
+) -> dict:
+    """Перезапускает `Graber` поставщика по снимкам страниц из архива.
+
+    Args:
+        supplier_prefix (str): Префикс поставщика, чей `Graber` выполняется.
+        url_contains (Optional[str]): Только снимки, URL которых содержит эту строку (например, домен поставщика).
+        since (Optional[str]): Только снимки, сделанные начиная с этой даты (ISO).
+        until (Optional[str]): Только снимки, сделанные до этой даты (ISO).
+        fields (Optional[List[str]]): Поля для сбора. По умолчанию - поля `Graber.grab_page_async()` по умолчанию.
+            Поля `OFFLINE_SKIPPED_FIELDS` не собираются: они загружают файлы с сайта.
+        processes (Optional[int]): Количество процессов. По умолчанию - количество ядер.
+        lang_index (int): Индекс языка для `ProductFields`.
+        archive_root (Optional[str | Path]): Каталог архива снимков. По умолчанию - архив по умолчанию.
+        output (Optional[str | Path]): Файл результатов. По умолчанию `gs.path.tmp/reextract_<supplier_prefix>_<timestamp>.jsonl`.
+        chunk_size (int): Количество снимков в одном задании процесса.
+
+    Returns:
+        dict: Статистика `{'snapshots': int, 'products': int, 'failed': int, 'output': str}`.
+    """
+    archive = SnapshotArchive(archive_root)
+    entries: List[Dict] = archive.entries(url_contains=url_contains, since=since, until=until, latest_only=True)
+    output = Path(output or Path(gs.path.tmp) / f'reextract_{supplier_prefix}_{time.strftime("%y%m%d%H%M%S")}.jsonl')
+    if not entries:
+        logger.info('Нет снимков для обработки')
+        return {'snapshots': 0, 'products': 0, 'failed': 0, 'output': str(output)}
+    if fields and all(name in OFFLINE_SKIPPED_FIELDS for name in fields):
+        logger.error(f'Поля {fields} загружают файлы с сайта и не собираются по архиву снимков')
+        return {'snapshots': len(entries), 'products': 0, 'failed': 0, 'output': str(output)}
+
+    writer = ProductsWriter(output)
+    chunks: List[List[Dict]] = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+    processes = max(1, min(processes or os.cpu_count() or 1, len(chunks)))
+    products: int = 0
+    failed: int = 0
+
+    logger.info(f'Снимков: {len(entries)}, заданий: {len(chunks)}, процессов: {processes}')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(_reextract_chunk, supplier_prefix, str(archive.root), chunk, fields, lang_index)
+            for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            try:
+                records, chunk_failed = future.result()
+            except Exception as ex:
+                logger.error('Ошибка процесса перезапуска', ex, False)
+                continue
+            for record in records:
+                writer(record)
+            products += len(records)
+            failed += chunk_failed
+
+    logger.info(f'Обработано снимков: {len(entries)}, товаров: {products}, с ошибкой: {failed}. Результат: {output}')
+    return {'snapshots': len(entries), 'products': products, 'failed': failed, 'output': str(output)}
+
+
+# Поля, которые загружают файлы с сайта (изображения, видео). При перезапуске по архиву не собираются
+OFFLINE_SKIPPED_FIELDS: tuple = ('local_image_path', 'local_video_path')
+
+# Объекты процесса-воркера: создаются один раз на процесс
+_worker_state: Dict[str, Any] = {}
+
+
+def _reextract_chunk(
+    supplier_prefix: str,
+    archive_root: str,
+    entries: List[Dict],
+    fields: Optional[List[str]],
+    lang_index: int,
+) -> tuple:
+    """Задание процесса: выполняет `Graber` для каждого снимка. Возвращает `(записи, количество ошибок)`."""
+    from src.webdriver.http_driver import HttpDriver
+
+    if 'graber_cls' not in _worker_state:
+        _worker_state['graber_cls'] = importlib.import_module(f'src.suppliers.{supplier_prefix}.graber').Graber
+        _worker_state['http'] = HttpDriver(cookies=[], offline=True)
+        _worker_state['archive'] = SnapshotArchive(archive_root)
+    graber_cls = _worker_state['graber_cls']
+    http: HttpDriver = _worker_state['http']
+    archive: SnapshotArchive = _worker_state['archive']
+    names: List[str] = [name for name in (fields or graber_cls.default_fields) if name not in OFFLINE_SKIPPED_FIELDS]
+
+    async def run() -> tuple:
+        records: List[Dict] = []
+        failed: int = 0
+        for entry in entries:
+            try:
+                page_source: Optional[str] = archive.read(entry['sha256'])
+                if not page_source:
+                    failed += 1
+                    continue
+                http.set_page_source(entry['url'], page_source)
+                graber = graber_cls(driver=http, lang_index=lang_index)
+                product = await graber.grab_page_async(*names)
+                records.append({
+                    'url': entry['url'],
+                    'ts': entry['ts'],
+                    'sha256': entry['sha256'],
+                    'product': product.to_dict() if hasattr(product, 'to_dict') else product,
+                })
+            except Exception as ex:
+                logger.error(f'Ошибка обработки снимка {entry.get("url")}', ex, False)
+                failed += 1
+        return records, failed
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Офлайн-перезапуск Graber по архиву снимков страниц')
+    parser.add_argument('supplier_prefix', help='Префикс поставщика')
+    parser.add_argument('--url', dest='url_contains', help='Только URL, содержащие эту строку')
+    parser.add_argument('--since', help='Только снимки начиная с даты (ISO)')
+    parser.add_argument('--until', help='Только снимки до даты (ISO)')
+    parser.add_argument('--fields', nargs='*', help='Поля для сбора')
+    parser.add_argument('--processes', type=int, help='Количество процессов')
+    parser.add_argument('--lang-index', type=int, default=1, help='Индекс языка')
+    parser.add_argument('--archive', dest='archive_root', help='Каталог архива снимков')
+    parser.add_argument('--output', help='Файл результатов (JSON Lines)')
+    args = parser.parse_args()
+
+    stats: dict = reextract(**vars(args))
+    print(stats)
+
+
+if __name__ == '__main__':
+    main()
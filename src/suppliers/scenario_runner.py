@@ -0,0 +1,408 @@
+## \file /src/suppliers/scenario_runner.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Многопроцессный запуск файлов сценариев поставщиков
+====================================================
+
+Файлы сценариев (`suppliers/<supplier_prefix>/scenarios/*.json`) разбиваются на шарды:
+один шард - одна категория (`url`) внутри файла сценария. Шарды распределяются по процессам-воркерам,
+у каждого воркера свой вебдрайвер. Собранные `ProductFields` передаются через очередь единственному
+писателю в главном процессе.
+
+Выполненные шарды записываются в файл контрольной точки. Если процесс-воркер упал,
+его незавершенный шард возвращается в очередь (не более `max_retries` раз), а вместо упавшего воркера
+запускается новый. Повторный запуск с тем же файлом контрольной точки пропускает уже выполненные шарды.
+
+С `incremental=True` товары собираются через `Graber.grab_page_incremental()` и хранилище изменений
+поставщика (`src.suppliers.change_store`): неизменившиеся товары писателю не передаются,
+у изменившихся собираются только поля изменившихся регионов, остальные поля дополняются
+последними значениями из хранилища - писатель всегда получает товар целиком.
+
+Пример:
+```python
+from src.suppliers.scenario_runner import run_scenario_files_parallel
+
+stats = run_scenario_files_parallel({
+    'amazon': ['amazon_categories_murano_glass.json', 'amazon_categories_lighting.json'],
+    'ksp': ['ksp_categories_phones.json'],
+}, processes=8)
+```
+
+```rst
+.. module:: src.suppliers.scenario_runner
+```
+"""
+
+import asyncio
+import importlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import header
+from header import __root__
+from src import gs
+from src.utils.jjson import j_loads, j_dumps
+from src.logger.logger import logger
+from src.suppliers.category_harvester import CategoryHarvester, iterate
+from src.suppliers.change_store import ChangeStore
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Единица работы воркера: одна категория из файла сценария.
+
+    Attributes:
+        supplier_prefix (str): Префикс поставщика.
+        scenario_file (str): Имя файла сценария.
+        scenario_name (str): Ключ сценария внутри файла.
+        scenario (dict): Сценарий (`url`, `presta_categories`, ...).
+    """
+
+    supplier_prefix: str
+    scenario_file: str
+    scenario_name: str
+    scenario: dict
+
+    @property
+    def id(self) -> str:
+        """Идентификатор шарда в файле контрольной точки."""
+        return f'{self.supplier_prefix}:{self.scenario_file}:{self.scenario_name}'
+
+
+class ProductsWriter:
+    """Писатель по умолчанию: дописывает товары в файл в формате JSON Lines."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, fields: Any) -> None:
+        record = fields.to_dict() if hasattr(fields, 'to_dict') else fields
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+
+def build_shards(scenario_files: Dict[str, List[str | Path]]) -> List[Shard]:
+    """Разбивает файлы сценариев на шарды по категориям.
+
+    Args:
+        scenario_files (Dict[str, List[str | Path]]): Словарь `{supplier_prefix: [файлы сценариев]}`.
+            Имя файла без пути ищется в `suppliers/<supplier_prefix>/scenarios`.
+
+    Returns:
+        List[Shard]: Список шардов.
+    """
+    shards: List[Shard] = []
+    for supplier_prefix, files in scenario_files.items():
+        for scenario_file in files:
+            path = Path(scenario_file)
+            if not path.is_absolute() and path.parent == Path('.'):
+                path = __root__ / 'src' / 'suppliers' / supplier_prefix / 'scenarios' / path
+            data: dict = j_loads(path)
+            if not data or not data.get('scenarios'):
+                logger.error(f'Нет сценариев в файле {path}')
+                continue
+            for scenario_name, scenario in data['scenarios'].items():
+                shards.append(Shard(supplier_prefix, path.name, scenario_name, scenario))
+    return shards
+
+
+def run_scenario_files_parallel(
+    scenario_files: Dict[str, List[str | Path]],
+    processes: Optional[int] = None,
+    webdriver_name: str = 'chrome',
+    lang_index: int = 1,
+    writer: Optional[Callable[[Any], None]] = None,
+    checkpoint_path: Optional[Path] = None,
+    max_retries: int = 2,
+    incremental: bool = False,
+    page_load_strategy: Optional[str] = None,
+) -> dict:
+    """Выполняет файлы сценариев в нескольких процессах.
+
+    Args:
+        scenario_files (Dict[str, List[str | Path]]): Словарь `{supplier_prefix: [файлы сценариев]}`.
+        processes (Optional[int]): Количество процессов-воркеров. По умолчанию - количество ядер.
+        webdriver_name (str): Вебдрайвер воркера: `chrome`, `firefox` или `edge`.
+        lang_index (int): Индекс языка для `ProductFields`.
+        writer (Optional[Callable[[Any], None]]): Получает каждый собранный `ProductFields` в главном процессе.
+            По умолчанию товары записываются в `gs.path.tmp/products_<timestamp>.jsonl`.
+        checkpoint_path (Optional[Path]): Файл контрольной точки. Выполненные шарды из этого файла пропускаются.
+        max_retries (int): Сколько раз повторять шард упавшего воркера.
+        incremental (bool): Инкрементальный сбор: пропускать неизменившиеся товары (`ChangeStore`).
+        page_load_strategy (Optional[str]): Стратегия загрузки страниц браузера воркера. По умолчанию - из настроек
+            браузера (`normal`). `eager` ускоряет сбор, если функции сбора поставщиков открывают страницы только через
+            `Driver.get_url()`/`navigate()`, где готовность ждет `src.webdriver.readiness`.
+
+    Returns:
+        dict: Статистика выполнения `{'done': [...], 'failed': [...], 'products': int, 'unchanged': int}`.
+    """
+    timestamp: str = time.strftime('%y%m%d%H%M%S')
+    checkpoint_path = Path(checkpoint_path or Path(gs.path.tmp) / f'scenario_runner_{timestamp}.json')
+    writer = writer or ProductsWriter(Path(gs.path.tmp) / f'products_{timestamp}.jsonl')
+
+    checkpoint: dict = (j_loads(checkpoint_path) if checkpoint_path.exists() else None) or {}
+    done: set = set(checkpoint.get('done', []))
+    failed: set = set()
+
+    shards: Dict[str, Shard] = {shard.id: shard for shard in build_shards(scenario_files) if shard.id not in done}
+    if not shards:
+        logger.info('Нет шардов для выполнения')
+        return {'done': sorted(done), 'failed': [], 'products': 0, 'unchanged': 0}
+
+    processes = max(1, min(processes or os.cpu_count() or 1, len(shards)))
+    ctx = mp.get_context('spawn')
+    tasks = ctx.Queue()
+    results = ctx.Queue()
+    for shard in shards.values():
+        tasks.put(shard)
+
+    def spawn(worker_id: int):
+        process = ctx.Process(
+            target=_worker,
+            args=(worker_id, tasks, results, webdriver_name, lang_index, incremental, page_load_strategy),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    workers: Dict[int, Any] = {i: spawn(i) for i in range(processes)}
+    in_progress: Dict[int, str] = {}
+    retries: Dict[str, int] = {}
+    written: set = set()
+    products: int = 0
+    unchanged: int = 0
+    idle_crashes: int = 0  # <- воркеры, упавшие без шарда (например, не запустился вебдрайвер)
+    next_worker_id: int = processes
+
+    def save_checkpoint() -> None:
+        j_dumps({'done': sorted(done), 'failed': sorted(failed)}, checkpoint_path)
+
+    def handle(message: tuple) -> None:
+        nonlocal products, unchanged
+        kind, worker_id, shard_id, payload = message
+        if kind == 'start':
+            in_progress[worker_id] = shard_id
+        elif kind == 'product':
+            product_url, fields = payload
+            if product_url not in written:  # <- повторно выполненный шард не дублирует товары
+                written.add(product_url)
+                try:
+                    writer(fields)
+                    products += 1
+                except Exception as ex:
+                    logger.error(f'Ошибка записи товара {product_url}', ex, False)
+        elif kind == 'unchanged':
+            unchanged += 1
+        elif kind == 'done':
+            in_progress.pop(worker_id, None)
+            (done if payload else failed).add(shard_id)
+            save_checkpoint()
+
+    logger.info(f'Запуск {len(shards)} шардов в {processes} процессах')
+
+    while len(done) + len(failed) < len(done | set(shards)):
+        try:
+            handle(results.get(timeout=1))
+        except queue.Empty:
+            ...
+
+        # Проверка упавших воркеров - на каждой итерации, пока остальные воркеры присылают товары
+        dead: List[int] = [worker_id for worker_id, process in workers.items() if not process.is_alive()]
+        if not dead:
+            continue
+
+        # Сообщения упавшего воркера (`start`, `done`), еще не прочитанные из очереди
+        while True:
+            try:
+                handle(results.get_nowait())
+            except queue.Empty:
+                break
+
+        for worker_id in dead:
+            process = workers.pop(worker_id)
+            shard_id = in_progress.pop(worker_id, None)
+            logger.error(f'Воркер #{worker_id} завершился с кодом {process.exitcode}. Шард: {shard_id}')
+            if shard_id:
+                retries[shard_id] = retries.get(shard_id, 0) + 1
+                if retries[shard_id] <= max_retries:
+                    tasks.put(shards[shard_id])
+                else:
+                    failed.add(shard_id)
+                    save_checkpoint()
+            else:
+                idle_crashes += 1
+                if idle_crashes > max_retries * processes:
+                    continue  # <- воркер падает при запуске: новые воркеры не запускаются
+            workers[next_worker_id] = spawn(next_worker_id)
+            next_worker_id += 1
+
+        if not workers:
+            logger.error(f'Все воркеры завершились при запуске ({idle_crashes} раз). Невыполненные шарды отмечены как ошибочные')
+            failed.update(set(shards) - done)
+            save_checkpoint()
+            break
+
+    for _ in workers:
+        tasks.put(None)
+    for process in workers.values():
+        process.join(timeout=30)
+        if process.is_alive():
+            process.terminate()
+
+    logger.info(f'Выполнено шардов: {len(done)}, с ошибкой: {len(failed)}, товаров: {products}, без изменений: {unchanged}')
+    return {'done': sorted(done), 'failed': sorted(failed), 'products': products, 'unchanged': unchanged}
+
+
+def _worker(
+    worker_id: int,
+    tasks,
+    results,
+    webdriver_name: str,
+    lang_index: int,
+    incremental: bool = False,
+    page_load_strategy: Optional[str] = None,
+) -> None:
+    """Процесс-воркер: запускает свой вебдрайвер и выполняет шарды из очереди `tasks`."""
+    from src.webdriver.driver import Driver
+
+    webdriver_module = importlib.import_module(f'src.webdriver.{webdriver_name}')
+    webdriver_cls = getattr(webdriver_module, webdriver_name.capitalize())
+    driver = Driver(webdriver_cls, **({'page_load_strategy': page_load_strategy} if page_load_strategy else {}))
+    suppliers: dict = {}
+
+    try:
+        while (shard := tasks.get()) is not None:
+            results.put(('start', worker_id, shard.id, None))
+            try:
+                if shard.supplier_prefix not in suppliers:
+                    suppliers[shard.supplier_prefix] = _load_supplier(shard.supplier_prefix, driver)
+                ok = asyncio.run(
+                    _run_shard(suppliers[shard.supplier_prefix], shard, lang_index, worker_id, results, incremental)
+                )
+            except Exception as ex:
+                logger.error(f'Ошибка выполнения шарда {shard.id}', ex, False)
+                ok = False
+            results.put(('done', worker_id, shard.id, ok))
+    finally:
+        for s in suppliers.values():
+            http_driver = getattr(s, '_http_driver', None)
+            if http_driver:
+                try:
+                    http_driver.quit()
+                except Exception as ex:
+                    logger.debug(f'Воркер {worker_id}: ошибка закрытия HttpDriver', ex, False)
+        try:
+            driver.quit()
+        except Exception:
+            ...
+
+
+def _load_supplier(supplier_prefix: str, driver) -> Any:
+    """Создает `Supplier` с локаторами категорий и товара."""
+    from src.suppliers.supplier import Supplier
+
+    locators_path: Path = __root__ / 'src' / 'suppliers' / supplier_prefix / 'locators'
+    return Supplier(
+        supplier_prefix=supplier_prefix,
+        driver=driver,
+        locators={
+            'category': j_loads(locators_path / 'category.json'),
+            'product': j_loads(locators_path / 'product.json'),
+        },
+    )
+
+
+def _product_driver(s: Any) -> Any:
+    """Драйвер страниц товаров: `HttpDriver` с куки и user agent браузера, если локаторы товара это разрешают."""
+    from src.webdriver.http_driver import HttpDriver, uses_http_engine
+
+    if not uses_http_engine(s.locators.get('product')):
+        return s.driver
+    http_driver = getattr(s, '_http_driver', None)
+    if http_driver is None:
+        http_driver = HttpDriver.from_driver(s.driver)
+        object.__setattr__(s, '_http_driver', http_driver)
+    return http_driver
+
+
+def _merge_stored(fields: Any, state: Any, changed_fields: tuple) -> None:
+    """Дополняет частично собранный товар последними значениями несобранных полей из хранилища изменений.
+
+    Значения - сохраненные `Graber.grab_page_incremental()` значения `presta_fields`, они записываются
+    в `presta_fields` как есть (минуя сеттеры `ProductFields`, которые заново разбирают мультиязычные значения).
+    Записываются только поля, которые есть в `presta_fields` (`SimpleNamespace` или компактная запись);
+    прочие ключи хранилища (например, `id_presta` обновления цен) пропускаются.
+    """
+    presta_fields = getattr(fields, 'presta_fields', None)
+    if state is None or presta_fields is None:
+        return
+    for name, value in state.values.items():
+        if name in changed_fields or value is None or name.startswith('_') or not hasattr(presta_fields, name):
+            continue
+        setattr(presta_fields, name, value)
+
+
+async def _run_shard(s: Any, shard: Shard, lang_index: int, worker_id: int, results, incremental: bool = False) -> bool:
+    """Собирает все товары категории шарда и отправляет их писателю."""
+    d = s.driver
+    s.current_scenario = shard.scenario
+
+    if not d.get_url(shard.scenario['url']):
+        return False
+
+    # Ссылки на товары: `CategoryHarvester` (прокрутка до конца ленты и листалка `pagination`),
+    # если у поставщика нет своей функции сбора или его локаторы категории описывают листалку
+    category_locators = s.locators['category']
+    get_list = getattr(s.related_modules, 'get_list_products_in_category', None)
+    if not get_list or 'pagination' in category_locators:
+        products_urls = CategoryHarvester(d, category_locators).harvest()
+    else:
+        products_urls = get_list(s)
+        if asyncio.iscoroutine(products_urls):
+            products_urls = await products_urls
+        if not products_urls:
+            logger.warning(f'Нет товаров в категории {shard.id}')
+            return True
+        products_urls = [products_urls] if isinstance(products_urls, str) else products_urls
+        products_urls = iterate(dict.fromkeys(u for url in products_urls for u in (url if isinstance(url, list) else [url]) if u))
+
+    # Поставщик может собирать страницы товаров без браузера (`"engine": "http"` в `locators/product.json`)
+    product_driver = _product_driver(s)
+    if product_driver is d:
+        # Страницы товаров открываются в том же браузере - сначала собираются все ссылки категории
+        products_urls = iterate([url async for url in products_urls])
+
+    store: Optional[ChangeStore] = ChangeStore(shard.supplier_prefix) if incremental else None
+    try:
+        async for product_url in products_urls:
+            try:
+                if not await product_driver.navigate(product_url):
+                    continue
+                graber = s.related_modules.Graber(driver=product_driver, lang_index=lang_index)
+                if store is not None:
+                    key: str = store.key(product_url)
+                    fields = await graber.grab_page_incremental(store, key=key)
+                    if fields is None:
+                        results.put(('unchanged', worker_id, shard.id, product_url))
+                        continue
+                    _merge_stored(fields, store.get(key), graber.changed_fields)
+                else:
+                    fields = await graber.grab_page_async()
+                results.put(('product', worker_id, shard.id, (product_url, fields)))
+            except Exception as ex:
+                logger.error(f'Ошибка сбора товара {product_url}', ex, False)
+    finally:
+        if store is not None:
+            store.close()
+        if product_driver is not d:
+            await product_driver.close_client()  # <- сессия `aiohttp` привязана к циклу шарда
+    return True
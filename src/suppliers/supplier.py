@@ -45,6 +45,8 @@ import header
 from src import gs
 from src.utils.jjson import j_loads_ns
 from src.webdriver.driver import Driver
+from src.webdriver.blocking import BlockingProfile, apply_blocking
+from src.webdriver.session_store import SessionStore
 from src.scenario import run_scenarios, run_scenario_files
 from src.logger.logger import logger
 from src.logger.exceptions import DefaultSettingsException
@@ -107,16 +109,78 @@ class Supplier(BaseModel):
         except ModuleNotFoundError as ex:
             logger.error(f'Модуль не найден для поставщика {self.supplier_prefix}: ', ex)
             return False
-   
 
+        if self.driver:
+            self.apply_blocking_profile()
+        return True
 
-    def login(self) -> bool:
+    def apply_blocking_profile(self) -> bool:
+        """Применяет к веб-драйверу профиль блокировки ресурсов поставщика.
+
+        Профиль задается секцией `blocking` файла `src/suppliers/<supplier_prefix>/<supplier_prefix>.json`
+        и дополняет профиль, с которым запущен браузер (см. `src.webdriver.blocking`).
+
+        Returns:
+            bool: `True`, если профиль применен, `False`, если у поставщика нет профиля или произошла ошибка.
+        """
+        blocking = getattr(self._settings(), 'blocking', None)
+        if not blocking:
+            return False
+
+        browser = getattr(self.driver, 'driver', self.driver)
+        base: BlockingProfile = getattr(browser, 'blocking_launch', None) or BlockingProfile()
+        return apply_blocking(browser, BlockingProfile.from_config(blocking, base=base))
+
+
+    def _settings(self) -> Optional[SimpleNamespace]:
+        """Настройки поставщика из `src/suppliers/<supplier_prefix>/<supplier_prefix>.json`."""
+        settings_path = gs.path.src / 'suppliers' / self.supplier_prefix / f'{self.supplier_prefix}.json'
+        if not settings_path.exists():
+            return None
+        return j_loads_ns(settings_path)
+
+    def login(self, profile: str = 'default', force: bool = False) -> bool:
         """Выполняет вход на сайт поставщика.
 
+        Сначала восстанавливается сохраненная сессия (куки и localStorage, см. `src.webdriver.session_store`).
+        Сценарий `login.py` поставщика выполняется, только если сессии нет или она истекла;
+        после успешного входа сессия сохраняется. Срок жизни сессии и куки авторизации задаются
+        секцией `session` файла настроек поставщика: `{"max_age": <секунды>, "required_cookies": [...]}`.
+
+        Args:
+            profile (str): Имя профиля сессии (например, учетная запись).
+            force (bool): Выполнить вход, не восстанавливая сохраненную сессию.
+
         Returns:
             bool: `True`, если вход выполнен успешно, иначе `False`.
         """
-        return self.related_modules.login(self)
+        if not self.driver:
+            return self.related_modules.login(self)
+
+        session = getattr(self._settings(), 'session', None)
+        store = SessionStore(max_age=getattr(session, 'max_age', None))
+        required_cookies: list = getattr(session, 'required_cookies', None) or []
+        browser = getattr(self.driver, 'driver', self.driver)
+
+        if not force:
+            if getattr(self.driver, 'session_restored', False) and getattr(self.driver, 'session', None) == (self.supplier_prefix, profile):
+                return True
+            if store.restore(browser, self.supplier_prefix, profile, required_cookies):
+                logger.info(f'Восстановлена сессия поставщика {self.supplier_prefix}/{profile}, вход пропущен')
+                self._track_session(store, profile)
+                return True
+
+        result = self.related_modules.login(self)
+        if result:
+            store.save(browser, self.supplier_prefix, profile)
+            self._track_session(store, profile)
+        return result
+
+    def _track_session(self, store: SessionStore, profile: str) -> None:
+        """Дальнейшие переходы `Driver` обновляют сохраненную сессию."""
+        if isinstance(self.driver, Driver):
+            self.driver.session = (self.supplier_prefix, profile)
+            self.driver.session_store = store
 
     def run_scenario_files(self, scenario_files: Optional[str | List[str]] = None) -> bool:
         """Выполнение одного или нескольких файлов сценариев.
@@ -131,6 +195,26 @@ class Supplier(BaseModel):
         scenario_files = scenario_files  if scenario_files else self.scenario_files
         return run_scenario_files(self, scenario_files)
 
+    def run_scenario_files_parallel(self, scenario_files: Optional[str | List[str]] = None, processes: Optional[int] = None, **kwargs) -> dict:
+        """Выполнение файлов сценариев в нескольких процессах.
+
+        Каждый процесс запускает собственный вебдрайвер. Подробности в `src.suppliers.scenario_runner`.
+
+        Args:
+            scenario_files (Optional[str | List[str]]): Список файлов сценариев.
+                Если не указан, берется из `self.scenario_files`.
+            processes (Optional[int]): Количество процессов. По умолчанию - количество ядер.
+            **kwargs: Параметры `run_scenario_files_parallel()` (`writer`, `checkpoint_path`, `max_retries`, ...).
+
+        Returns:
+            dict: Статистика выполнения.
+        """
+        from src.suppliers.scenario_runner import run_scenario_files_parallel
+
+        scenario_files = scenario_files if scenario_files else self.scenario_files
+        scenario_files = [scenario_files] if isinstance(scenario_files, str) else scenario_files
+        return run_scenario_files_parallel({self.supplier_prefix: scenario_files}, processes=processes, **kwargs)
+
     def run_scenarios(self, scenarios: dict | List[dict]) -> bool:
         """Выполнение списка или одного сценария.
 
@@ -21,3 +21,4 @@ from .normalizer import (
 					)
 
 
+from .batch_normalizer import Normalizer
@@ -0,0 +1,310 @@
+## \file /src/utils/string/batch_normalizer.py
+# -*- coding: utf-8 -*-
+
+#! .pyenv/bin/python3
+
+"""
+Пакетная нормализация полей товара
+=========================================================================================
+
+`normalize_string()` из `normalizer.py` на каждом вызове выполняет `remove_html_tags()`,
+`remove_line_breaks()` и `remove_special_characters()` (с повторной сборкой шаблона),
+а значения полей сильно повторяются от товара к товару одного поставщика
+(тексты доставки, бренды, единицы измерения).
+
+`Normalizer`:
+
+- шаблон HTML-тегов компилируется один раз, удаляемые символы - таблица `str.translate()`,
+  переводы строк и повторяющиеся пробелы схлопываются одним `split()`;
+- результаты для коротких строк (до `max_length` символов) кэшируются в ограниченном LRU (`maxsize`);
+- `column()` нормализует столбец значений одного вида, `record()` - запись `{поле: значение}`
+  по видам полей `FIELD_KINDS`, `apply()` записывает нормализованную запись в `ProductFields`.
+
+Результаты совпадают с `normalize_string()`, `normalize_int()`, `normalize_float()` из `normalizer.py`.
+Функции модуля `normalize_string()`, `normalize_int()`, `normalize_float()` - замена с той же сигнатурой
+на общем экземпляре `default_normalizer`.
+
+Пример использования
+--------------------
+
+.. code-block:: python
+
+    from src.utils.string.batch_normalizer import Normalizer
+
+    normalizer = Normalizer()
+    names = normalizer.column(raw_names)  # <- строки
+    prices = normalizer.column(raw_prices, 'float')
+    normalizer.apply(product_fields, {'name': raw_name, 'price': raw_price, 'quantity': raw_quantity})
+
+Сравнение с функциями `normalizer.py`:
+
+.. code-block:: bash
+
+    python -m src.utils.string.batch_normalizer
+"""
+
+import re
+import random
+import timeit
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.logger.logger import logger
+from src.utils.string import normalizer
+
+
+# Виды значений полей
+STRING: str = 'string'
+INT: str = 'int'
+FLOAT: str = 'float'
+BOOLEAN: str = 'boolean'
+DATE: str = 'date'
+SKU: str = 'sku'
+
+# Виды полей товара - те же функции нормализации, что и в полях `Graber`
+FIELD_KINDS: Dict[str, str] = {
+    **dict.fromkeys((
+        'additional_shipping_cost', 'affiliate_summary', 'byer_protection', 'customer_reviews',
+        'delivery_in_stock', 'delivery_out_stock', 'description', 'description_short',
+        'low_stock_threshold', 'mpn', 'name', 'out_of_stock', 'pack_stock_type',
+        'quantity_discount', 'reference', 'specification', 'unity', 'upc',
+    ), STRING),
+    **dict.fromkeys((
+        'active', 'minimal_quantity', 'online_only', 'quantity', 'show_condition', 'show_price', 'weight',
+    ), INT),
+    **dict.fromkeys(('depth', 'price', 'wholesale_price', 'width'), FLOAT),
+    **dict.fromkeys(('date_add', 'date_upd'), DATE),
+}
+
+_HTML_TAGS = re.compile(r'<.*?>')
+
+
+class Normalizer:
+    """Нормализатор значений полей с предкомпилированными шаблонами и LRU повторяющихся строк.
+
+    Args:
+        maxsize (int): Размер LRU нормализованных строк.
+        max_length (int): Кэшируются строки не длиннее `max_length` символов (описания уникальны - их кэш только вытесняет повторы).
+        chars (Iterable[str]): Удаляемые символы (как `remove_special_characters()`).
+    """
+
+    def __init__(self, maxsize: int = 4096, max_length: int = 256, chars: Iterable[str] = ('#',)) -> None:
+        self.maxsize = maxsize
+        self.max_length = max_length
+        chars = ''.join(chars)
+        self._drop: dict = str.maketrans('', '', chars)
+        # Если удаляются пробельные символы, переводы строк заменяются пробелами до удаления - как в `normalize_string()`
+        self._line_breaks_first: bool = any(c.isspace() for c in chars)
+        self._cached: Callable[[str], str] = lru_cache(maxsize=maxsize)(self._clean)
+        self._by_kind: Dict[str, Callable[[Any], Any]] = {
+            STRING: self.to_string,
+            INT: self.to_int,
+            FLOAT: self.to_float,
+            BOOLEAN: normalizer.normalize_boolean,
+            DATE: normalizer.normalize_sql_date,
+            SKU: normalizer.normalize_sku,
+        }
+
+    def _clean(self, text: str) -> str:
+        text = _HTML_TAGS.sub('', text)
+        if self._line_breaks_first:
+            text = text.replace('\n', ' ').replace('\r', ' ')
+        return ' '.join(text.translate(self._drop).split())
+
+    def to_string(self, value: str | list) -> str:
+        """Normalize a string or a list of strings (see `normalize_string()`).
+
+        Args:
+            value (str | list): String or list of strings.
+
+        Returns:
+            str: Normalized string.
+
+        Raises:
+            TypeError: If `value` is not of type `str` or `list`.
+        """
+        if not value:
+            return ''
+        if isinstance(value, list):
+            value = ' '.join(map(str, value))
+        elif not isinstance(value, str):
+            raise TypeError('Данные должны быть строкой или списком строк.')
+        return self._cached(value) if len(value) <= self.max_length else self._clean(value)
+
+    def to_int(self, value: Any) -> int:
+        """Normalize a value into an integer (see `normalize_int()`).
+
+        Returns:
+            int: Integer, or the original value if conversion fails.
+        """
+        if type(value) is int:
+            return value
+        try:
+            if isinstance(value, Decimal):
+                return int(value)
+            return int(float(value))
+        except (ValueError, TypeError, InvalidOperation) as ex:
+            logger.error('Ошибка в normalize_int: ', ex)
+            return value
+
+    def to_float(self, value: Any) -> float | list | Any:
+        """Normalize a value or a list of values into floats (see `normalize_float()`).
+
+        Returns:
+            float | list: Float (`0` for empty values), list of floats, or the original value if conversion fails.
+        """
+        if not value:
+            return 0
+        if type(value) is float:
+            return value
+        if isinstance(value, (list, tuple)):
+            return [v for v in (self.to_float(v) for v in value) if v is not None]
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            logger.warning(f"Невозможно преобразовать '{value}' в float.")
+            return value
+
+    def column(self, values: Iterable[Any], kind: str = STRING) -> List[Any]:
+        """Normalize a column of values of one kind.
+
+        Args:
+            values (Iterable[Any]): Values.
+            kind (str): `string`, `int`, `float`, `boolean`, `date` or `sku`.
+
+        Returns:
+            List[Any]: Normalized values in the same order.
+
+        Example:
+            >>> Normalizer().column(['<b>Free</b> delivery', 'Free delivery', None])
+            ['Free delivery', 'Free delivery', '']
+        """
+        function: Callable[[Any], Any] = self._by_kind[kind]
+        if kind != STRING:
+            return [function(value) for value in values]
+
+        # Повторы внутри столбца нормализуются один раз, минуя LRU
+        seen: Dict[str, str] = {}
+        result: List[str] = []
+        for value in values:
+            if isinstance(value, str) and value:
+                normalized: Optional[str] = seen.get(value)
+                if normalized is None:
+                    normalized = seen[value] = function(value)
+                result.append(normalized)
+            else:
+                result.append(function(value))
+        return result
+
+    def record(self, values: Dict[str, Any], kinds: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Normalize a record `{field: raw value}` by field kinds.
+
+        Args:
+            values (Dict[str, Any]): Raw values of fields.
+            kinds (Optional[Dict[str, str]]): Kinds of fields. Defaults to `FIELD_KINDS`.
+                Fields without a kind are returned unchanged.
+
+        Returns:
+            Dict[str, Any]: Normalized record.
+        """
+        kinds = kinds or FIELD_KINDS
+        by_kind: Dict[str, Callable[[Any], Any]] = self._by_kind
+        return {name: by_kind[kinds[name]](value) if name in kinds else value for name, value in values.items()}
+
+    def apply(self, fields: Any, values: Dict[str, Any], kinds: Optional[Dict[str, str]] = None) -> Any:
+        """Normalize a record and assign it to `ProductFields` (through the field setters).
+
+        Args:
+            fields (ProductFields): Product fields.
+            values (Dict[str, Any]): Raw values of fields.
+            kinds (Optional[Dict[str, str]]): Kinds of fields. Defaults to `FIELD_KINDS`.
+
+        Returns:
+            ProductFields: `fields`.
+        """
+        for name, value in self.record(values, kinds).items():
+            try:
+                setattr(fields, name, value)
+            except Exception as ex:
+                logger.error(f'Ошибка установки значения поля `{name}`', ex, False)
+        return fields
+
+    def cache_info(self):
+        """Statistics of the string LRU (`functools._CacheInfo`)."""
+        return self._cached.cache_info()
+
+
+default_normalizer: Normalizer = Normalizer()
+
+
+def normalize_string(input_data: str | list) -> str:
+    """`normalize_string()` on the shared `default_normalizer`."""
+    return default_normalizer.to_string(input_data)
+
+
+def normalize_int(input_data: Any) -> int:
+    """`normalize_int()` on the shared `default_normalizer`."""
+    return default_normalizer.to_int(input_data)
+
+
+def normalize_float(value: Any) -> float | list | Any:
+    """`normalize_float()` on the shared `default_normalizer`."""
+    return default_normalizer.to_float(value)
+
+
+def benchmark(size: int = 20000, unique: int = 300, repeat: int = 5, seed: int = 0) -> dict:
+    """Micro-benchmark of `Normalizer` against the functions of `normalizer.py`.
+
+    The corpus imitates grabbed fields: `size` short strings drawn from `unique` distinct values
+    (delivery texts, brands with HTML and line breaks), plus prices and quantities as strings.
+
+    Args:
+        size (int): Values per column.
+        unique (int): Distinct strings in the string column.
+        repeat (int): Runs per case (the best run is reported).
+        seed (int): Random seed of the corpus.
+
+    Returns:
+        dict: `{case: seconds}` and `speedup_*` ratios.
+    """
+    rnd = random.Random(seed)
+    templates: List[str] = [
+        '<span class="a-text-bold">Free delivery</span>\n{}  #{}',
+        'Brand: <a href="/b/{}">Brand {}</a>',
+        ' In stock.\r\nShips from and sold by Store {} ({}) ',
+    ]
+    pool: List[str] = [rnd.choice(templates).format(i, rnd.randint(1, 99)) for i in range(unique)]
+    strings: List[str] = [rnd.choice(pool) for _ in range(size)]
+    prices: List[str] = [f'{rnd.uniform(1, 5000):.2f}' for _ in range(size)]
+    quantities: List[str] = [str(rnd.randint(0, 500)) for _ in range(size)]
+
+    engine = Normalizer()
+    if engine.column(strings) != [normalizer.normalize_string(s) for s in strings]:
+        logger.error('Результаты Normalizer не совпадают с normalize_string()')
+
+    def best(function: Callable[[], Any]) -> float:
+        return min(timeit.repeat(function, number=1, repeat=repeat))
+
+    stats: dict = {
+        'normalize_string': best(lambda: [normalizer.normalize_string(s) for s in strings]),
+        'Normalizer.to_string': best(lambda: [engine.to_string(s) for s in strings]),
+        'Normalizer.column(string)': best(lambda: engine.column(strings)),
+        'normalize_float': best(lambda: [normalizer.normalize_float(p) for p in prices]),
+        'Normalizer.column(float)': best(lambda: engine.column(prices, FLOAT)),
+        'normalize_int': best(lambda: [normalizer.normalize_int(q) for q in quantities]),
+        'Normalizer.column(int)': best(lambda: engine.column(quantities, INT)),
+    }
+    stats['speedup_string'] = stats['normalize_string'] / stats['Normalizer.to_string']
+    stats['speedup_column'] = stats['normalize_string'] / stats['Normalizer.column(string)']
+    logger.info(
+        f'{size} строк ({unique} уникальных): normalize_string {stats["normalize_string"] * 1000:.1f} ms, '
+        f'Normalizer.to_string {stats["Normalizer.to_string"] * 1000:.1f} ms (x{stats["speedup_string"]:.1f}), '
+        f'column {stats["Normalizer.column(string)"] * 1000:.1f} ms (x{stats["speedup_column"]:.1f})'
+    )
+    return stats
+
+
+if __name__ == '__main__':
+    for case, seconds in benchmark().items():
+        print(f'{case:28} {seconds:.4f}')
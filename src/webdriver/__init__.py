@@ -14,11 +14,13 @@
 - `Edge`: класс для работы с EdgeDriver.
 - `BS`: класс для работы с BrowserStack?????????????????.
 - `Playwright`: класс для работы с Playwright.
+- `DriverPool`: пул предварительно запущенных браузеров.
 """
 
         
 
 from .driver import Driver
+from .driver_pool import DriverPool
 # from .chrome import Chrome
 from .firefox import Firefox
 # from .edge import Edge
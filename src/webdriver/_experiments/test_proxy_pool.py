@@ -0,0 +1,150 @@
+## \file /src/webdriver/_experiments/test_proxy_pool.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Проверка `ProxyPool` на локальных заглушках
+===========================================
+
+Целевой HTTP-сервер, прокси HTTP CONNECT и SOCKS5 запускаются на `127.0.0.1` (`asyncio`),
+сеть не нужна. Проверяются `validate()`, `report()`, карантин и `report_error()`.
+
+```rst
+.. module:: src.webdriver._experiments.test_proxy_pool
+```
+"""
+
+import asyncio
+import socket
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import List, Tuple
+
+import header
+from src.webdriver.proxy_pool import ProxyPool
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+    except Exception:
+        ...
+    finally:
+        writer.close()
+
+
+async def _relay(client: Tuple[asyncio.StreamReader, asyncio.StreamWriter], host: str, port: int) -> None:
+    upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+    await asyncio.gather(_pipe(client[0], upstream_writer), _pipe(upstream_reader, client[1]))
+
+
+async def _target(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Целевой сервер: `200` на любой запрос."""
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        ...
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok')
+    await writer.drain()
+    writer.close()
+
+
+async def _connect_proxy(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Заглушка HTTP CONNECT."""
+    request: List[bytes] = (await reader.readline()).split()
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        ...
+    host, port = request[1].decode().rsplit(':', 1)
+    writer.write(b'HTTP/1.1 200 Connection established\r\n\r\n')
+    await writer.drain()
+    await _relay((reader, writer), host, int(port))
+
+
+async def _socks5_proxy(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Заглушка SOCKS5 без авторизации, адрес - имя хоста."""
+    greeting: bytes = await reader.readexactly(2)
+    await reader.readexactly(greeting[1])
+    writer.write(b'\x05\x00')
+    await writer.drain()
+    request: bytes = await reader.readexactly(4)
+    host: str = (await reader.readexactly((await reader.readexactly(1))[0])).decode() if request[3] == 0x03 else socket.inet_ntoa(await reader.readexactly(4))
+    port: int = int.from_bytes(await reader.readexactly(2), 'big')
+    writer.write(b'\x05\x00\x00\x01\x00\x00\x00\x00\x00\x00')
+    await writer.drain()
+    await _relay((reader, writer), host, port)
+
+
+def _free_port() -> int:
+    """Порт, на котором никто не слушает - неработающий прокси."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestProxyPool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.servers: List[asyncio.AbstractServer] = []
+        target_port: int = await self._serve(_target)
+        self.http: str = f'http://127.0.0.1:{await self._serve(_connect_proxy)}'
+        self.socks5: str = f'socks5://127.0.0.1:{await self._serve(_socks5_proxy)}'
+        self.dead: str = f'socks5://127.0.0.1:{_free_port()}'
+
+        self.tmp = tempfile.TemporaryDirectory()
+        path = Path(self.tmp.name) / 'proxies.txt'
+        path.write_text('\n'.join((self.http, self.socks5, self.dead)), encoding='utf-8')
+        self.pool = ProxyPool(
+            path=path,
+            scores_path=Path(self.tmp.name) / 'proxy_scores.json',
+            check_url=f'http://127.0.0.1:{target_port}/ip',
+            timeout=2,
+            quarantine=60,
+        )
+
+    async def asyncTearDown(self) -> None:
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.tmp.cleanup()
+
+    async def _serve(self, handler) -> int:
+        server = await asyncio.start_server(handler, '127.0.0.1', 0)
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def test_validate(self):
+        working = await self.pool.validate(candidates=[self.http, self.socks5, self.dead])
+        self.assertEqual(set(working), {self.http, self.socks5})
+        self.assertEqual(set(self.pool.ranked()), {self.http, self.socks5})
+        self.assertEqual(self.pool.scores[self.dead].fails, 1)
+        self.assertGreater(self.pool.scores[self.dead].quarantine_until, time.time())
+        # Оценки сохранены и загружаются новым пулом
+        self.assertEqual(set(ProxyPool(self.pool.path, self.pool.scores_path).ranked()), {self.http, self.socks5})
+
+    async def test_quarantine(self):
+        await self.pool.validate(candidates=[self.http, self.socks5, self.dead])
+        self.assertNotIn(self.dead, self.pool.candidates())
+
+        self.pool.report(self.socks5, ok=False)
+        self.assertEqual(self.pool.ranked(), [self.http])
+        self.pool.report(self.socks5, ok=False)
+        # Время карантина растет квадратично с числом ошибок подряд
+        self.assertGreater(self.pool.scores[self.socks5].quarantine_until, time.time() + 3 * self.pool.quarantine)
+        self.assertEqual(await self.pool.get_proxy_async(), {'protocol': 'http', 'host': '127.0.0.1', 'port': self.http.rsplit(':', 1)[1]})
+
+        self.pool.report(self.socks5, ok=True, latency=0.1)
+        self.assertIn(self.socks5, self.pool.ranked())
+
+    async def test_report_error(self):
+        await self.pool.validate(candidates=[self.http, self.socks5])
+        self.assertFalse(self.pool.report_error(self.http, Exception('net::ERR_NAME_NOT_RESOLVED')))
+        self.assertIn(self.http, self.pool.ranked())
+        self.assertTrue(self.pool.report_error(self.http, Exception('unknown error: net::ERR_PROXY_CONNECTION_FAILED')))
+        self.assertTrue(self.pool.report_error(self.socks5, Exception('Reached error page: about:neterror?e=proxyConnectFailure')))
+        self.assertEqual(self.pool.ranked(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,368 @@
+## \file /src/webdriver/blocking.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.blocking
+    :platform: Windows, Unix
+    :synopsis: Resource-blocking navigation profile for Chrome and Firefox.
+
+Product grabs need the DOM text and image URLs, not the image bytes, fonts, videos and trackers.
+A `BlockingProfile` describes what the browser must not download:
+
+.. code-block:: json
+
+    "blocking": {
+        "enabled": true,
+        "images": true, "media": true, "fonts": true, "third_party": true,
+        "patterns": ["*/recommendations/*"],
+        "allow": ["cdn.example.com"],
+        "report": true
+    }
+
+The profile is read from the `blocking` section of `chrome.json`/`firefox.json` and may be overridden
+by the `blocking` section of the supplier settings (`src/suppliers/<prefix>/<prefix>.json`).
+
+How it is applied:
+
+- Chrome, at launch: images are disabled with the content-settings preference, unless the profile has `allow`.
+- Chrome, at runtime: fonts, media, third-party domains and `patterns` are blocked with
+  CDP `Network.setBlockedURLs`. A supplier profile replaces the list on the running browser;
+  if the browser was launched without image blocking, images are blocked by extension.
+- Firefox: preferences at launch (`permissions.default.image`, downloadable fonts, autoplay,
+  tracking protection). Firefox has no URL blocklist preference, so `patterns` and `allow` are ignored,
+  and a supplier profile cannot block images in a browser launched without image blocking.
+
+`allow` exempts hosts from every blocked resource type, images included. On Chrome the hosts are passed
+as non-blocking `urlPatterns` of `Network.setBlockedURLs`, which take precedence over the blocklist.
+The content-settings preference cannot exempt an image host (its exceptions match the origin of the page),
+so a profile with `allow` blocks images by extension at runtime instead.
+
+`BlockingStats` estimates the bytes saved on every page from the resources the page asked for
+and did not get; `measure_savings()` measures them exactly on Chrome by loading the page twice.
+"""
+
+import time
+from dataclasses import dataclass, field, fields, replace
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Union
+
+import header
+from src.logger.logger import logger
+
+
+IMAGE_PATTERNS: tuple = ('*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.bmp*', '*.ico*')
+FONT_PATTERNS: tuple = ('*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*')
+MEDIA_PATTERNS: tuple = ('*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*', '*.ogg*', '*.m4a*', '*.mov*', '*.m4s*')
+
+# Ad, analytics and tracking domains blocked with `third_party`
+THIRD_PARTY_DOMAINS: tuple = (
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googletagservices.com',
+    'adservice.google.com',
+    'amazon-adsystem.com',
+    'facebook.net',
+    'connect.facebook.net',
+    'hotjar.com',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'mc.yandex.ru',
+    'bat.bing.com',
+    'clarity.ms',
+    'tiktok.com',
+    'newrelic.com',
+    'nr-data.net',
+)
+
+# Average size of a blocked resource, used for the per-page estimate of saved bytes
+ESTIMATED_SIZE: Dict[str, int] = {
+    'image': 60_000,
+    'font': 35_000,
+    'media': 500_000,
+}
+
+
+@dataclass
+class BlockingProfile:
+    """What the browser must not download.
+
+    Attributes:
+        enabled (bool): Apply the profile.
+        images (bool): Block images.
+        media (bool): Block audio and video.
+        fonts (bool): Block web fonts.
+        third_party (bool): Block the ad/analytics domains (`THIRD_PARTY_DOMAINS` and `third_party_domains`).
+        third_party_domains (List[str]): Extra domains blocked with `third_party`.
+        patterns (List[str]): Extra URL patterns (`*` wildcards) to block.
+        allow (List[str]): Hosts that are never blocked.
+        report (bool): Collect `BlockingStats` on every page.
+    """
+
+    enabled: bool = False
+    images: bool = True
+    media: bool = True
+    fonts: bool = True
+    third_party: bool = True
+    third_party_domains: List[str] = field(default_factory=list)
+    patterns: List[str] = field(default_factory=list)
+    allow: List[str] = field(default_factory=list)
+    report: bool = True
+
+    @classmethod
+    def from_config(cls, config: Optional[Union[dict, SimpleNamespace, 'BlockingProfile']], base: Optional['BlockingProfile'] = None) -> 'BlockingProfile':
+        """Creates a profile from a `blocking` settings section.
+
+        Args:
+            config: `blocking` section (`dict` or `SimpleNamespace` from `j_loads_ns`).
+            base (Optional[BlockingProfile]): Profile whose values are used for the keys missing in `config`.
+
+        Returns:
+            BlockingProfile: The profile.
+        """
+        base = base or cls()
+        if isinstance(config, BlockingProfile):
+            return config
+        if isinstance(config, SimpleNamespace):
+            config = vars(config)
+        if not config:
+            return base
+        names = {f.name for f in fields(cls)}
+        return replace(base, **{k: v for k, v in config.items() if k in names})
+
+    def is_allowed(self, value: str) -> bool:
+        """`True` if `value` (host or URL pattern) belongs to an allowed host."""
+        return any(host and host in value for host in self.allow)
+
+    def blocked_urls(self, include_images: bool = False) -> List[str]:
+        """URL patterns for CDP `Network.setBlockedURLs`.
+
+        Args:
+            include_images (bool): Also block images by extension. Used when the images
+                could not be disabled with the browser preferences.
+        """
+        urls: List[str] = []
+        if self.images and include_images:
+            urls.extend(IMAGE_PATTERNS)
+        if self.fonts:
+            urls.extend(FONT_PATTERNS)
+        if self.media:
+            urls.extend(MEDIA_PATTERNS)
+        if self.third_party:
+            for domain in (*THIRD_PARTY_DOMAINS, *self.third_party_domains):
+                if not self.is_allowed(domain):
+                    urls.append(f'*://*.{domain}/*')
+                    urls.append(f'*://{domain}/*')
+        urls.extend(p for p in self.patterns if not self.is_allowed(p))
+        return list(dict.fromkeys(urls))
+
+    def allowed_patterns(self) -> List[Dict[str, Any]]:
+        """Non-blocking `urlPatterns` for CDP `Network.setBlockedURLs`: the hosts of `allow`."""
+        patterns: List[Dict[str, Any]] = []
+        for host in filter(None, self.allow):
+            patterns.append({'urlPattern': f'*://{host}/*', 'block': False})
+            patterns.append({'urlPattern': f'*://*.{host}/*', 'block': False})
+        return patterns
+
+    def chrome_prefs(self) -> Dict[str, Any]:
+        """Chrome preferences (`options.add_experimental_option('prefs', ...)`) of the profile."""
+        if not self.enabled or not self.images or self.allow:  # <- with `allow` images are blocked at runtime
+            return {}
+        return {'profile.managed_default_content_settings.images': 2}
+
+    def firefox_prefs(self) -> Dict[str, Any]:
+        """Firefox preferences (`options.set_preference()`) of the profile."""
+        if not self.enabled:
+            return {}
+        prefs: Dict[str, Any] = {}
+        if self.images:
+            prefs['permissions.default.image'] = 2
+        if self.media:
+            prefs['media.autoplay.default'] = 5
+            prefs['media.autoplay.blocking_policy'] = 2
+        if self.fonts:
+            prefs['gfx.downloadable_fonts.enabled'] = False
+        if self.third_party:
+            prefs['privacy.trackingprotection.enabled'] = True
+            prefs['privacy.trackingprotection.socialtracking.enabled'] = True
+        if self.patterns or self.allow:
+            logger.debug('Firefox: `patterns` and `allow` of the blocking profile are not supported', None, False)
+        return prefs
+
+
+@dataclass
+class BlockingStats:
+    """Traffic of the pages loaded with a blocking profile.
+
+    Attributes:
+        pages (int): Pages recorded.
+        transferred (int): Bytes downloaded (navigation and resources, as reported by the Performance API).
+        saved (int): Estimated bytes not downloaded.
+        blocked (Dict[str, int]): Blocked resources by type.
+    """
+
+    pages: int = 0
+    transferred: int = 0
+    saved: int = 0
+    blocked: Dict[str, int] = field(default_factory=lambda: {'image': 0, 'font': 0, 'media': 0})
+    last: Dict[str, Any] = field(default_factory=dict)
+
+    def record(self, driver, url: str = '') -> Dict[str, Any]:
+        """Records the current page of `driver`.
+
+        Returns:
+            Dict[str, Any]: `{'url', 'transferred', 'saved', 'blocked'}` of the page.
+        """
+        stats: Dict[str, Any] = page_stats(driver)
+        if not stats:
+            return {}
+        saved: int = sum(ESTIMATED_SIZE[kind] * count for kind, count in stats['blocked'].items())
+        self.pages += 1
+        self.transferred += stats['transferred']
+        self.saved += saved
+        for kind, count in stats['blocked'].items():
+            self.blocked[kind] = self.blocked.get(kind, 0) + count
+        self.last = {'url': url, 'transferred': stats['transferred'], 'saved': saved, 'blocked': stats['blocked']}
+        logger.debug(f'Blocking: {url} - downloaded {stats["transferred"] // 1024} KB, saved ~{saved // 1024} KB', None, False)
+        return self.last
+
+    def report(self) -> Dict[str, Any]:
+        """Totals and per-page averages."""
+        pages: int = self.pages or 1
+        return {
+            'pages': self.pages,
+            'transferred': self.transferred,
+            'saved': self.saved,
+            'transferred_per_page': self.transferred // pages,
+            'saved_per_page': self.saved // pages,
+            'blocked': dict(self.blocked),
+        }
+
+
+PAGE_STATS_SCRIPT: str = """
+    const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+    const transferred = entries.reduce((sum, e) => sum + (e.transferSize || 0), 0);
+    const image = Array.from(document.images).filter(i => i.currentSrc && i.complete && !i.naturalWidth).length;
+    const media = Array.from(document.querySelectorAll('video, audio'))
+        .filter(m => (m.currentSrc || m.src) && m.readyState === 0).length;
+    let font = 0;
+    if (document.fonts) { document.fonts.forEach(f => { if (f.status === 'error') font++; }); }
+    return {transferred: transferred, blocked: {image: image, font: font, media: media}};
+"""
+
+
+def page_stats(driver) -> Dict[str, Any]:
+    """Bytes downloaded by the current page and resources that were requested but not loaded."""
+    try:
+        return driver.execute_script(PAGE_STATS_SCRIPT) or {}
+    except Exception as ex:
+        logger.debug('Error collecting page traffic', ex, False)
+        return {}
+
+
+def is_chrome(driver) -> bool:
+    return hasattr(driver, 'execute_cdp_cmd')
+
+
+def apply_blocking(driver, profile: BlockingProfile, launch: bool = False) -> bool:
+    """Applies `profile` to a running browser and attaches `blocking`/`blocking_stats` to it.
+
+    On Chrome the URL blocklist is replaced with the one of `profile`; image blocking and
+    Firefox preferences take effect only at launch (see `BlockingProfile.chrome_prefs()`/`firefox_prefs()`).
+
+    Args:
+        driver: Selenium WebDriver.
+        profile (BlockingProfile): Profile to apply.
+        launch (bool): `profile` is the one the browser was launched with (its preferences are in effect).
+
+    Returns:
+        bool: `True` if the profile was applied.
+    """
+    if launch:
+        driver.blocking_launch = profile
+    launched: Optional[BlockingProfile] = getattr(driver, 'blocking_launch', None)
+    driver.blocking = profile
+    if profile.enabled and profile.report:
+        if getattr(driver, 'blocking_stats', None) is None:
+            driver.blocking_stats = BlockingStats()
+    else:
+        driver.blocking_stats = None
+
+    if not is_chrome(driver):
+        images_by_prefs: bool = bool(launched and launched.enabled and launched.images)
+        if profile.enabled and profile.images and not images_by_prefs:
+            logger.warning('Firefox: images are not blocked - the browser was launched without image blocking '
+                           '(pass the profile to `Firefox(blocking=...)`)')
+        elif launched is not None and profile != launched:
+            logger.debug('Firefox: the blocking profile changes take effect after a browser restart', None, False)
+        return True
+
+    # Images are disabled by the launch preferences; if they were not, block them by extension
+    images_by_prefs: bool = bool(launched and launched.chrome_prefs())
+    if profile.enabled and profile.allow and images_by_prefs:
+        logger.warning('Chrome: `allow` does not apply to images - the browser was launched with images disabled '
+                       '(pass the profile with `allow` to `Chrome(blocking=...)`)')
+    urls: List[str] = profile.blocked_urls(include_images=not images_by_prefs) if profile.enabled else []
+    params: Dict[str, Any] = {'urls': urls}
+    if profile.enabled and profile.allow:
+        params['urlPatterns'] = profile.allowed_patterns()
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', params)
+        return True
+    except Exception as ex:
+        if 'urlPatterns' not in params:
+            logger.error('Error applying the blocking profile', ex, False)
+            return False
+    # Chrome without `urlPatterns`: `allow` exempts the third-party domains and `patterns` only
+    logger.warning('Chrome: `allow` is not supported by this browser version, images of the allowed hosts are blocked')
+    try:
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': urls})
+        return True
+    except Exception as ex:
+        logger.error('Error applying the blocking profile', ex, False)
+        return False
+
+
+def measure_savings(driver, url: str, profile: Optional[BlockingProfile] = None) -> Optional[Dict[str, Any]]:
+    """Loads `url` without and with the URL blocklist and returns the bytes and time of both loads (Chrome).
+
+    Images disabled by the launch preferences stay disabled in both loads.
+
+    Args:
+        driver: Selenium WebDriver (Chrome).
+        url (str): Page to measure.
+        profile (Optional[BlockingProfile]): Profile to measure. Defaults to the profile of the driver.
+
+    Returns:
+        Optional[Dict[str, Any]]: `{'full', 'blocked', 'saved', 'full_time', 'blocked_time'}` or `None` for Firefox.
+    """
+    if not is_chrome(driver):
+        return None
+    profile = profile or getattr(driver, 'blocking', None) or BlockingProfile(enabled=True)
+
+    def load(urls: List[str], allowed: List[Dict[str, Any]]) -> tuple:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': urls, **({'urlPatterns': allowed} if allowed else {})})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        start: float = time.monotonic()
+        driver.get(url)
+        return page_stats(driver).get('transferred', 0), time.monotonic() - start
+
+    full, full_time = load([], [])
+    blocked, blocked_time = load(profile.blocked_urls(include_images=True), profile.allowed_patterns())
+    apply_blocking(driver, getattr(driver, 'blocking', None) or profile)
+    return {
+        'full': full,
+        'blocked': blocked,
+        'saved': full - blocked,
+        'full_time': full_time,
+        'blocked_time': blocked_time,
+    }
@@ -20,7 +20,9 @@ from selenium.common.exceptions import WebDriverException
 from src import gs
 from src.webdriver.executor import ExecuteLocator
 from src.webdriver.js import JavaScript
-from src.webdriver.proxy import get_proxies_dict, check_proxy
+from src.webdriver.blocking import BlockingProfile, apply_blocking
+from src.webdriver.proxy_pool import ProxyPool
+from src.webdriver.profiles import ProfileManager, random_user_agent
 from src.utils.jjson import j_loads_ns
 from src.logger.logger import logger
 from fake_useragent import UserAgent
@@ -43,6 +45,15 @@ class Chrome(WebDriver):
     :type options: Optional[List[str]]
     :param window_mode: Режим окна браузера (`windowless`, `kiosk`, `full_window` и т.д.)
     :type window_mode: Optional[str]
+    :param blocking: Профиль блокировки ресурсов. Дополняет секцию `blocking` из `chrome.json`.
+    :type blocking: Optional[dict | BlockingProfile]
+    :param ephemeral_profile: Запуск с временной копией шаблонного профиля (`src.webdriver.profiles`),
+        копия удаляется в `quit()`. По умолчанию - `ephemeral_profile` из `chrome.json`.
+    :type ephemeral_profile: Optional[bool]
+    :param page_load_strategy: Стратегия загрузки страницы (`normal`, `eager`, `none`).
+        По умолчанию - `page_load_strategy` из `chrome.json` (`normal`). `eager` включается только там,
+        где готовность страницы ждет `src.webdriver.readiness` (`Driver.navigate()`/`get_url()`).
+    :type page_load_strategy: Optional[str]
     """
     driver_name: str = 'chrome'
     def __init__(self, profile_name: Optional[str] = None,
@@ -51,10 +62,14 @@ class Chrome(WebDriver):
                  proxy_file_path: Optional[str] = None,
                  options: Optional[List[str]] = None,
                  window_mode: Optional[str] = None,
+                 blocking: Optional[dict | BlockingProfile] = None,
+                 ephemeral_profile: Optional[bool] = None,
+                 page_load_strategy: Optional[str] = None,
                  *args, **kwargs) -> None:
         #  объявление переменных
         service = None
         options_obj = None
+        self.profile_clone: Optional[Path] = None
 
         # Загрузка настроек Chrome
         config = j_loads_ns(Path(gs.path.src / 'webdriver' / 'chrome' / 'chrome.json'))
@@ -93,9 +108,20 @@ class Chrome(WebDriver):
 
 
         # Установка пользовательского агента
-        user_agent = user_agent or UserAgent().random
+        user_agent = user_agent or random_user_agent('chrome') or UserAgent().random
         options_obj.add_argument(f'--user-agent={user_agent}')
 
+        # Стратегия загрузки страницы: `eager` - `get()` возвращает управление после DOMContentLoaded,
+        # дальнейшее ожидание выполняет `src.webdriver.readiness`
+        page_load_strategy = page_load_strategy or getattr(config, 'page_load_strategy', None)
+        if page_load_strategy:
+            options_obj.page_load_strategy = page_load_strategy
+
+        # Профиль блокировки ресурсов (изображения, шрифты, медиа, трекеры)
+        blocking_profile = BlockingProfile.from_config(blocking, base=BlockingProfile.from_config(getattr(config, 'blocking', None)))
+        if blocking_profile.chrome_prefs():
+            options_obj.add_experimental_option('prefs', blocking_profile.chrome_prefs())
+
         # Установка прокси, если включены
         if hasattr(config, 'proxy_enabled') and config.proxy_enabled:
              self.set_proxy(options_obj)
@@ -108,11 +134,21 @@ class Chrome(WebDriver):
              profile_directory = str(Path(profile_directory).parent / profile_name)
         if '%LOCALAPPDATA%' in profile_directory:
               profile_directory = Path(profile_directory.replace('%LOCALAPPDATA%', os.environ.get('LOCALAPPDATA')))
-        options_obj.add_argument(f"--user-data-dir={profile_directory}")
+
         try:
+            # Временная копия шаблонного профиля: браузеры не делят один профиль, холодный старт без кэшей ОС-профиля
+            if ephemeral_profile if ephemeral_profile is not None else getattr(config, 'ephemeral_profile', False):
+                profiles = ProfileManager.for_browser(self.driver_name)
+                profiles.bake(source=Path(gs.path.src, config.profile_directory.internal))
+                self.profile_clone = profiles.clone(profile_name)
+                profile_directory = self.profile_clone
+            options_obj.add_argument(f"--user-data-dir={profile_directory}")
+
             logger.info('Запуск Chrome WebDriver')
             super().__init__(service=service, options=options_obj)
             self._payload()
+            if blocking_profile.enabled:
+                apply_blocking(self, blocking_profile, launch=True)
         except WebDriverException as ex:
                 logger.critical("""
                     ---------------------------------
@@ -121,28 +157,29 @@ class Chrome(WebDriver):
                         - Обновление Chrome
                         - Отсутствие Chrome на ОС
                     ----------------------------------""", ex)
+                self._report_proxy_failure()
+                self._release_profile_clone()
                 return  # Явный возврат при ошибке
+        except OSError as ex:
+            logger.critical('Ошибка подготовки профиля или запуска Chrome WebDriver:', ex)
+            self._release_profile_clone()
+            return  # Явный возврат при ошибке
         except Exception as ex:
             logger.critical('Ошибка работы Chrome WebDriver:', ex)
+            self._report_proxy_failure()
+            self._release_profile_clone()
             return  # Явный возврат при ошибке
 
     def set_proxy(self, options: Options) -> None:
         """
-        Настройка прокси из словаря, возвращаемого get_proxies_dict.
+        Настройка прокси, выданного пулом `ProxyPool`.
 
         :param options: Опции Chrome, в которые добавляются настройки прокси.
         :type options: Options
         """
-        # Получение словаря прокси
-        proxies_dict = get_proxies_dict()
-        # Создание списка всех прокси
-        all_proxies = proxies_dict.get('socks4', []) + proxies_dict.get('socks5', [])
-        # Перебор прокси для поиска рабочего
-        working_proxy = None
-        for proxy in random.sample(all_proxies, len(all_proxies)):
-            if check_proxy(proxy):
-                working_proxy = proxy
-                break
+        # Лучший проверенный прокси из пула (проверка кандидатов - только если проверенных нет)
+        working_proxy = ProxyPool.default().get_proxy(protocols=('socks4', 'socks5'))
+        self.proxy = working_proxy
          # Настройка прокси, если он найден
         if working_proxy:
             proxy = working_proxy
@@ -164,6 +201,26 @@ class Chrome(WebDriver):
         else:
             logger.warning('Нет доступных прокси в предоставленном файле.')
 
+    def _report_proxy_failure(self) -> None:
+        """Браузер не запустился с прокси: прокси уходит на карантин пула, оценки сохраняются сразу."""
+        if getattr(self, 'proxy', None):
+            pool = ProxyPool.default()
+            pool.report(self.proxy, ok=False)
+            pool.save()
+
+    def quit(self) -> None:
+        """Закрывает браузер и удаляет временную копию профиля."""
+        try:
+            super().quit()
+        finally:
+            self._release_profile_clone()
+
+    def _release_profile_clone(self) -> None:
+        """Удаляет временную копию профиля."""
+        if self.profile_clone:
+            ProfileManager.for_browser(self.driver_name).release(self.profile_clone)
+            self.profile_clone = None
+
     def _payload(self) -> None:
          """
         Загружает исполнителей для локаторов и JavaScript сценариев.
@@ -180,6 +237,7 @@ class Chrome(WebDriver):
          self.get_webelement_as_screenshot = execute_locator.get_webelement_as_screenshot
          self.get_webelement_by_locator = execute_locator.get_webelement_by_locator
          self.get_attribute_by_locator = execute_locator.get_attribute_by_locator
+         self.get_attributes_by_locators = execute_locator.get_attributes_by_locators
          self.send_message = self.send_key_to_webelement = execute_locator.send_message
 
 if __name__ == "__main__":
@@ -12,8 +12,8 @@
 Класс Driver упрощает задачи инициализации драйвера, навигации по URL, управления куками и обработки исключений.
 """
 
+import asyncio
 import copy
-import pickle
 import time
 import re
 from pathlib import Path
@@ -29,6 +29,10 @@ import header
 from src import gs
 
 from src.logger.logger import logger
+from src.webdriver.readiness import Until, wait_until, wait_until_async
+from src.webdriver.snapshot_archive import SnapshotArchive
+from src.webdriver.session_store import SessionStore
+from src.webdriver.proxy_pool import ProxyPool
 try:
     from src.logger.exceptions import ExecuteLocatorException, WebDriverException
 except Exception as ex:
@@ -50,7 +54,11 @@ class Driver:
         Args:
             webdriver_cls: Класс WebDriver, например Chrome или Firefox.
             args: Позиционные аргументы для драйвера.
-            kwargs: Ключевые аргументы для драйвера.
+            kwargs: Ключевые аргументы для драйвера. Ключ `snapshot_archive` (`SnapshotArchive` или `True` - архив по умолчанию)
+                включает сохранение `page_source` каждой открытой страницы в архив снимков.
+                Ключ `session` (префикс поставщика или `(префикс, профиль)`) восстанавливает сохраненную сессию
+                поставщика (куки и localStorage) до первого перехода и сохраняет ее после переходов;
+                ключ `session_store` задает хранилище (`SessionStore`).
 
         Raises:
             TypeError: Если `webdriver_cls` не является допустимым классом WebDriver.
@@ -61,7 +69,16 @@ class Driver:
         """
         if not hasattr(webdriver_cls, 'get'):
             raise TypeError('`webdriver_cls` должен быть допустимым классом WebDriver.')
+        snapshot_archive = kwargs.pop('snapshot_archive', None)
+        self.snapshot_archive: Optional[SnapshotArchive] = SnapshotArchive() if snapshot_archive is True else snapshot_archive
+        session = kwargs.pop('session', None)
+        self.session: Optional[tuple] = (session, 'default') if isinstance(session, str) else tuple(session) if session else None
+        self.session_store: SessionStore = kwargs.pop('session_store', None) or SessionStore()
+        self.session_restored: bool = False
+        self._session_saved_at: float = 0.0
         self.driver = webdriver_cls(*args, **kwargs)
+        if self.session:
+            self.session_restored = self.session_store.restore(self.driver, *self.session)
 
     def __init_subclass__(cls, *, browser_name: Optional[str] = None, **kwargs):
         """
@@ -163,15 +180,20 @@ class Driver:
                 logger.debug('Не удалось определить язык сайта из JavaScript', ex)
                 return
 
-    def get_url(self, url: str) -> bool:
+    def get_url(self, url: str, until: Until = 'load', timeout: float = 30) -> bool:
         """
         Переходит по указанному URL и сохраняет текущий URL, предыдущий URL и куки.
 
+        Готовность страницы определяется событиями браузера (см. `src.webdriver.readiness`), без опроса `readyState`.
+
         Args:
             url: URL для перехода.
+            until: Стратегия готовности страницы: `'domcontentloaded'`, `'load'`, `'networkidle'`,
+                `'selector:<css>'` или список стратегий. По умолчанию `'load'`.
+            timeout: Максимальное время ожидания готовности страницы (секунды).
 
         Returns:
-            `True`, если переход успешен и текущий URL совпадает с ожидаемым, `False` в противном случае.
+            `True`, если переход успешен, `False` в противном случае.
 
         Raises:
             WebDriverException: Если возникает ошибка с WebDriver.
@@ -182,34 +204,82 @@ class Driver:
 
         try:
             self.driver.get(url)
-           
-            attempts = 5
-            while self.ready_state not in ('complete','interactive'):
-                """ Ожидание завершения загрузки страницы """
-                attempts -= 5
-                if attempts < 0: # Если страница не загрузилась за 5 попыток, то цикл прерывается с выводом сообщения об ошибке
-                    logger.error(f'Страница не загрузилась за 5 попыток: {url=}')
-                    ...
-                    break
-                time.sleep(1)
-
-            if url != _previous_url:
-                self.previous_url = _previous_url
-
-            self._save_cookies_localy()
+            if not wait_until(self.driver, until, timeout):
+                logger.error(f'Страница не загрузилась за {timeout} сек: {url=}', None, False)
+
+            self._after_navigation(url, _previous_url)
             return True
-            
+
         except WebDriverException as ex:
             logger.error('WebDriverException', ex)
+            self._report_proxy_error(ex)
+            return False
+
+        except InvalidArgumentException as ex:
+            logger.error(f"InvalidArgumentException {url}", ex)
+            return False
+        except Exception as ex:
+            logger.error(f'Ошибка при переходе по URL: {url}\n', ex)
+            self._report_proxy_error(ex)
             return False
 
+    async def navigate(self, url: str, until: Until = 'load', timeout: float = 30) -> bool:
+        """
+        Асинхронный переход по URL. Возвращает управление, как только страница удовлетворяет `until`.
+
+        Блокирующие вызовы WebDriver выполняются в отдельном потоке, цикл событий не блокируется.
+
+        Args:
+            url: URL для перехода.
+            until: Стратегия готовности страницы (см. `get_url()`).
+            timeout: Максимальное время ожидания готовности страницы (секунды).
+
+        Returns:
+            `True`, если страница готова, `False` в противном случае.
+
+        Example:
+            >>> await driver.navigate(url, until='selector:#product-title')
+        """
+        try:
+            _previous_url: str = await asyncio.to_thread(lambda: copy.copy(self.current_url))
+            await asyncio.to_thread(self.driver.get, url)
+            ready: bool = await wait_until_async(self.driver, until, timeout)
+            if not ready:
+                logger.error(f'Страница не загрузилась за {timeout} сек: {url=}', None, False)
+
+            # Снимок страницы, статистика блокировки и сохранение сессии - вызовы WebDriver и запись файлов
+            await asyncio.to_thread(self._after_navigation, url, _previous_url)
+            return ready
+
         except InvalidArgumentException as ex:
             logger.error(f"InvalidArgumentException {url}", ex)
             return False
         except Exception as ex:
             logger.error(f'Ошибка при переходе по URL: {url}\n', ex)
+            self._report_proxy_error(ex)
             return False
 
+    def _report_proxy_error(self, ex: BaseException) -> None:
+        """Прокси браузера (`set_proxy()`), из-за которого не открылась страница, уходит на карантин пула."""
+        proxy = getattr(self.driver, 'proxy', None)
+        if proxy:
+            ProxyPool.default().report_error(proxy, ex)
+
+    def _after_navigation(self, url: str, previous_url: str) -> None:
+        """Сохраняет предыдущий URL, куки, статистику трафика (если задан профиль блокировки)
+        и снимок страницы (если задан `snapshot_archive`) после перехода."""
+        if url != previous_url:
+            self.previous_url = previous_url
+
+        blocking_stats = getattr(self.driver, 'blocking_stats', None)
+        if blocking_stats:
+            blocking_stats.record(self.driver, url)
+
+        if self.snapshot_archive:
+            self.snapshot_archive.put(self.current_url, self.page_source)
+
+        self._save_cookies_localy()
+
     def window_open(self, url: Optional[str] = None) -> None:
         """Open a new tab in the current browser window and switch to it.
 
@@ -233,22 +303,49 @@ class Driver:
         """
         time.sleep(delay)
 
-    def _save_cookies_localy(self) -> None:
+    def _save_cookies_localy(self, interval: float = 60) -> None:
         """
-        Сохраняет текущие куки веб-драйвера в локальный файл.
+        Сохраняет куки и localStorage в сессию поставщика (`session`), не чаще чем раз в `interval` секунд.
+        Без `session` ничего не сохраняется.
+
+        Args:
+            interval: Минимальный интервал между сохранениями (секунды).
+        """
+        if not self.session or time.monotonic() - self._session_saved_at < interval:
+            return
+        self._session_saved_at = time.monotonic()
+        self.session_store.save(self.driver, *self.session)
+
+    def save_session(self, supplier_prefix: str, profile: str = 'default') -> bool:
+        """
+        Сохраняет куки и localStorage браузера как сессию поставщика (например, после входа на сайт).
+
+        Args:
+            supplier_prefix: Префикс поставщика.
+            profile: Имя профиля сессии (например, учетная запись).
 
         Returns:
-            None
+            bool: `True`, если сессия сохранена.
+        """
+        self.session = (supplier_prefix, profile)
+        self._session_saved_at = time.monotonic()
+        return self.session_store.save(self.driver, supplier_prefix, profile)
 
-        Raises:
-            Exception: Если возникает ошибка при сохранении куки.
+    def restore_session(self, supplier_prefix: str, profile: str = 'default', required_cookies: tuple = ()) -> bool:
         """
-        return True # <- ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ debug
-        try:
-            with open(gs.cookies_filepath, 'wb') as cookiesfile:
-                pickle.dump(self.driver.get_cookies(), cookiesfile)
-        except Exception as ex:
-            logger.error('Ошибка при сохранении куки:', ex)
+        Восстанавливает сохраненную сессию поставщика, если она не истекла.
+
+        Args:
+            supplier_prefix: Префикс поставщика.
+            profile: Имя профиля сессии.
+            required_cookies: Куки, без которых сессия недействительна.
+
+        Returns:
+            bool: `True`, если сессия восстановлена.
+        """
+        self.session = (supplier_prefix, profile)
+        self.session_restored = self.session_store.restore(self.driver, supplier_prefix, profile, required_cookies)
+        return self.session_restored
 
     def fetch_html(self, url: str) -> Optional[bool]:
         """
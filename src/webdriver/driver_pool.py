@@ -0,0 +1,290 @@
+## \file /src/webdriver/driver_pool.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.driver_pool
+    :platform: Windows, Unix
+    :synopsis: Pool of pre-warmed browser instances leased to scenario jobs.
+
+The pool starts `size` headless browsers up front and hands them out through an async
+`acquire()`/`release()` API (or the `lease()` context manager). Every returned driver is health-checked:
+crashed sessions, sessions that leaked windows and sessions that served `max_uses` jobs are quit
+and replaced with a fresh browser.
+
+`DriverPool.map()` schedules a list of URLs across all pooled browsers. Each browser has its own
+queue of URLs; a browser that runs out of work steals from the tail of the longest queue of another browser,
+so slow pages do not leave the rest of the pool idle.
+
+Example:
+    ```python
+    from src.webdriver.chrome import Chrome
+    from src.webdriver.driver_pool import DriverPool
+
+    async def grab(driver, url):
+        driver.get_url(url)
+        return await driver.execute_locator(locator.name)
+
+    async with DriverPool(Chrome, size=4) as pool:
+        results = await pool.map(urls, grab)
+
+    async with DriverPool(Chrome, size=4, session='amazon') as pool:   # <- browsers start logged in
+        ...
+    ```
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import header
+from src.webdriver.driver import Driver
+from src.logger.logger import logger
+
+
+@dataclass
+class PooledDriver:
+    """Pool slot: the driver and its usage statistics."""
+
+    index: int
+    driver: Optional[Driver] = None
+    uses: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+
+class DriverPool:
+    """
+    Pool of pre-warmed `Driver` instances.
+
+    Args:
+        webdriver_cls: WebDriver class, e.g. `Chrome` or `Firefox` from `src.webdriver`.
+        size: Number of browsers in the pool.
+        headless: Start browsers without a window.
+        max_uses: Recycle the browser after this number of leases.
+        max_windows: Recycle the browser if it has more open windows than this (leaked popups/tabs).
+        profile_prefix: Each slot gets its own profile `<profile_prefix>_<index>`, because two browsers
+            cannot share one profile directory. `None` - use `profile_name` from `kwargs` as is.
+        *args, **kwargs: Arguments passed to `Driver`/`webdriver_cls`. `session='<supplier_prefix>'` restores
+            the saved supplier session into every browser before its first lease (see `src.webdriver.session_store`),
+            so pooled browsers start logged in.
+    """
+
+    # Window mode used by each browser class for headless start
+    headless_modes: Dict[str, str] = {
+        'chrome': 'windowless',
+        'firefox': 'headless',
+        'edge': 'headless',
+    }
+
+    def __init__(
+        self,
+        webdriver_cls,
+        size: int = 4,
+        *args,
+        headless: bool = True,
+        max_uses: int = 200,
+        max_windows: int = 3,
+        profile_prefix: Optional[str] = 'pool',
+        **kwargs,
+    ) -> None:
+        if size < 1:
+            raise ValueError('`size` must be a positive number.')
+        self.webdriver_cls = webdriver_cls
+        self.size = size
+        self.args = args
+        self.kwargs = kwargs
+        self.max_uses = max_uses
+        self.max_windows = max_windows
+        self.profile_prefix = profile_prefix
+        if headless:
+            mode = self.headless_modes.get(getattr(webdriver_cls, 'driver_name', ''), 'headless')
+            self.kwargs.setdefault('window_mode', mode)
+
+        self._slots: List[PooledDriver] = [PooledDriver(index=i) for i in range(size)]
+        self._leased: Dict[int, PooledDriver] = {}
+        self._idle: Optional[asyncio.Queue] = None
+        self._closed: bool = False
+
+    async def __aenter__(self) -> 'DriverPool':
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> 'DriverPool':
+        """Launches all browsers of the pool concurrently.
+
+        Returns:
+            DriverPool: The pool itself.
+        """
+        self._idle = asyncio.Queue()
+        self._closed = False
+        await asyncio.gather(*(self._launch(slot) for slot in self._slots))
+        for slot in self._slots:
+            self._idle.put_nowait(slot)
+        logger.info(f'Driver pool started: {self.size} x {getattr(self.webdriver_cls, "driver_name", self.webdriver_cls)}')
+        return self
+
+    async def acquire(self, timeout: Optional[float] = None) -> Driver:
+        """Leases a healthy driver from the pool.
+
+        Args:
+            timeout: Maximum time to wait for a free driver (seconds). `None` - wait forever.
+
+        Returns:
+            Driver: Leased driver. Must be returned with `release()`.
+
+        Raises:
+            RuntimeError: If the pool is not started or closed.
+            asyncio.TimeoutError: If no driver became free within `timeout`.
+        """
+        if self._idle is None or self._closed:
+            raise RuntimeError('Driver pool is not started.')
+
+        slot: PooledDriver = await asyncio.wait_for(self._idle.get(), timeout)
+        if slot.driver is None or not await asyncio.to_thread(self._is_healthy, slot):
+            await self._recycle(slot)
+            if slot.driver is None:
+                self._idle.put_nowait(slot)
+                raise RuntimeError(f'Unable to start pooled driver #{slot.index}.')
+        slot.uses += 1
+        self._leased[id(slot.driver)] = slot
+        return slot.driver
+
+    async def release(self, driver: Driver, healthy: Optional[bool] = None) -> None:
+        """Returns a leased driver to the pool.
+
+        Args:
+            driver: Driver received from `acquire()`.
+            healthy: `False` forces recycling of the browser, `None` - run the health check.
+        """
+        slot: Optional[PooledDriver] = self._leased.pop(id(driver), None)
+        if slot is None:
+            logger.warning('Released driver does not belong to the pool.')
+            return
+
+        if self._closed:
+            await asyncio.to_thread(self._quit, slot.driver)
+            return
+
+        if healthy is None:
+            healthy = await asyncio.to_thread(self._is_healthy, slot)
+        if not healthy or slot.uses >= self.max_uses:
+            await self._recycle(slot)
+        self._idle.put_nowait(slot)
+
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None) -> AsyncIterator[Driver]:
+        """Context manager around `acquire()`/`release()`.
+
+        Example:
+            >>> async with pool.lease() as driver:
+            ...     driver.get_url(url)
+        """
+        driver = await self.acquire(timeout)
+        healthy: Optional[bool] = None
+        try:
+            yield driver
+        except Exception:
+            healthy = None if await asyncio.to_thread(self._ping, driver) else False
+            raise
+        finally:
+            await self.release(driver, healthy)
+
+    async def map(
+        self,
+        urls: Iterable[str],
+        job: Callable[[Driver, str], Awaitable[Any]],
+    ) -> Dict[str, Any]:
+        """Runs `job(driver, url)` for every URL across the pool with work stealing.
+
+        Args:
+            urls: URLs of categories or products.
+            job: Coroutine function that processes one URL with a leased driver.
+
+        Returns:
+            Dict[str, Any]: Job result for each URL (`None` if the job failed).
+        """
+        queues: List[deque] = [deque() for _ in range(self.size)]
+        for i, url in enumerate(dict.fromkeys(urls)):
+            queues[i % self.size].append(url)
+
+        results: Dict[str, Any] = {}
+
+        def next_url(own: deque) -> Optional[str]:
+            if own:
+                return own.popleft()
+            victim = max(queues, key=len)
+            return victim.pop() if victim else None
+
+        async def worker(own: deque) -> None:
+            while (url := next_url(own)) is not None:
+                try:
+                    async with self.lease() as driver:
+                        results[url] = await job(driver, url)
+                except Exception as ex:
+                    logger.error(f'Error processing {url}', ex, False)
+                    results[url] = None
+
+        await asyncio.gather(*(worker(queue) for queue in queues))
+        return results
+
+    async def close(self) -> None:
+        """Quits all idle browsers. Leased browsers are quit when they are released."""
+        self._closed = True
+        if self._idle is None:
+            return
+        drivers = []
+        while not self._idle.empty():
+            drivers.append(self._idle.get_nowait().driver)
+        await asyncio.gather(*(asyncio.to_thread(self._quit, driver) for driver in drivers))
+
+    async def _launch(self, slot: PooledDriver) -> None:
+        """Starts a browser for the slot."""
+        kwargs = dict(self.kwargs)
+        if self.profile_prefix and 'profile_name' not in kwargs:
+            kwargs['profile_name'] = f'{self.profile_prefix}_{slot.index}'
+        try:
+            slot.driver = await asyncio.to_thread(Driver, self.webdriver_cls, *self.args, **kwargs)
+        except Exception as ex:
+            logger.error(f'Error starting pooled driver #{slot.index}', ex, False)
+            slot.driver = None
+        slot.uses = 0
+        slot.started = time.monotonic()
+
+    async def _recycle(self, slot: PooledDriver) -> None:
+        """Quits the browser of the slot and starts a new one."""
+        logger.debug(f'Recycling pooled driver #{slot.index} after {slot.uses} uses', None, False)
+        await asyncio.to_thread(self._quit, slot.driver)
+        await self._launch(slot)
+
+    def _is_healthy(self, slot: PooledDriver) -> bool:
+        """Checks that the browser session is alive and did not leak windows."""
+        driver = slot.driver
+        if driver is None or not self._ping(driver):
+            return False
+        try:
+            return len(driver.window_handles) <= self.max_windows
+        except Exception:
+            return False
+
+    @staticmethod
+    def _ping(driver: Driver) -> bool:
+        """Checks that the browser answers a trivial script."""
+        try:
+            return getattr(driver.driver, 'session_id', None) is not None and driver.execute_script('return 1;') == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver: Optional[Driver]) -> None:
+        """Quits the browser ignoring errors of an already dead session."""
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception as ex:
+            logger.debug('Error quitting pooled driver', ex, False)
@@ -123,6 +123,7 @@ class Edge(WebDriver):
         self.get_webelement_as_screenshot = execute_locator.get_webelement_as_screenshot
         self.get_webelement_by_locator = execute_locator.get_webelement_by_locator
         self.get_attribute_by_locator = execute_locator.get_attribute_by_locator
+        self.get_attributes_by_locators = execute_locator.get_attributes_by_locators
         self.send_message = self.send_key_to_webelement = execute_locator.send_message
 
     def set_options(self, opts: Optional[List[str]] = None) -> EdgeOptions:  
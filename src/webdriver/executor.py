@@ -28,11 +28,70 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 import header
 from src.logger.logger import logger
 from src.utils.printer import pprint as print
+from src.webdriver.locator import CompiledLocator, compile_locator, evaluate_attribute
+from src.webdriver.waits import wait_for_elements
+from src.webdriver.keyboard import DEFAULT_REPLACE, type_text
+from src.webdriver.screenshots import capture_elements
+
+
+# Batched attribute reader, executed in a single `execute_script` round-trip.
+# `arguments[0]` is a list of specs `{name, by, selector, attribute, attr_map, if_list}`.
+# Every field maps to a pair `[is_list, values]`, or to `null` when nothing was found.
+BATCH_ATTRIBUTES_SCRIPT: str = """
+const specs = arguments[0];
+const out = {};
+const read = (el, attr) => {
+    if (!el) { return null; }
+    if (el.nodeType !== 1) { return el.textContent; }
+    let v = el[attr];
+    if (v === undefined || v === null || typeof v === 'object' || typeof v === 'function') {
+        v = el.getAttribute(attr);
+    }
+    return (v === undefined || v === null) ? null : String(v);
+};
+const find = (by, selector) => {
+    switch (by) {
+        case 'xpath': {
+            const r = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const a = [];
+            for (let i = 0; i < r.snapshotLength; i++) { a.push(r.snapshotItem(i)); }
+            return a;
+        }
+        case 'css selector': return Array.from(document.querySelectorAll(selector));
+        case 'id': return Array.from(document.querySelectorAll('#' + CSS.escape(selector)));
+        case 'name': return Array.from(document.getElementsByName(selector));
+        case 'class name': return Array.from(document.getElementsByClassName(selector));
+        case 'tag name': return Array.from(document.getElementsByTagName(selector));
+    }
+    return [];
+};
+const pick = (els, ifList) => {
+    if (ifList === 'first') { return [false, [els[0]]]; }
+    if (ifList === 'last') { return [false, [els[els.length - 1]]]; }
+    if (ifList === 'even') { return [true, els.filter((_, i) => i % 2 === 0)]; }
+    if (ifList === 'odd') { return [true, els.filter((_, i) => i % 2 === 1)]; }
+    if (Array.isArray(ifList)) { return [true, ifList.map(i => els[i])]; }
+    if (Number.isInteger(ifList)) { return [false, [els[ifList - 1]]]; }
+    return [true, els];
+};
+for (const spec of specs) {
+    let els;
+    try { els = find(spec.by, spec.selector); } catch (e) { out[spec.name] = null; continue; }
+    if (!els.length) { out[spec.name] = null; continue; }
+    const [isList, picked] = pick(els, spec.if_list);
+    const values = picked.map(el => {
+        if (!spec.attr_map) { return read(el, spec.attribute); }
+        const d = {};
+        for (const [k, v] of Object.entries(spec.attr_map)) { d[read(el, k)] = read(el, v); }
+        return d;
+    });
+    out[spec.name] = [isList, values];
+}
+return out;
+"""
 
 
 @dataclass
@@ -60,8 +119,11 @@ class ExecuteLocator:
         """
         Executes actions on a web element based on the provided locator.
 
+        Locators that are not compiled yet are compiled into a `CompiledLocator` copy,
+        so the passed locator is never modified.
+
         Args:
-            locator: Locator data (dict or SimpleNamespace).
+            locator: Locator data (dict, SimpleNamespace or CompiledLocator).
             timeout: Timeout for locating the element (seconds).
             timeout_for_event: Wait condition ('presence_of_element_located', 'visibility_of_all_elements_located').
             message: Optional message for actions like send_keys or type.
@@ -78,7 +140,7 @@ class ExecuteLocator:
             return None
 
         async def _parse_locator(
-            locator: SimpleNamespace,
+            locator: SimpleNamespace | CompiledLocator,
             message: Optional[str] = None,
             timeout: Optional[float] = 0,
             timeout_for_event: Optional[str] = "presence_of_element_located",
@@ -87,21 +149,19 @@ class ExecuteLocator:
             """Parses and executes locator instructions."""
 
             if locator.event and locator.attribute and locator.mandatory is None:
-                logger.debug(f"Locator with event and attribute but missing mandatory flag. Skipping. {print(locator.__dict__, text_color='yellow')} ",None,False)
+                logger.debug(f"Locator with event and attribute but missing mandatory flag. Skipping. {print(_locator_dict(locator), text_color='yellow')} ",None,False)
                 return None
 
-            if isinstance(locator.by, str):
+            if isinstance(locator, CompiledLocator) or isinstance(locator.by, str):
                 try:
-                    locator.by = locator.by.lower()
+                    locator = compile_locator(locator)
                     if locator.attribute:
-                        locator.attribute = self._evaluate_locator(locator.attribute)
-
                         if locator.by == "value":
                             return locator.attribute
 
                         if locator.by == 'url':
                             if not locator.attribute:
-                                logger.error(f"Attribute is missing for 'URL' locator: {print(locator.__dict__, text_color='yellow')}")
+                                logger.error(f"Attribute is missing for 'URL' locator: {print(_locator_dict(locator), text_color='yellow')}")
                                 return False
 
                             url = self.driver.current_url
@@ -110,7 +170,7 @@ class ExecuteLocator:
                             return query_params.get(locator.attribute, None)[0]
 
                 except Exception as ex:
-                    logger.error(f"Error getting attribute by 'VALUE': {print(locator.__dict__, text_color='yellow')}, error:",ex)
+                    logger.error(f"Error getting attribute by 'VALUE': {print(_locator_dict(locator), text_color='yellow')}, error:",ex)
                     return None
 
                 if locator.event:
@@ -164,13 +224,7 @@ class ExecuteLocator:
             The evaluated attribute, which can be a string, list of strings, or dictionary.
         """
 
-        def _evaluate(attr: str) -> Optional[str]:
-            """Evaluates single attribute string."""
-            return getattr(Keys, re.findall(r"%(\w+)%", attr)[0], None) if re.match(r"^%\w+%", attr) else attr
-
-        if isinstance(attribute, list):
-            return  [_evaluate(attr) for attr in attribute]
-        return  _evaluate(str(attribute))
+        return evaluate_attribute(attribute)
 
 
 
@@ -197,9 +251,7 @@ class ExecuteLocator:
         Returns:
             The attribute value(s) as a WebElement, list of WebElements, or None if not found.
         """
-        locator = (
-            locator if isinstance(locator, SimpleNamespace) else SimpleNamespace(**locator) if isinstance(locator, dict) else None
-        )
+        locator = SimpleNamespace(**locator) if isinstance(locator, dict) else locator
 
         web_element: WebElement = await self.get_webelement_by_locator(locator, timeout, timeout_for_event)
         if not web_element:
@@ -207,17 +259,6 @@ class ExecuteLocator:
                 logger.debug(f"Element not found: {print(locator, text_color='yellow')}")
             return None
 
-        def _parse_dict_string(attr_string: str) -> dict | None:
-            """Parses a string like '{attr1:attr2}' into a dictionary."""
-            try:
-                return {
-                    k.strip(): v.strip()
-                    for k, v in (pair.split(":") for pair in attr_string.strip("{}").split(","))
-                }
-            except ValueError as ex:
-                logger.debug(f"Invalid attribute string format: {attr_string!r}", ex)
-                return None
-
         def _get_attributes_from_dict(web_element: WebElement, attr_dict: dict) -> dict:
             """Retrieves attribute values from a WebElement based on a dictionary."""
             result = {}
@@ -232,8 +273,14 @@ class ExecuteLocator:
             return result
 
         if web_element:
+            if isinstance(locator, CompiledLocator) and locator.attribute_map is not None:
+                attr_dict = locator.attr_dict
+                if isinstance(web_element, list):
+                    return [_get_attributes_from_dict(el, attr_dict) for el in web_element]
+                return _get_attributes_from_dict(web_element, attr_dict)
+
             if isinstance(locator.attribute, str) and locator.attribute.startswith("{"):
-                attr_dict = _parse_dict_string(locator.attribute)
+                attr_dict = self._parse_dict_string(locator.attribute)
                 if isinstance(web_element, list):
                     return [_get_attributes_from_dict(el, attr_dict) for el in web_element]
                 return _get_attributes_from_dict(web_element, attr_dict)
@@ -254,6 +301,137 @@ class ExecuteLocator:
 
 
 
+    async def get_attributes_by_locators(
+        self,
+        locators: dict | SimpleNamespace,
+        fields: Optional[List[str]] = None,
+        fallback: bool = True,
+    ) -> dict:
+        """
+        Resolves attributes for a whole locator dictionary in a single `execute_script` round-trip.
+
+        Locators with `by` = `VALUE` are resolved locally. Locators that cannot be evaluated
+        in the page (events, `URL`, paired lists, locators without `attribute`) and
+        batched locators that found nothing but declare a `timeout` are passed to `execute_locator`
+        if `fallback` is set.
+
+        Args:
+            locators: Locator dictionary, e.g. the content of `locators/product.json` (dict or SimpleNamespace).
+            fields: Optional list of field names to resolve. Defaults to all locators.
+            fallback: Resolve non-batchable locators one by one through `execute_locator`.
+
+        Returns:
+            Dictionary keyed by field name with the same values `execute_locator` would return.
+
+        Example:
+            >>> values = await driver.get_attributes_by_locators(locator, ['name', 'price', 'images_urls'])
+            >>> values['price']
+            '19.99'
+        """
+        locators = vars(locators) if isinstance(locators, SimpleNamespace) else dict(locators or {})
+        names = fields or list(locators.keys())
+
+        result: dict = {}
+        specs: list = []
+        deferred: dict = {}
+
+        for name in names:
+            locator = locators.get(name)
+            if isinstance(locator, dict):
+                locator = SimpleNamespace(**locator)
+            if not isinstance(locator, (SimpleNamespace, CompiledLocator)) or not hasattr(locator, 'by'):
+                continue
+            compiled = isinstance(locator, CompiledLocator)
+
+            by = locator.by.lower() if isinstance(locator.by, str) else locator.by
+            attribute = getattr(locator, 'attribute', None)
+            event = getattr(locator, 'event', None)
+
+            if not attribute and not getattr(locator, 'selector', None):
+                result[name] = None
+                continue
+
+            if by == 'value' and not event:
+                result[name] = attribute if compiled else self._evaluate_locator(attribute) if attribute else None
+                continue
+
+            if (
+                event
+                or not attribute
+                or not isinstance(by, str)
+                or by not in ('xpath', 'css selector', 'id', 'name', 'class name', 'tag name')
+            ):
+                deferred[name] = locator
+                continue
+
+            attr_map = locator.attr_dict if compiled else None
+            if not compiled and isinstance(attribute, str) and attribute.startswith('{'):
+                attr_map = self._parse_dict_string(attribute)
+                if not attr_map:
+                    result[name] = None
+                    continue
+
+            specs.append({
+                'name': name,
+                'by': by,
+                'selector': locator.selector,
+                'attribute': str(attribute),
+                'attr_map': attr_map,
+                'if_list': getattr(locator, 'if_list', None),
+            })
+
+        if specs:
+            try:
+                raw: dict = await asyncio.to_thread(self.driver.execute_script, BATCH_ATTRIBUTES_SCRIPT, specs) or {}
+            except Exception as ex:
+                logger.error('Error in batched attributes script', ex, False)
+                raw = None
+
+            for spec in specs:
+                name = spec['name']
+                if raw is None:
+                    deferred[name] = locators.get(name)
+                    continue
+                packed = raw.get(name)
+                if not packed:
+                    locator = locators.get(name)
+                    timeout = locator.get('timeout') if isinstance(locator, dict) else getattr(locator, 'timeout', 0)
+                    if timeout:
+                        deferred[name] = locator
+                    else:
+                        result[name] = None
+                    continue
+                is_list, values = packed
+                if not is_list:
+                    result[name] = values[0] if values else None
+                else:
+                    result[name] = values if len(values) > 1 else values[0] if values else None
+
+        for name, locator in deferred.items():
+            if not fallback:
+                result[name] = None
+                continue
+            try:
+                result[name] = await self.execute_locator(locator)
+            except Exception as ex:
+                logger.debug(f'Error resolving locator `{name}`', ex, False)
+                result[name] = None
+
+        return result
+
+    @staticmethod
+    def _parse_dict_string(attr_string: str) -> dict | None:
+        """Parses a string like '{attr1:attr2}' into a dictionary."""
+        try:
+            return {
+                k.strip(): v.strip()
+                for k, v in (pair.split(":") for pair in attr_string.strip("{}").split(","))
+            }
+        except ValueError as ex:
+            logger.debug(f"Invalid attribute string format: {attr_string!r}", ex)
+            return None
+
+
     async def get_webelement_by_locator(
         self,
         locator: dict | SimpleNamespace,
@@ -313,24 +491,23 @@ class ExecuteLocator:
                     driver.find_elements, locator.by, locator.selector
                 )
             else:
-                condition = (
-                    EC.presence_of_all_elements_located
-                    if timeout_for_event == "presence_of_all_elements_located"
-                    else EC.visibility_of_all_elements_located
-                )
-                web_elements = await asyncio.to_thread(
-                    WebDriverWait(driver, timeout).until,
-                    condition((locator.by, locator.selector)),
+                # In-page MutationObserver, multiplexed with the other waits on this browser (`src.webdriver.waits`)
+                web_elements = await wait_for_elements(
+                    driver,
+                    locator.by,
+                    locator.selector,
+                    timeout,
+                    visible=not str(timeout_for_event or "").startswith("presence"),
                 )
 
             return await _parse_elements_list(web_elements, locator) if web_elements else None
 
         except TimeoutException as ex:
-            logger.error(f"Timeout for locator: {print(locator.__dict__, text_color='yellow')}", ex, False)
+            logger.error(f"Timeout for locator: {print(_locator_dict(locator), text_color='yellow')}", ex, False)
             return None
 
         except Exception as ex:
-            logger.error(f"Error locating element: {print(locator.__dict__, text_color='yellow')}", ex, False)
+            logger.error(f"Error locating element: {print(_locator_dict(locator), text_color='yellow')}", ex, False)
             return None
 
     async def get_webelement_as_screenshot(
@@ -356,9 +533,7 @@ class ExecuteLocator:
         Returns:
            BinaryIO stream of the screenshot or None if failed.
         """
-        locator = (
-            locator if isinstance(locator, SimpleNamespace) else SimpleNamespace(**locator) if isinstance(locator, dict) else None
-        )
+        locator = SimpleNamespace(**locator) if isinstance(locator, dict) else locator
 
         if not webelement:
             webelement = await self.get_webelement_by_locator(
@@ -368,12 +543,51 @@ class ExecuteLocator:
         if not webelement:
             return None
 
+        if isinstance(webelement, list):
+            # Several elements - one capture of the page, cropped per element
+            return await capture_elements(self.driver, webelement)
+
         try:
             return webelement.screenshot_as_png
         except Exception as ex:
             logger.error(f"Failed to take screenshot", ex)
             return None
 
+    async def get_webelements_as_screenshots(
+        self,
+        locators: List[SimpleNamespace | dict],
+        timeout: float = 5,
+        timeout_for_event: str = "presence_of_element_located",
+        image_format: str = "png",
+    ) -> List[Optional[bytes | List[Optional[bytes]]]]:
+        """
+        Takes screenshots of the elements of several locators from a single capture of the page.
+
+        Args:
+            locators: Locators (dict or SimpleNamespace).
+            timeout: Timeout for locating the elements (seconds).
+            timeout_for_event: Wait condition ('presence_of_element_located', 'visibility_of_all_elements_located').
+            image_format: 'png' or 'webp'.
+
+        Returns:
+            Screenshot of every locator, aligned with `locators`: bytes, a list of bytes for locators
+            that resolve to several elements, or None if nothing was found.
+        """
+        found = await asyncio.gather(
+            *(self.get_webelement_by_locator(locator, timeout, timeout_for_event) for locator in locators)
+        )
+        elements: List[WebElement] = [
+            element for webelement in found if webelement
+            for element in (webelement if isinstance(webelement, list) else [webelement])
+        ]
+        images = iter(await capture_elements(self.driver, elements, image_format=image_format))
+        return [
+            None if not webelement
+            else [next(images) for _ in webelement] if isinstance(webelement, list)
+            else next(images)
+            for webelement in found
+        ]
+
     async def execute_event(
         self,
         locator: SimpleNamespace | dict,
@@ -395,16 +609,14 @@ class ExecuteLocator:
         Returns:
             The result of the event execution (str, list of str, bytes, list of bytes, or bool).
         """
-        locator = (
-            locator if isinstance(locator, SimpleNamespace) else SimpleNamespace(**locator) if isinstance(locator, dict) else None
-        )
-        events = str(locator.event).split(";")
+        locator = SimpleNamespace(**locator) if isinstance(locator, dict) else locator
+        events = locator.events if isinstance(locator, CompiledLocator) else str(locator.event).split(";")
         result: list = []
 
-        webelement = await self.get_webelement_by_locator(locator, timeout, timeout_for_event)
-        if not webelement:
+        webelements = await self.get_webelement_by_locator(locator, timeout, timeout_for_event)
+        if not webelements:
             return False
-        webelement = webelement[0] if isinstance(webelement, list) else webelement
+        webelement = webelements[0] if isinstance(webelements, list) else webelements
 
         for event in events:
             if event == "click()":
@@ -452,7 +664,7 @@ class ExecuteLocator:
 
             elif event == "screenshot()":
                 try:
-                    result.append(await self.get_webelement_as_screenshot(locator, webelement=webelement))
+                    result.append(await self.get_webelement_as_screenshot(locator, webelement=webelements))
                 except Exception as ex:
                     logger.error(f"Error taking screenshot: {locator=}", ex, False)
                     return False
@@ -481,9 +693,8 @@ class ExecuteLocator:
             elif event.startswith("type("):
                 message = event.replace("type(", "").replace(")", "")
                 if typing_speed:
-                    for character in message:
-                        await asyncio.to_thread(webelement.send_keys, character)
-                        await asyncio.sleep(typing_speed)
+                    if not await type_text(self.driver, webelement, message, typing_speed=typing_speed):
+                        return False
                 else:
                     await asyncio.to_thread(webelement.send_keys, message)
 
@@ -510,34 +721,7 @@ class ExecuteLocator:
         Returns:
             True if the message was sent successfully, False otherwise.
         """
-        locator = (
-            locator
-            if isinstance(locator, SimpleNamespace)
-            else SimpleNamespace(**locator) if isinstance(locator, dict) else None
-        )
-
-        def type_message(
-            el: WebElement,
-            message: str,
-            replace_dict: dict = {";": "SHIFT+ENTER"},
-            typing_speed: float = typing_speed,
-        ) -> bool:
-            """Types a message into a web element with a specified typing speed."""
-            message = message.split(" ")
-            for word in message:
-                word += " "
-                try:
-                    for letter in word:
-                        if letter in replace_dict.keys():
-                            self.actions.key_down(Keys.SHIFT).send_keys(Keys.ENTER).key_up(Keys.SHIFT)
-                        else:
-                            self.actions.send_keys(letter)
-                            self.actions.pause(typing_speed)
-                            self.actions.perform()
-                except Exception as ex:
-                    logger.error(f"Error typing message:/n message={print(message)},/n word={print(letter)},/n letter={print(letter)}/n", ex, False)
-                    continue
-            return True
+        locator = SimpleNamespace(**locator) if isinstance(locator, dict) else locator
 
         webelement = await self.get_webelement_by_locator(
             locator=locator, timeout=timeout, timeout_for_event=timeout_for_event
@@ -546,11 +730,15 @@ class ExecuteLocator:
             logger.debug("Web element was not found for sending message.")
             return False
         webelement = webelement[0] if isinstance(webelement, list) else webelement
-        self.actions.move_to_element(webelement)
-        type_message(
-            el=webelement,
-            message=message,
-            replace_dict={";": "SHIFT+ENTER"},
+        # The whole keystroke schedule (`;` -> SHIFT+ENTER, pauses of `typing_speed`) is sent in a few batches
+        return await type_text(
+            self.driver,
+            webelement,
+            message,
             typing_speed=typing_speed,
+            replace=DEFAULT_REPLACE,
         )
-        return True
\ No newline at end of file
+
+def _locator_dict(locator: SimpleNamespace | CompiledLocator) -> dict:
+    """Locator as a dictionary for log messages."""
+    return locator.as_dict() if isinstance(locator, CompiledLocator) else getattr(locator, '__dict__', locator)
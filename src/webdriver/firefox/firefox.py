@@ -37,7 +37,9 @@ from header import __root__
 from src import gs
 from src.webdriver.executor import ExecuteLocator
 from src.webdriver.js import JavaScript
-from src.webdriver.proxy import get_proxies_dict, check_proxy
+from src.webdriver.blocking import BlockingProfile, apply_blocking
+from src.webdriver.proxy_pool import ProxyPool
+from src.webdriver.profiles import ProfileManager, random_user_agent
 from src.utils.jjson import j_loads_ns
 from src.logger.logger import logger
 
@@ -55,6 +57,9 @@ class Config:
     window_mode: str = _config.window_mode
     headers: Dict[str, Any] = vars(getattr(_config, 'headers', {})) if hasattr(_config, 'headers') else {}
     proxy_enabled: bool = getattr(_config, 'proxy_enabled', False)
+    page_load_strategy: Optional[str] = getattr(_config, 'page_load_strategy', None)
+    blocking: BlockingProfile = BlockingProfile.from_config(getattr(_config, 'blocking', None))
+    ephemeral_profile: bool = getattr(_config, 'ephemeral_profile', False)
 
 class Firefox(WebDriver):
     """
@@ -65,6 +70,7 @@ class Firefox(WebDriver):
         - Kiosk and other window modes.
         - User-agent customization.
         - Proxy settings.
+        - Resource blocking profile (`src.webdriver.blocking`).
 
     Args:
         profile_name: Name of the Firefox profile to use. Defaults to None.
@@ -74,6 +80,11 @@ class Firefox(WebDriver):
         proxy_file_path: Path to the proxy file. Defaults to None.
         options: List of Firefox options. Defaults to None.
         window_mode: Browser window mode (e.g., "windowless", "kiosk"). Defaults to None.
+        blocking: Resource blocking profile, overrides the `blocking` section of `firefox.json`. Defaults to None.
+        ephemeral_profile: Start with a disposable clone of the template profile (`src.webdriver.profiles`),
+            removed on `quit()`. Defaults to `ephemeral_profile` of `firefox.json`.
+        page_load_strategy: Page load strategy (`normal`, `eager`, `none`). Defaults to `page_load_strategy`
+            of `firefox.json` (`normal`). Use `eager` only where `src.webdriver.readiness` waits for the page.
 
     Raises:
         WebDriverException: If the WebDriver fails to start.
@@ -91,11 +102,15 @@ class Firefox(WebDriver):
         proxy_file_path: Optional[str] = None,
         options: Optional[List[str]] = None,
         window_mode: Optional[str] = None,
+        blocking: Optional[dict | BlockingProfile] = None,
+        ephemeral_profile: Optional[bool] = None,
+        page_load_strategy: Optional[str] = None,
         *args,
         **kwargs,
     ) -> None:
         """Initializes the Firefox WebDriver with custom settings."""
         logger.info("Starting Firefox WebDriver")
+        self.profile_clone: Optional[Path] = None
 
         service = Service(executable_path=Config.geckodriver_path)
         options_obj = Options()
@@ -123,9 +138,20 @@ class Firefox(WebDriver):
                 options_obj.add_argument(f"--{key}={value}")
 
         # Set user agent
-        user_agent = user_agent or UserAgent().random
+        user_agent = user_agent or random_user_agent("firefox") or UserAgent().random
         options_obj.set_preference("general.useragent.override", user_agent)
 
+        # Page load strategy: with `eager`, `get()` returns after DOMContentLoaded,
+        # further waiting is done by `src.webdriver.readiness`
+        page_load_strategy = page_load_strategy or Config.page_load_strategy
+        if page_load_strategy:
+            options_obj.page_load_strategy = page_load_strategy
+
+        # Resource blocking profile (images, fonts, media, trackers)
+        blocking_profile = BlockingProfile.from_config(blocking, base=Config.blocking)
+        for key, value in blocking_profile.firefox_prefs().items():
+            options_obj.set_preference(key, value)
+
         # Set proxy if enabled
         if Config.proxy_enabled:
             self.set_proxy(options_obj)
@@ -147,8 +173,18 @@ class Firefox(WebDriver):
         # profile = FirefoxProfile(profile_directory=profile_directory) #  <- @debug не грузится профиль
 
         try:
+            # Disposable clone of the template profile: instances never share a profile
+            if ephemeral_profile if ephemeral_profile is not None else Config.ephemeral_profile:
+                profiles = ProfileManager.for_browser(self.driver_name)
+                profiles.bake(source=Path(gs.path.src, Config.profile_directory_internal))
+                self.profile_clone = profiles.clone(profile_name)
+                options_obj.add_argument("-profile")
+                options_obj.add_argument(str(self.profile_clone))
+
             super().__init__(service=service, options=options_obj)
             self._payload()
+            if blocking_profile.enabled:
+                apply_blocking(self, blocking_profile, launch=True)
             logger.success(f"Browser started successfully, {window_mode=}")
         except WebDriverException as e:
             logger.critical(
@@ -162,25 +198,28 @@ class Firefox(WebDriver):
                 """,
                 e,
             )
+            self._report_proxy_failure()
+            self._release_profile_clone()
             sys.exit(1)
+        except OSError as e:
+            logger.critical("Error preparing the profile or starting Firefox WebDriver:", e)
+            self._release_profile_clone()
+            return
         except Exception as e:
             logger.critical("Firefox WebDriver error:", e)
+            self._report_proxy_failure()
+            self._release_profile_clone()
             return
 
     def set_proxy(self, options: Options) -> None:
-        """Configures proxy settings from a dictionary.
+        """Configures proxy settings with a proxy handed out by `ProxyPool`.
 
         Args:
             options: Firefox options to add proxy settings to.
         """
-        proxies_dict = get_proxies_dict()
-        all_proxies = proxies_dict.get("socks4", []) + proxies_dict.get("socks5", [])
-
-        working_proxy = None
-        for proxy in random.sample(all_proxies, len(all_proxies)):
-            if check_proxy(proxy):
-                working_proxy = proxy
-                break
+        # Best validated proxy of the pool; candidates are checked only when none is known
+        working_proxy = ProxyPool.default().get_proxy(protocols=("socks4", "socks5"))
+        self.proxy = working_proxy
 
         if working_proxy:
             proxy = working_proxy
@@ -211,6 +250,26 @@ class Firefox(WebDriver):
         else:
             logger.warning("No available proxies in the provided file.")
 
+    def _report_proxy_failure(self) -> None:
+        """Quarantines the proxy the browser failed to start with and saves the pool scores right away."""
+        if getattr(self, "proxy", None):
+            pool = ProxyPool.default()
+            pool.report(self.proxy, ok=False)
+            pool.save()
+
+    def quit(self) -> None:
+        """Quits the browser and removes the disposable profile clone."""
+        try:
+            super().quit()
+        finally:
+            self._release_profile_clone()
+
+    def _release_profile_clone(self) -> None:
+        """Removes the disposable profile clone."""
+        if self.profile_clone:
+            ProfileManager.for_browser(self.driver_name).release(self.profile_clone)
+            self.profile_clone = None
+
     def _payload(self) -> None:
         """Loads executors for locators and JavaScript scripts."""
         j = JavaScript(self)
@@ -225,6 +284,7 @@ class Firefox(WebDriver):
         self.get_webelement_as_screenshot = execute_locator.get_webelement_as_screenshot
         self.get_webelement_by_locator = execute_locator.get_webelement_by_locator
         self.get_attribute_by_locator = execute_locator.get_attribute_by_locator
+        self.get_attributes_by_locators = execute_locator.get_attributes_by_locators
         self.send_message = self.send_key_to_webelement = execute_locator.send_message
 
 
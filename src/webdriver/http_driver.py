@@ -0,0 +1,680 @@
+## \file /src/webdriver/http_driver.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.http_driver
+    :platform: Windows, Unix
+    :synopsis: Browserless driver: pages are fetched over HTTP and locators are evaluated against an lxml tree.
+
+Many suppliers render the product data on the server. For such pages a full browser navigation and
+one WebDriver round-trip per locator is wasted work. `HttpDriver` downloads the page with a pooled HTTP client
+(the user agent and headers of `chrome.json`, cookies of the browser session) and evaluates the same
+`locators/*.json` (`XPATH`/`CSS`/`ID`/..., `attribute`, `if_list`, `{attr1:attr2}` maps) with lxml.
+It exposes the part of the `Driver` interface the grabbers use (`get_url()`, `navigate()`, `current_url`,
+`page_source`, `execute_locator()`, `get_attribute_by_locator()`, ...), so `Graber` subclasses work unchanged.
+
+Events are not executed, except `screenshot()`, which downloads the image of the element instead.
+
+A supplier opts in per locator file with the top-level key ``"engine": "http"``:
+
+.. code-block:: json
+
+    {
+        "engine": "http",
+        "name": {"attribute": "innerText", "by": "XPATH", "selector": "//h1", ...}
+    }
+
+Example:
+    ```python
+    http = HttpDriver.from_driver(driver)          # user agent and cookies of the browser
+    await http.navigate(product_url)
+    graber = Graber(driver=http, lang_index=lang_index)
+    fields = await graber.grab_page_async()
+
+    async for page in http.fetch_many(urls, concurrency=20):
+        fields = await Graber(driver=page, lang_index=lang_index).grab_page_async()
+    ```
+"""
+
+import asyncio
+import re
+from http.cookies import Morsel
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urljoin, urlparse
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from yarl import URL
+from lxml import etree, html as lxml_html
+
+import header
+from src import gs
+from src.logger.logger import logger
+from src.utils.jjson import j_loads_ns
+from src.utils.printer import pprint as print
+from src.webdriver.locator import CompiledLocator, compile_locator
+from src.webdriver.session_store import SessionStore
+from src.webdriver.snapshot_archive import SnapshotArchive
+
+
+# Headers managed by the HTTP client itself
+_CLIENT_HEADERS: tuple = ('accept-encoding', 'connection', 'host', 'content-length')
+
+# Attributes that Selenium returns as absolute URLs (`element.get_attribute('href')` reads the property)
+_URL_ATTRIBUTES: tuple = ('href', 'src', 'action', 'poster', 'data')
+
+
+def uses_http_engine(locators: dict | SimpleNamespace | None) -> bool:
+    """`True` if a locator file opted in to the HTTP engine (`"engine": "http"`)."""
+    if isinstance(locators, SimpleNamespace):
+        locators = vars(locators)
+    return isinstance(locators, dict) and str(locators.get('engine', '')).lower() == 'http'
+
+
+# Elements rendered on their own line by `innerText`
+_BLOCK_TAGS: frozenset = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'tr', 'ul',
+))
+
+
+def _inner_text(element: etree._Element) -> str:
+    """Approximation of `HTMLElement.innerText`: whitespace is collapsed, block elements start new lines,
+    scripts and styles are skipped."""
+    chunks: List[str] = []
+
+    def walk(el: etree._Element) -> None:
+        tag = el.tag if isinstance(el.tag, str) else None
+        if tag is None or tag in ('script', 'style', 'noscript', 'template'):
+            return
+        block: bool = tag in _BLOCK_TAGS
+        if block or tag == 'br':
+            chunks.append('\n')
+        if el.text:
+            chunks.append(re.sub(r'\s+', ' ', el.text))
+        for child in el:
+            walk(child)
+            if child.tail:
+                chunks.append(re.sub(r'\s+', ' ', child.tail))
+        if block:
+            chunks.append('\n')
+
+    walk(element)
+    lines = (' '.join(line.split()) for line in ''.join(chunks).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+@lru_cache(maxsize=1024)
+def _xpath(selector: str) -> etree.XPath:
+    """Compiled XPath expression. Every selector is compiled once per process."""
+    return etree.XPath(selector)
+
+
+@lru_cache(maxsize=1024)
+def _css_xpath(selector: str) -> etree.XPath:
+    """CSS selector translated to a compiled XPath expression (`cssselect`)."""
+    from cssselect import HTMLTranslator
+
+    return etree.XPath(HTMLTranslator().css_to_xpath(selector))
+
+
+class LxmlExecuteLocator:
+    """Evaluates locators against the lxml tree of an `HttpPage` with the same result shapes as `ExecuteLocator`."""
+
+    def __init__(self, page: 'HttpPage') -> None:
+        self.page = page
+
+    async def execute_locator(
+        self,
+        locator: dict | SimpleNamespace | CompiledLocator,
+        timeout: Optional[float] = 0,
+        timeout_for_event: Optional[str] = 'presence_of_element_located',
+        message: Optional[str] = None,
+        typing_speed: Optional[float] = 0,
+    ) -> Optional[str | list | dict | bytes | bool]:
+        """
+        Executes a locator against the page.
+
+        Args:
+            locator: Locator data (dict, SimpleNamespace or CompiledLocator).
+            timeout: Not used, the page is already loaded.
+            timeout_for_event: Not used.
+            message: Not used, events are not executed.
+            typing_speed: Not used.
+
+        Returns:
+            The same value `ExecuteLocator.execute_locator()` returns for the locator, `bytes` of the image for
+            `screenshot()` events, `None` for other events and when nothing was found.
+        """
+        if isinstance(locator, dict):
+            locator = SimpleNamespace(**locator)
+
+        if not getattr(locator, 'attribute', None) and not getattr(locator, 'selector', None):
+            logger.debug('Empty locator provided.', None, False)
+            return None
+
+        try:
+            locator = compile_locator(locator)
+        except Exception as ex:
+            logger.error(f'Error compiling locator: {locator}', ex, False)
+            return None
+        if not isinstance(locator, CompiledLocator):
+            logger.debug('Paired locators are not supported by the HTTP engine.', None, False)
+            return None
+
+        if locator.event and locator.attribute and locator.mandatory is None:
+            return None
+
+        if locator.by == 'value':
+            return locator.attribute
+
+        if locator.by == 'url':
+            values = parse_qs(urlparse(self.page.current_url).query).get(locator.attribute)
+            return values[0] if values else None
+
+        if locator.event:
+            if any(event.strip().startswith('screenshot(') for event in locator.events):
+                return await self._download_image(locator)
+            logger.debug(f'Event `{locator.event}` is not executed by the HTTP engine.', None, False)
+            return None
+
+        if locator.attribute:
+            return await self.get_attribute_by_locator(locator)
+
+        return await self.get_webelement_by_locator(locator)
+
+    async def get_attribute_by_locator(
+        self,
+        locator: dict | SimpleNamespace | CompiledLocator,
+        timeout: Optional[float] = 0,
+        timeout_for_event: str = 'presence_of_element_located',
+        message: Optional[str] = None,
+        typing_speed: float = 0,
+    ) -> Optional[str | list | dict]:
+        """
+        Reads the attribute of the element(s) found by the locator.
+
+        Returns:
+            A string for one element, a list of strings for several, a dict (or list of dicts)
+            for `{attr1:attr2}` attributes, or `None` if nothing was found.
+        """
+        locator = compile_locator(SimpleNamespace(**locator) if isinstance(locator, dict) else locator)
+        elements = await self.get_webelement_by_locator(locator)
+        if elements is None:
+            if locator.mandatory:
+                logger.debug(f"Element not found: {print(locator.as_dict(), text_color='yellow')}")
+            return None
+
+        attr_dict: Optional[dict] = locator.attr_dict
+        if attr_dict is not None:
+            read_map = lambda el: {self._read(el, k): self._read(el, v) for k, v in attr_dict.items()}
+            return [read_map(el) for el in elements] if isinstance(elements, list) else read_map(elements)
+
+        if isinstance(elements, list):
+            values: list = [f'{self._read(el, locator.attribute)}' for el in elements]
+            return values if len(values) > 1 else values[0] if values else None
+        return self._read(elements, locator.attribute)
+
+    async def get_webelement_by_locator(
+        self,
+        locator: dict | SimpleNamespace | CompiledLocator,
+        timeout: Optional[float] = 0,
+        timeout_for_event: Optional[str] = 'presence_of_element_located',
+    ) -> Optional[Any | List[Any]]:
+        """
+        Finds the lxml element(s) of the locator and applies `if_list`.
+
+        Returns:
+            An element, a list of elements, or `None` if nothing was found.
+        """
+        locator = compile_locator(SimpleNamespace(**locator) if isinstance(locator, dict) else locator)
+        try:
+            elements: list = self._find(locator.by, locator.selector)
+        except Exception as ex:
+            logger.error(f"Error locating element: {print(locator.as_dict(), text_color='yellow')}", ex, False)
+            return None
+        if not elements:
+            return None
+        try:
+            return self._pick(elements, locator.if_list)
+        except IndexError:
+            return None
+
+    async def get_attributes_by_locators(
+        self,
+        locators: dict | SimpleNamespace,
+        fields: Optional[List[str]] = None,
+        fallback: bool = True,
+    ) -> dict:
+        """Resolves a whole locator dictionary. The tree is in memory, so locators are simply executed one by one."""
+        locators = vars(locators) if isinstance(locators, SimpleNamespace) else dict(locators or {})
+        result: dict = {}
+        for name in fields or list(locators.keys()):
+            locator = locators.get(name)
+            if isinstance(locator, (dict, SimpleNamespace, CompiledLocator)):
+                result[name] = await self.execute_locator(locator)
+        return result
+
+    async def get_webelement_as_screenshot(self, locator: dict | SimpleNamespace | CompiledLocator, *args, **kwargs) -> Optional[bytes]:
+        """Downloads the image of the element instead of taking a screenshot."""
+        return await self._download_image(compile_locator(SimpleNamespace(**locator) if isinstance(locator, dict) else locator))
+
+    async def send_message(self, *args, **kwargs) -> bool:
+        logger.debug('`send_message` is not supported by the HTTP engine.', None, False)
+        return False
+
+    def _find(self, by: str, selector: str) -> list:
+        tree = self.page.tree
+        if tree is None:
+            return []
+        if by == 'xpath':
+            found = _xpath(selector)(tree)
+            return found if isinstance(found, list) else [found]
+        if by == 'css selector':
+            return _css_xpath(selector)(tree)
+        if by == 'id':
+            return tree.xpath('//*[@id=$v]', v=selector)
+        if by == 'name':
+            return tree.xpath('//*[@name=$v]', v=selector)
+        if by == 'class name':
+            return tree.xpath("//*[contains(concat(' ', normalize-space(@class), ' '), $v)]", v=f' {selector} ')
+        if by == 'tag name':
+            return tree.xpath(f'//{selector}')
+        if by == 'link text':
+            return [a for a in tree.iter('a') if ' '.join(a.text_content().split()) == selector]
+        if by == 'partial link text':
+            return [a for a in tree.iter('a') if selector in a.text_content()]
+        logger.debug(f'Locator strategy `{by}` is not supported by the HTTP engine.', None, False)
+        return []
+
+    @staticmethod
+    def _pick(elements: list, if_list: Any) -> Any:
+        """`if_list` with the same semantics as `ExecuteLocator.get_webelement_by_locator()`."""
+        if if_list == 'all':
+            return elements
+        if if_list == 'first':
+            return elements[0]
+        if if_list == 'last':
+            return elements[-1]
+        if if_list == 'even':
+            return [elements[i] for i in range(0, len(elements), 2)]
+        if if_list == 'odd':
+            return [elements[i] for i in range(1, len(elements), 2)]
+        if isinstance(if_list, list):
+            return [elements[i] for i in if_list]
+        if isinstance(if_list, int):
+            return elements[if_list - 1]
+        return elements
+
+    def _read(self, element: Any, attribute: Optional[str]) -> Optional[str]:
+        """Reads an attribute the way `WebElement.get_attribute()` does (properties first)."""
+        if element is None:
+            return None
+        if isinstance(element, str):  # <- XPath `text()`/`@attr` results
+            return str(element)
+        if not isinstance(element, etree._Element):
+            return str(element)
+
+        if attribute == 'innerText':
+            return _inner_text(element)
+        if attribute == 'textContent':
+            return element.text_content()
+        if attribute == 'innerHTML':
+            inner: str = element.text or ''
+            return inner + ''.join(etree.tostring(child, encoding='unicode', method='html') for child in element)
+        if attribute == 'outerHTML':
+            return etree.tostring(element, encoding='unicode', method='html', with_tail=False)
+
+        value = element.get(attribute)
+        if value is not None and attribute in _URL_ATTRIBUTES:
+            return urljoin(self.page.current_url, value)
+        return value
+
+    async def _download_image(self, locator: CompiledLocator) -> Optional[bytes]:
+        elements = await self.get_webelement_by_locator(locator)
+        element = elements[0] if isinstance(elements, list) and elements else elements
+        src: Optional[str] = self._read(element, 'src') if element is not None else None
+        if not src:
+            return None
+        return await self.page.http.fetch_bytes(src)
+
+
+class HttpPage:
+    """A downloaded page: URL, HTML, lxml tree and the locator executor bound to them.
+
+    Attributes:
+        http (HttpDriver): Driver that downloaded the page (used for images of `screenshot()` events).
+        current_url (str): Final URL of the page (after redirects).
+        page_source (str): HTML of the page.
+        status (int): HTTP status.
+    """
+
+    def __init__(self, http: 'HttpDriver', url: str = '', page_source: str = '', status: int = 0) -> None:
+        self.http = http
+        self.current_url = url
+        self.page_source = page_source
+        self.status = status
+        self.tree = lxml_html.fromstring(page_source) if page_source else None
+
+        executor = LxmlExecuteLocator(self)
+        self.execute_locator = executor.execute_locator
+        self.get_attribute_by_locator = executor.get_attribute_by_locator
+        self.get_webelement_by_locator = executor.get_webelement_by_locator
+        self.get_attributes_by_locators = executor.get_attributes_by_locators
+        self.get_webelement_as_screenshot = executor.get_webelement_as_screenshot
+        self.send_message = self.send_key_to_webelement = executor.send_message
+
+    @property
+    def html_content(self) -> str:
+        return self.page_source
+
+    @property
+    def ready_state(self) -> str:
+        return 'complete'
+
+
+class HttpDriver:
+    """Driver backend that fetches pages over HTTP.
+
+    Sync navigation (`get_url()`) uses a pooled `requests.Session`, async navigation (`navigate()`,
+    `fetch_many()`) a pooled `aiohttp` session. Both send the same headers and cookies; a cookie is sent
+    only to its own domain and path, as the browser does.
+    Attributes of the current page (`current_url`, `page_source`, `execute_locator`, ...) are
+    available on the driver itself.
+
+    Args:
+        user_agent (Optional[str]): User agent. Defaults to the `User-Agent` of `chrome.json`.
+        headers (Optional[dict]): Extra headers.
+        cookies (Optional[List[dict]]): Cookies in the WebDriver format (`driver.get_cookies()`).
+            Defaults to the cookies of the saved session `session`, if there is one.
+        concurrency (int): Maximum simultaneous requests (size of the connection pools).
+        timeout (float): Request timeout (seconds).
+        snapshot_archive (Optional[SnapshotArchive]): Archive for the HTML of every page opened with `get_url()`/`navigate()`.
+        offline (bool): Do not access the network: `fetch()` returns `None`. Used to replay archived pages.
+        session (Optional[str | tuple]): Supplier prefix or `(prefix, profile)` of the saved session
+            (`SessionStore`) whose cookies are sent when `cookies` is not given.
+        session_store (Optional[SessionStore]): Session store. Defaults to `SessionStore()`.
+    """
+
+    driver_name: str = 'http'
+
+    def __init__(
+        self,
+        user_agent: Optional[str] = None,
+        headers: Optional[dict] = None,
+        cookies: Optional[List[dict]] = None,
+        concurrency: int = 20,
+        timeout: float = 30,
+        snapshot_archive: Optional[SnapshotArchive] = None,
+        offline: bool = False,
+        session: Optional[str | tuple] = None,
+        session_store: Optional[SessionStore] = None,
+    ) -> None:
+        config = j_loads_ns(Path(gs.path.src / 'webdriver' / 'chrome' / 'chrome.json'))
+        config_headers: dict = vars(config.headers) if getattr(config, 'headers', None) else {}
+
+        self.headers: Dict[str, str] = {
+            k: v for k, v in {**config_headers, **(headers or {})}.items() if k.lower() not in _CLIENT_HEADERS
+        }
+        if user_agent:
+            self.headers['User-Agent'] = user_agent
+        # Cookies without a domain would be sent to every host (image CDNs, third-party URLs of `screenshot()` events)
+        if cookies is None:
+            cookies = self._load_cookies(session, session_store) if session else []
+        self.cookies: List[dict] = [c for c in cookies if c.get('domain')]
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.previous_url: str = ''
+        self.snapshot_archive = snapshot_archive
+        self.offline = offline
+        self.page: HttpPage = HttpPage(self)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(self.headers)
+        for cookie in self.cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie['domain'],
+                path=cookie.get('path') or '/',
+                secure=bool(cookie.get('secure')),
+            )
+
+        self._client: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_driver(cls, driver, **kwargs) -> 'HttpDriver':
+        """Creates an `HttpDriver` with the user agent and cookies of a running browser.
+
+        Args:
+            driver: `Driver` or Selenium WebDriver.
+            **kwargs: Other arguments of `HttpDriver`.
+        """
+        try:
+            kwargs.setdefault('user_agent', driver.execute_script('return navigator.userAgent;'))
+            kwargs.setdefault('cookies', driver.get_cookies())
+        except Exception as ex:
+            logger.debug('Error reading user agent and cookies of the browser', ex, False)
+        return cls(**kwargs)
+
+    @staticmethod
+    def _load_cookies(session: str | tuple, session_store: Optional[SessionStore] = None) -> List[dict]:
+        """Unexpired cookies of a valid saved session, `[]` if there is none."""
+        supplier_prefix, profile = (session, 'default') if isinstance(session, str) else tuple(session)
+        saved: Optional[dict] = (session_store or SessionStore()).load(supplier_prefix, profile)
+        return saved['cookies'] if saved else []
+
+    def __getattr__(self, item: str):
+        """Attributes of the current page (`current_url`, `page_source`, `execute_locator`, ...)."""
+        if item == 'page':
+            raise AttributeError(item)
+        return getattr(self.page, item)
+
+    # --------------------------------------------------------------------------
+    #                  Navigation
+    # --------------------------------------------------------------------------
+
+    def get_url(self, url: str, *args, **kwargs) -> bool:
+        """Downloads `url` and makes it the current page (blocking).
+
+        Returns:
+            bool: `True` if the page was downloaded with a successful status.
+        """
+        if self.offline:
+            return False
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except Exception as ex:
+            logger.error(f'Ошибка при переходе по URL: {url}\n', ex, False)
+            return False
+        return self._set_page(HttpPage(self, str(response.url), response.text, response.status_code))
+
+    async def navigate(self, url: str, *args, **kwargs) -> bool:
+        """Downloads `url` and makes it the current page (async).
+
+        Returns:
+            bool: `True` if the page was downloaded with a successful status.
+        """
+        page: Optional[HttpPage] = await self.fetch(url)
+        if not page or not self._set_page(page, archive=False):
+            return False
+        if self.snapshot_archive:
+            # gzip, the object write and the index append must not block the loop
+            await asyncio.to_thread(self.snapshot_archive.put, page.current_url, page.page_source)
+        return True
+
+    def set_page_source(self, url: str, page_source: str) -> None:
+        """Makes `page_source` the current page without network access and archiving (replay of snapshots).
+
+        Args:
+            url (str): URL the page was loaded from.
+            page_source (str): HTML of the page.
+        """
+        self.previous_url = self.page.current_url
+        self.page = HttpPage(self, url, page_source, 200)
+
+    def fetch_html(self, url: str) -> bool:
+        """Same as `get_url()`; `html_content` holds the HTML of the page."""
+        return self.get_url(url)
+
+    def _set_page(self, page: HttpPage, archive: bool = True) -> bool:
+        if page.current_url != self.page.current_url:
+            self.previous_url = self.page.current_url
+        self.page = page
+        if page.status >= 400:
+            logger.error(f'HTTP {page.status}: {page.current_url}', None, False)
+            return False
+        if archive and self.snapshot_archive:
+            self.snapshot_archive.put(page.current_url, page.page_source)
+        return True
+
+    def _cookie_jar(self) -> aiohttp.CookieJar:
+        """`aiohttp` cookie jar of `cookies`: domain cookies (`.example.com`) match subdomains, host cookies - their host only."""
+        jar = aiohttp.CookieJar()
+        for cookie in self.cookies:
+            domain: str = cookie['domain']
+            morsel: Morsel = Morsel()
+            morsel.set(cookie['name'], cookie['value'], cookie['value'])
+            morsel['path'] = cookie.get('path') or '/'
+            if domain.startswith('.'):
+                morsel['domain'] = domain
+            if cookie.get('secure'):
+                morsel['secure'] = True
+            jar.update_cookies({cookie['name']: morsel}, response_url=URL(f'https://{domain.lstrip(".")}/'))
+        return jar
+
+    async def _get_client(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.closed or self._loop is not loop:  # <- `grab_page()` runs a new loop per call
+            stale: Optional[aiohttp.ClientSession] = self._client
+            self._loop = loop
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self._client = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                cookie_jar=self._cookie_jar(),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            if stale is not None and not stale.closed:
+                try:
+                    await stale.close()
+                except Exception as ex:  # <- its transports may belong to a closed loop
+                    logger.debug('Error closing the session of a previous event loop', ex, False)
+        return self._client
+
+    async def fetch(self, url: str) -> Optional[HttpPage]:
+        """Downloads `url` without changing the current page.
+
+        Returns:
+            Optional[HttpPage]: The page, or `None` on a network error.
+        """
+        if self.offline:
+            return None
+        client = await self._get_client()
+        try:
+            async with self._semaphore, client.get(url) as response:
+                text: str = await response.text(errors='replace')
+                return HttpPage(self, str(response.url), text, response.status)
+        except Exception as ex:
+            logger.error(f'Ошибка при переходе по URL: {url}\n', ex, False)
+            return None
+
+    async def fetch_bytes(self, url: str) -> Optional[bytes]:
+        """Downloads a binary resource (an image)."""
+        if self.offline:
+            return None
+        client = await self._get_client()
+        try:
+            async with self._semaphore, client.get(url) as response:
+                return await response.read() if response.status < 400 else None
+        except Exception as ex:
+            logger.error(f'Error downloading {url}', ex, False)
+            return None
+
+    async def fetch_many(self, urls: Iterable[str], concurrency: Optional[int] = None) -> AsyncIterator[HttpPage]:
+        """Downloads `urls` concurrently and yields the pages as they arrive (in completion order).
+
+        Pages with an error status are skipped.
+
+        Args:
+            urls (Iterable[str]): URLs to download.
+            concurrency (Optional[int]): Simultaneous downloads. Defaults to the pool size.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        urls = list(dict.fromkeys(urls))
+        limit = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def worker(url: str) -> None:
+            async with limit:
+                await queue.put(await self.fetch(url))
+
+        tasks = [asyncio.ensure_future(worker(url)) for url in urls]
+        try:
+            for _ in urls:
+                page: Optional[HttpPage] = await queue.get()
+                if page and page.status < 400:
+                    yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # --------------------------------------------------------------------------
+    #                  Lifecycle
+    # --------------------------------------------------------------------------
+
+    async def close_client(self) -> None:
+        """Closes the `aiohttp` session on the running loop; the next async request opens a new one.
+
+        Call it before the loop ends: a session of a closed loop cannot be closed.
+        """
+        client = self._client
+        self._client = self._loop = None
+        if client and not client.closed:
+            await client.close()
+
+    async def close(self) -> None:
+        """Closes the HTTP sessions."""
+        await self.close_client()
+        self.session.close()
+
+    def quit(self) -> None:
+        """Closes the HTTP sessions (same name as `WebDriver.quit()`).
+
+        The `aiohttp` session is closed on the loop it was created on. A session of a closed loop
+        (`asyncio.run()` returned without `close_client()`) cannot be closed and is only released.
+        """
+        client, loop = self._client, self._loop
+        self._client = self._loop = None
+        try:
+            if client and not client.closed:
+                try:
+                    running: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+                except RuntimeError:
+                    running = None
+                if running is not None and running is loop:
+                    running.create_task(client.close())
+                elif loop is not None and not loop.is_closed() and not loop.is_running():
+                    loop.run_until_complete(client.close())
+                else:
+                    logger.debug('HttpDriver: the event loop of the HTTP client is closed, the client is released', None, False)
+        except Exception as ex:
+            logger.debug('Error closing the HTTP client', ex, False)
+        self.session.close()
+
+    async def __aenter__(self) -> 'HttpDriver':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
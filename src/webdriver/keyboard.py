@@ -0,0 +1,209 @@
+## \file /src/webdriver/keyboard.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.keyboard
+    :platform: Windows, Unix
+    :synopsis: Batched keystroke dispatch for `ExecuteLocator.send_message()` and `type()` events.
+
+Typing letter by letter with one `ActionChains.perform()` (or `send_keys()`) per character costs a WebDriver
+round-trip per letter - seconds for a long chat prompt. `keystroke_schedule()` turns a message into a short
+list of steps (text runs, key chords such as `;` -> SHIFT+ENTER, pauses of `typing_speed`), and `type_text()`
+dispatches it:
+
+- `typing_speed == 0` on Chrome: CDP `Input.insertText` for every text run and `Input.dispatchKeyEvent`
+  for chords - one command per run instead of per letter;
+- otherwise: W3C action sequences of up to `chunk_size` keystrokes; pauses are part of the sequence and
+  are timed by the browser, so a chunk costs one round-trip.
+
+Example:
+    ```python
+    await type_text(driver, element, 'Hello;How are you?', typing_speed=0.05)
+    ```
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.keys import Keys
+
+import header
+from src.logger.logger import logger
+
+
+# Characters typed as key chords by `send_message()`
+DEFAULT_REPLACE: Dict[str, str] = {';': 'SHIFT+ENTER'}
+
+# CDP modifier bits
+_CDP_MODIFIERS: Dict[str, int] = {'ALT': 1, 'CONTROL': 2, 'CTRL': 2, 'META': 4, 'COMMAND': 4, 'SHIFT': 8}
+
+# CDP `Input.dispatchKeyEvent` parameters of named keys: key, code, windowsVirtualKeyCode, text
+_CDP_KEYS: Dict[str, Tuple[str, str, int, str]] = {
+    'ENTER': ('Enter', 'Enter', 13, '\r'),
+    'RETURN': ('Enter', 'Enter', 13, '\r'),
+    'TAB': ('Tab', 'Tab', 9, '\t'),
+    'BACKSPACE': ('Backspace', 'Backspace', 8, ''),
+    'ESCAPE': ('Escape', 'Escape', 27, ''),
+    'SPACE': (' ', 'Space', 32, ' '),
+}
+
+
+@dataclass(frozen=True)
+class Step:
+    """Step of a keystroke schedule.
+
+    Attributes:
+        kind (str): `text`, `chord` or `pause`.
+        text (str): Characters of a `text` step.
+        keys (Tuple[str, ...]): Key names of a `chord` step (`Keys` attributes), modifiers first.
+        seconds (float): Duration of a `pause` step.
+    """
+
+    kind: str
+    text: str = ''
+    keys: Tuple[str, ...] = ()
+    seconds: float = 0
+
+
+def keystroke_schedule(message: str, typing_speed: float = 0, replace: Optional[Dict[str, str]] = None) -> List[Step]:
+    """Builds the keystroke schedule of a message.
+
+    Args:
+        message (str): Text to type.
+        typing_speed (float): Pause after every character (seconds). `0` - consecutive characters form one text step.
+        replace (Optional[Dict[str, str]]): Characters typed as key chords, e.g. `{';': 'SHIFT+ENTER'}`.
+
+    Returns:
+        List[Step]: Schedule.
+    """
+    replace = replace or {}
+    steps: List[Step] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            steps.append(Step('text', text=''.join(run)))
+            run.clear()
+
+    for character in message:
+        if character in replace:
+            flush()
+            steps.append(Step('chord', keys=tuple(k.strip().upper() for k in replace[character].split('+'))))
+        elif typing_speed:
+            steps.append(Step('text', text=character))
+        else:
+            run.append(character)
+            continue
+        if typing_speed:
+            steps.append(Step('pause', seconds=typing_speed))
+    flush()
+    return steps
+
+
+def _keystrokes(step: Step) -> int:
+    return len(step.text) if step.kind == 'text' else len(step.keys) * 2 if step.kind == 'chord' else 1
+
+
+async def type_text(
+    driver,
+    element,
+    message: str,
+    typing_speed: float = 0,
+    replace: Optional[Dict[str, str]] = None,
+    chunk_size: int = 200,
+) -> bool:
+    """Focuses `element` and types `message` into it.
+
+    Args:
+        driver: WebDriver instance.
+        element: Web element to type into.
+        message (str): Text to type.
+        typing_speed (float): Pause after every character (seconds).
+        replace (Optional[Dict[str, str]]): Characters typed as key chords (see `keystroke_schedule()`).
+        chunk_size (int): Maximum keystrokes per W3C action sequence.
+
+    Returns:
+        bool: `True` if the message was typed.
+    """
+    steps: List[Step] = keystroke_schedule(message or '', typing_speed, replace)
+    try:
+        await asyncio.to_thread(driver.execute_script, 'arguments[0].focus();', element)
+        if not typing_speed and hasattr(driver, 'execute_cdp_cmd') and all(_cdp_chord(s) is not None for s in steps if s.kind == 'chord'):
+            await asyncio.to_thread(_dispatch_cdp, driver, steps)
+        else:
+            for chunk in _chunks(steps, chunk_size):
+                await asyncio.to_thread(_actions(driver, chunk).perform)
+        return True
+    except Exception as ex:
+        logger.error(f'Error typing message: {message[:50]!r}', ex, False)
+        return False
+
+
+def _chunks(steps: List[Step], chunk_size: int) -> List[List[Step]]:
+    """Splits the schedule into action sequences of up to `chunk_size` keystrokes (long text steps are split)."""
+    chunks: List[List[Step]] = [[]]
+    size: int = 0
+    for step in steps:
+        while step.kind == 'text' and size + len(step.text) > chunk_size:
+            head: str = step.text[:chunk_size - size]
+            if head:
+                chunks[-1].append(Step('text', text=head))
+            chunks.append([])
+            size = 0
+            step = Step('text', text=step.text[len(head):])
+        if step.kind == 'text' and not step.text:
+            continue
+        if size and size + _keystrokes(step) > chunk_size:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(step)
+        size += _keystrokes(step)
+    return [chunk for chunk in chunks if chunk]
+
+
+def _actions(driver, steps: List[Step]) -> ActionChains:
+    """W3C action sequence of the steps."""
+    actions = ActionChains(driver)
+    for step in steps:
+        if step.kind == 'text':
+            actions.send_keys(step.text)
+        elif step.kind == 'pause':
+            actions.pause(step.seconds)
+        else:
+            *modifiers, key = [getattr(Keys, k, k) for k in step.keys]
+            for modifier in modifiers:
+                actions.key_down(modifier)
+            actions.send_keys(key)
+            for modifier in reversed(modifiers):
+                actions.key_up(modifier)
+    return actions
+
+
+def _cdp_chord(step: Step) -> Optional[dict]:
+    """CDP `Input.dispatchKeyEvent` parameters of a chord, or `None` if the key is unknown."""
+    *modifiers, key = step.keys
+    if key not in _CDP_KEYS or any(m not in _CDP_MODIFIERS for m in modifiers):
+        return None
+    name, code, key_code, text = _CDP_KEYS[key]
+    return {
+        'modifiers': sum(_CDP_MODIFIERS[m] for m in set(modifiers)),
+        'key': name,
+        'code': code,
+        'windowsVirtualKeyCode': key_code,
+        'text': text,
+    }
+
+
+def _dispatch_cdp(driver, steps: List[Step]) -> None:
+    """Chrome: one CDP command per text run, a key down/up pair per chord."""
+    for step in steps:
+        if step.kind == 'text':
+            driver.execute_cdp_cmd('Input.insertText', {'text': step.text})
+        elif step.kind == 'chord':
+            params: dict = _cdp_chord(step)
+            text: str = params.pop('text')
+            driver.execute_cdp_cmd('Input.dispatchKeyEvent', {'type': 'keyDown', **params, 'text': text} if text else {'type': 'rawKeyDown', **params})
+            driver.execute_cdp_cmd('Input.dispatchKeyEvent', {'type': 'keyUp', **params})
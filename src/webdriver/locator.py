@@ -0,0 +1,250 @@
+## \file /src/webdriver/locator.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.locator
+    :platform: Windows, Unix
+    :synopsis: Locators compiled once into immutable objects for the fast path of `ExecuteLocator`.
+
+A locator from `locators/*.json` is a plain dictionary. Before every lookup `ExecuteLocator` used to lowercase `by`,
+resolve `%KEY%` placeholders to `Keys` constants, split the `event` chain and parse `{attr1:attr2}` attribute strings.
+`compile_locator()` does all of this once and returns a frozen `CompiledLocator`, which can be shared
+between calls (and `Graber` instances) without being mutated.
+
+Locators with lists in `by`/`selector` (paired locators) are not compiled and stay `SimpleNamespace`.
+
+Example:
+    ```python
+    from src.webdriver.locator import load_locators
+
+    locator = load_locators(gs.path.src / 'suppliers' / 'amazon' / 'locators' / 'product.json')
+    name = await driver.execute_locator(locator.name)
+    ```
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Optional, Tuple
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+import header
+from src.utils.jjson import j_loads
+from src.logger.logger import logger
+
+
+# `by` values from locator files resolved to `By` constants. `value` and `url` are not Selenium strategies
+# and are handled by `ExecuteLocator` itself.
+BY_CONSTANTS: dict = {
+    'xpath': By.XPATH,
+    'id': By.ID,
+    'name': By.NAME,
+    'css': By.CSS_SELECTOR,
+    'css_selector': By.CSS_SELECTOR,
+    'css selector': By.CSS_SELECTOR,
+    'class_name': By.CLASS_NAME,
+    'class name': By.CLASS_NAME,
+    'tag_name': By.TAG_NAME,
+    'tag name': By.TAG_NAME,
+    'link_text': By.LINK_TEXT,
+    'link text': By.LINK_TEXT,
+    'partial_link_text': By.PARTIAL_LINK_TEXT,
+    'partial link text': By.PARTIAL_LINK_TEXT,
+    'value': 'value',
+    'url': 'url',
+}
+
+_KEY_PLACEHOLDER = re.compile(r'^%(\w+)%')
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledLocator:
+    """
+    Immutable locator with all per-call parsing done in advance.
+
+    Attributes have the same names as the keys of a locator file, so a `CompiledLocator`
+    can be used wherever a `SimpleNamespace` locator is expected.
+
+    Attributes:
+        attribute: Attribute with `%KEY%` placeholders resolved to `Keys` constants.
+        by: `By` constant, `'value'` or `'url'`.
+        selector: Selector of the element.
+        if_list: Which of the found elements to return.
+        use_mouse: Use the mouse for the event.
+        mandatory: Locator is mandatory.
+        event: Event chain as written in the locator file.
+        events: Event chain split by `;`.
+        timeout: Timeout for locating the element (seconds).
+        timeout_for_event: Wait condition.
+        locator_description: Description of the locator.
+        attribute_map: Pairs parsed from an `{attr1:attr2}` attribute, `None` for a plain attribute.
+    """
+
+    attribute: Any = None
+    by: Optional[str] = None
+    selector: Optional[str] = None
+    if_list: Any = 'first'
+    use_mouse: bool = False
+    mandatory: Optional[bool] = None
+    event: Optional[str] = None
+    events: Tuple[str, ...] = ()
+    timeout: float = 0
+    timeout_for_event: str = 'presence_of_element_located'
+    locator_description: Optional[str] = None
+    attribute_map: Optional[Tuple[Tuple[str, str], ...]] = None
+
+    @property
+    def attr_dict(self) -> Optional[dict]:
+        """`attribute_map` as a dictionary."""
+        return dict(self.attribute_map) if self.attribute_map is not None else None
+
+    def as_dict(self) -> dict:
+        """Locator as a dictionary (for logging)."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def evaluate_attribute(attribute: Any) -> Any:
+    """Resolves `%KEY%` placeholders of an attribute to `Keys` constants.
+
+    Args:
+        attribute: Attribute to evaluate (a string or a list of strings).
+
+    Returns:
+        The evaluated attribute.
+    """
+
+    def _evaluate(attr: str) -> Optional[str]:
+        match = _KEY_PLACEHOLDER.match(attr)
+        return getattr(Keys, match.group(1), None) if match else attr
+
+    if isinstance(attribute, list):
+        return [_evaluate(attr) for attr in attribute]
+    return _evaluate(str(attribute))
+
+
+def parse_attribute_map(attr_string: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """Parses a string like `{attr1:attr2}` into pairs `(attr1, attr2)`."""
+    try:
+        return tuple(
+            (k.strip(), v.strip())
+            for k, v in (pair.split(':') for pair in attr_string.strip('{}').split(','))
+        )
+    except ValueError as ex:
+        logger.debug(f'Invalid attribute string format: {attr_string!r}', ex, False)
+        return None
+
+
+def compile_locator(locator: dict | SimpleNamespace | CompiledLocator) -> CompiledLocator | SimpleNamespace:
+    """Compiles a single locator.
+
+    Args:
+        locator: Locator data (dict, SimpleNamespace or an already compiled locator).
+
+    Returns:
+        `CompiledLocator`, or `SimpleNamespace` for paired locators (`by` is a list).
+    """
+    if isinstance(locator, CompiledLocator):
+        return locator
+
+    data: dict = vars(locator) if isinstance(locator, SimpleNamespace) else dict(locator)
+    by = data.get('by')
+    if not isinstance(by, str):
+        return SimpleNamespace(**data)
+
+    by = by.lower()
+    attribute = data.get('attribute')
+    attribute_map = None
+    if isinstance(attribute, str) and attribute.startswith('{'):
+        attribute_map = parse_attribute_map(attribute)
+    elif attribute:
+        attribute = evaluate_attribute(attribute)
+
+    event = data.get('event')
+    return CompiledLocator(
+        attribute=attribute,
+        by=BY_CONSTANTS.get(by, by),
+        selector=data.get('selector'),
+        if_list=data.get('if_list', 'first'),
+        use_mouse=data.get('use_mouse', False),
+        mandatory=data.get('mandatory'),
+        event=event,
+        events=tuple(str(event).split(';')) if event else (),
+        timeout=data.get('timeout') or 0,
+        timeout_for_event=data.get('timeout_for_event') or 'presence_of_element_located',
+        locator_description=data.get('locator_description'),
+        attribute_map=attribute_map,
+    )
+
+
+def compile_locators(locators: dict | SimpleNamespace) -> SimpleNamespace:
+    """Compiles every locator of a locator file.
+
+    Values that are not locators (comments, plain strings) are kept as is.
+
+    Args:
+        locators: Content of a locator file (dict or SimpleNamespace).
+
+    Returns:
+        SimpleNamespace: Locators keyed by field name.
+    """
+    items: dict = vars(locators) if isinstance(locators, SimpleNamespace) else dict(locators or {})
+    compiled: dict = {}
+    for name, locator in items.items():
+        if isinstance(locator, (dict, SimpleNamespace)):
+            try:
+                compiled[name] = compile_locator(locator)
+                continue
+            except Exception as ex:
+                logger.debug(f'Error compiling locator `{name}`', ex, False)
+        compiled[name] = locator
+    return SimpleNamespace(**compiled)
+
+
+@lru_cache(maxsize=None)
+def _load_compiled(path: str) -> dict:
+    return vars(compile_locators(j_loads(Path(path)) or {}))
+
+
+def load_locators(path: str | Path) -> SimpleNamespace:
+    """Loads and compiles a locator file. The file is read and compiled once per process.
+
+    Args:
+        path: Path to the locator file, e.g. `suppliers/<supplier_prefix>/locators/product.json`.
+
+    Returns:
+        SimpleNamespace: Compiled locators. The namespace itself is a new object on every call,
+        the compiled locators are shared.
+    """
+    return SimpleNamespace(**_load_compiled(str(path)))
+
+
+def resolve_locator(locators: SimpleNamespace | dict, path: str) -> Optional[CompiledLocator]:
+    """Resolves a locator by name, or by the dotted path of a nested locator (e.g. `price.new`).
+
+    Args:
+        locators: Locators keyed by field name (`load_locators()`).
+        path: Locator name or dotted path.
+
+    Returns:
+        `CompiledLocator`, or `None` if there is no such locator or it is not a single executable lookup:
+        a namespace of nested locators, a paired locator, a locator without `by` or `selector`.
+    """
+    node: Any = locators
+    for name in path.split('.'):
+        node = node.get(name) if isinstance(node, dict) else getattr(node, name, None)
+        if node is None:
+            return None
+    if isinstance(node, (dict, SimpleNamespace)):
+        try:
+            node = compile_locator(node)
+        except Exception as ex:
+            logger.debug(f'Error compiling locator `{path}`', ex, False)
+            return None
+    if not isinstance(node, CompiledLocator) or not node.by or not node.selector:
+        return None
+    return node
@@ -0,0 +1,391 @@
+## \file /src/webdriver/profiles.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.profiles
+    :platform: Windows, Unix
+    :synopsis: Ephemeral browser profiles cloned from a pre-baked template, cached user-agent pool, launch benchmark.
+
+Two browsers cannot share one `--user-data-dir`, and a browser started with the real OS profile pays for
+its caches, extensions and history on every cold start. `ProfileManager` keeps a pre-baked template profile
+(a copy of the configured profile without caches and lock files) and clones it for every browser instance:
+
+- clones are created in tmpfs (`/dev/shm`) when available, with a copy-on-write copy (`cp --reflink=auto`)
+  when the file system supports it, otherwise with a plain copy of the small template;
+- every clone records the pid of its owner. `gc()` removes clones of dead processes and clones older than
+  `max_age`; clones of the current process are removed at exit;
+- baking and cloning hold a thread lock and a file lock next to the template, so pool slots started
+  in threads (`DriverPool`) and in other processes never see a half-built or replaced template;
+- `user_agents()` loads the user-agent pool of `fake_useragent` once and caches it in memory and in
+  `gs.path.tmp/user_agents.json`, so launches do not parse the `fake_useragent` data every time.
+
+`Chrome`/`Firefox` use an ephemeral profile with `ephemeral_profile=True` (or `"ephemeral_profile": true`
+in `chrome.json`/`firefox.json`).
+
+Example:
+    ```python
+    manager = ProfileManager.for_browser('chrome')
+    manager.bake(source=Path('.../profiles/default'))     # once: the template
+    path = manager.clone()                                 # per instance, milliseconds
+    ...
+    manager.release(path)
+
+    stats = benchmark_launch(Chrome, runs=5, ephemeral_profile=True)
+    ```
+"""
+
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import header
+from src import gs
+from src.logger.logger import logger
+
+
+# Files and directories not copied into the template: caches, crash reports and locks of a running browser
+TEMPLATE_IGNORE: tuple = (
+    'Cache', 'Code Cache', 'GPUCache', 'ShaderCache', 'GrShaderCache', 'GraphiteDawnCache', 'DawnCache',
+    'CacheStorage', 'ScriptCache', 'Crashpad', 'Crash Reports', 'BrowserMetrics', 'component_crx_cache',
+    'SingletonLock', 'SingletonCookie', 'SingletonSocket', 'lockfile', 'parent.lock', '.parentlock',
+    'cache2', 'startupCache', 'thumbnails', 'minidumps', 'sessionstore-backups',
+)
+
+OWNER_FILE: str = '.owner.json'
+
+
+def _clones_root(browser: str) -> Path:
+    """tmpfs (`/dev/shm`) if available, otherwise the temporary directory of the OS."""
+    shm = Path('/dev/shm')
+    base = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+    return base / 'webdriver-profiles' / browser
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        return _pid_alive_windows(pid)  # <- `os.kill(pid, 0)` on Windows sends CTRL_C_EVENT
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # <- exists but belongs to another user
+    except OSError:
+        return False
+    return True
+
+
+def _pid_alive_windows(pid: int) -> bool:
+    """`OpenProcess` + `GetExitCodeProcess`: the process exists and has not exited."""
+    import ctypes
+    from ctypes import wintypes
+
+    PROCESS_QUERY_LIMITED_INFORMATION, STILL_ACTIVE, ERROR_ACCESS_DENIED = 0x1000, 259, 5
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED  # <- exists but belongs to a protected process
+    try:
+        exit_code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock between processes (`flock`/`msvcrt.locking` on `path`), released by the OS if the holder dies."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as lockfile:
+        if os.name == 'nt':
+            import msvcrt
+
+            while True:
+                lockfile.seek(0)
+                try:
+                    msvcrt.locking(lockfile.fileno(), msvcrt.LK_LOCK, 1)  # <- retries for 10 s, then raises
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                lockfile.seek(0)
+                msvcrt.locking(lockfile.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+
+
+class ProfileManager:
+    """Template profile and its ephemeral clones for one browser.
+
+    Args:
+        browser (str): Browser name (`chrome`, `firefox`).
+        template (Optional[Path]): Template profile directory. Defaults to `gs.path.data/profiles/<browser>/template`.
+        root (Optional[Path]): Directory of clones. Defaults to `/dev/shm/webdriver-profiles/<browser>`
+            (or the temporary directory of the OS).
+        max_age (float): Clones older than this (seconds) are removed by `gc()` even if the owner is alive.
+    """
+
+    _managers: Dict[str, 'ProfileManager'] = {}
+    _managers_lock: threading.Lock = threading.Lock()
+
+    def __init__(
+        self,
+        browser: str,
+        template: Optional[Path] = None,
+        root: Optional[Path] = None,
+        max_age: float = 24 * 3600,
+    ) -> None:
+        self.browser = browser
+        self.template = Path(template) if template else Path(gs.path.data) / 'profiles' / browser / 'template'
+        self.root = Path(root) if root else _clones_root(browser)
+        self.max_age = max_age
+        self._own: set = set()
+        self._reflink: Optional[bool] = None if platform.system() == 'Linux' and shutil.which('cp') else False
+        self._lock = threading.Lock()
+        atexit.register(self._release_own)
+
+    @classmethod
+    def for_browser(cls, browser: str) -> 'ProfileManager':
+        """Shared manager of the browser. The first call removes stale clones of previous runs."""
+        with cls._managers_lock:
+            if browser not in cls._managers:
+                manager = cls(browser)
+                manager.gc()
+                cls._managers[browser] = manager
+            return cls._managers[browser]
+
+    @contextmanager
+    def _template_lock(self) -> Iterator[None]:
+        """Template lock of the threads of this process and of other processes."""
+        with self._lock, _file_lock(self.template.with_name(f'{self.template.name}.lock')):
+            yield
+
+    # --------------------------------------------------------------------------
+    #                  Template
+    # --------------------------------------------------------------------------
+
+    def bake(self, source: Optional[Path] = None, force: bool = False) -> Path:
+        """Creates the template profile.
+
+        Args:
+            source (Optional[Path]): Profile to copy (without caches and lock files).
+                `None` or a missing directory - an empty profile.
+            force (bool): Re-create an existing template. Without it an existing template is never touched.
+
+        Returns:
+            Path: Template directory.
+        """
+        with self._template_lock():
+            return self._bake(source, force)
+
+    def _bake(self, source: Optional[Path], force: bool) -> Path:
+        """`bake()` under the template lock."""
+        if self.template.exists() and not force:
+            return self.template
+        tmp = self.template.with_name(f'{self.template.name}.{os.getpid()}.{threading.get_ident()}.{uuid.uuid4().hex[:8]}.tmp')
+        try:
+            if source and Path(source).is_dir():
+                shutil.copytree(source, tmp, ignore=shutil.ignore_patterns(*TEMPLATE_IGNORE), symlinks=True)
+            else:
+                tmp.mkdir(parents=True)
+            if self.browser == 'chrome':
+                (tmp / 'First Run').touch()  # <- no first-run UI in clones
+            if self.template.exists():
+                # `force`: the old template is moved aside first, so the template directory is never half-removed
+                old = tmp.with_suffix('.old')
+                self.template.rename(old)
+                tmp.rename(self.template)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                tmp.rename(self.template)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        logger.info(f'Profile template baked: {self.template} (from {source or "empty profile"})')
+        return self.template
+
+    # --------------------------------------------------------------------------
+    #                  Clones
+    # --------------------------------------------------------------------------
+
+    def clone(self, name: Optional[str] = None) -> Path:
+        """Clones the template into a new profile directory.
+
+        Args:
+            name (Optional[str]): Prefix of the clone name (e.g. the pool slot). A unique suffix is always added.
+
+        Returns:
+            Path: Profile directory for `--user-data-dir` / `-profile`.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        path: Path = self.root / f'{name or self.browser}-{uuid.uuid4().hex[:8]}'
+        with self._template_lock():
+            if not self.template.exists():
+                self._bake(None, False)
+            self._copy(self.template, path)
+        (path / OWNER_FILE).write_text(json.dumps({'pid': os.getpid(), 'created': time.time()}), encoding='utf-8')
+        self._own.add(path)
+        return path
+
+    def _copy(self, source: Path, target: Path) -> None:
+        if self._reflink is not False:
+            result = subprocess.run(
+                ['cp', '-a', '--reflink=auto', str(source), str(target)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            if result.returncode == 0:
+                self._reflink = True
+                return
+            self._reflink = False
+            shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(source, target, symlinks=True)
+
+    def release(self, path: Optional[Path]) -> None:
+        """Removes a clone (after the browser quit)."""
+        if not path:
+            return
+        path = Path(path)
+        self._own.discard(path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def gc(self) -> int:
+        """Removes clones of dead processes and clones older than `max_age`.
+
+        Returns:
+            int: Number of removed clones.
+        """
+        if not self.root.exists():
+            return 0
+        removed: int = 0
+        now: float = time.time()
+        for path in self.root.iterdir():
+            if not path.is_dir() or path in self._own:
+                continue
+            try:
+                owner: dict = json.loads((path / OWNER_FILE).read_text(encoding='utf-8'))
+            except Exception:
+                owner = {'pid': -1, 'created': path.stat().st_mtime}
+            if not _pid_alive(owner.get('pid', -1)) or now - owner.get('created', 0) > self.max_age:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.debug(f'Removed {removed} stale {self.browser} profile clones', None, False)
+        return removed
+
+    def _release_own(self) -> None:
+        for path in list(self._own):
+            self.release(path)
+
+
+# --------------------------------------------------------------------------
+#                  User agents
+# --------------------------------------------------------------------------
+
+def _user_agents_path() -> Path:
+    return Path(gs.path.tmp) / 'user_agents.json'
+
+
+@lru_cache(maxsize=None)
+def user_agents(browser: str = 'chrome', size: int = 200, max_age: float = 7 * 24 * 3600) -> tuple:
+    """User-agent pool of the browser, loaded from `fake_useragent` once.
+
+    The pool is cached in memory and in `gs.path.tmp/user_agents.json` for `max_age` seconds.
+
+    Returns:
+        tuple: User-agent strings. Empty if `fake_useragent` has no data.
+    """
+    path: Path = _user_agents_path()
+    cached: dict = {}
+    try:
+        if path.exists():
+            cached = json.loads(path.read_text(encoding='utf-8'))
+            entry: dict = cached.get(browser, {})
+            if entry.get('agents') and time.time() - entry.get('saved', 0) < max_age:
+                return tuple(entry['agents'])
+    except Exception as ex:
+        logger.debug('Error loading cached user agents', ex, False)
+
+    try:
+        from fake_useragent import UserAgent
+
+        ua = UserAgent(browsers=[browser])
+        agents: List[str] = sorted({ua.random for _ in range(size * 3)})[:size]
+    except Exception as ex:
+        logger.debug(f'Error loading user agents of {browser}', ex, False)
+        return ()
+
+    try:
+        cached[browser] = {'saved': time.time(), 'agents': agents}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(cached), encoding='utf-8')
+    except Exception as ex:
+        logger.debug('Error saving cached user agents', ex, False)
+    return tuple(agents)
+
+
+def random_user_agent(browser: str = 'chrome') -> Optional[str]:
+    """Random user agent from the cached pool of the browser."""
+    agents: tuple = user_agents(browser)
+    return random.choice(agents) if agents else None
+
+
+# --------------------------------------------------------------------------
+#                  Benchmark
+# --------------------------------------------------------------------------
+
+def benchmark_launch(webdriver_cls, runs: int = 3, url: str = 'about:blank', **kwargs) -> dict:
+    """Measures launch-to-first-navigation latency of a browser.
+
+    Args:
+        webdriver_cls: Browser class (`Chrome`, `Firefox`).
+        runs (int): Number of launches.
+        url (str): URL of the first navigation.
+        **kwargs: Arguments of the browser class (e.g. `ephemeral_profile=True`, `window_mode='headless'`).
+
+    Returns:
+        dict: `{'launch': [...], 'first_navigation': [...], 'total': [...], 'median_total': float}` in seconds.
+    """
+    from src.webdriver.driver import Driver
+
+    stats: dict = {'launch': [], 'first_navigation': [], 'total': []}
+    for _ in range(runs):
+        start: float = time.perf_counter()
+        driver = Driver(webdriver_cls, **kwargs)
+        launched: float = time.perf_counter()
+        try:
+            driver.get_url(url, until='domcontentloaded')
+            navigated: float = time.perf_counter()
+        finally:
+            driver.quit()
+        stats['launch'].append(launched - start)
+        stats['first_navigation'].append(navigated - launched)
+        stats['total'].append(navigated - start)
+    stats['median_total'] = statistics.median(stats['total'])
+    logger.info(f'{getattr(webdriver_cls, "driver_name", webdriver_cls)} launch to first navigation: median {stats["median_total"]:.2f} s ({runs} runs, {kwargs})')
+    return stats
@@ -16,13 +16,16 @@
 .. code-block:: python
 
     download_proxies_list()
-    proxies = parse_proxies()
+    proxies = get_proxies_dict()
+
+Проверка прокси и выбор рабочего - `src.webdriver.proxy_pool.ProxyPool`.
 
 """
 
 
 
 import re
+import time
 import requests
 from requests.exceptions import ProxyError, RequestException
 from pathlib import Path
@@ -66,15 +69,18 @@ def download_proxies_list(url: str = url, save_path: Path = proxies_list_path) -
         return False
 
 
-def get_proxies_dict(file_path: Path = proxies_list_path) -> Dict[str, List[Dict[str, Any]]]:
+def get_proxies_dict(file_path: Path = proxies_list_path, max_age: float = 24 * 3600) -> Dict[str, List[Dict[str, Any]]]:
     """
     Парсит файл с прокси-адресами и распределяет их по категориям.
 
     :param file_path: Путь к файлу с прокси.
+    :param max_age: Файл загружается заново, только если его нет или он старше `max_age` секунд.
     :return: Словарь с распределёнными по типам прокси.
     """
 
-    download_proxies_list()
+    file_path = Path(file_path)
+    if not file_path.exists() or time.time() - file_path.stat().st_mtime > max_age:
+        download_proxies_list(save_path=file_path)
 
     proxies: Dict[str, List[Dict[str, Any]]] = {
         'http': [],
@@ -124,5 +130,5 @@ def check_proxy(proxy: dict) -> bool:
 if __name__ == '__main__':
     # Загрузка списка прокси и парсинг
     if download_proxies_list():
-        parsed_proxies = parse_proxies()
+        parsed_proxies = get_proxies_dict()
         logger.info(f'Обработано {sum(len(v) for v in parsed_proxies.values())} прокси.')
@@ -0,0 +1,493 @@
+## \file /src/webdriver/proxy_pool.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+Пул прокси с асинхронной проверкой и сохраняемой оценкой
+=========================================================================================
+
+`ProxyPool` заменяет последовательный перебор `check_proxy()` при запуске браузера:
+
+- список `proxies.txt` разбирается один раз (на каждое изменение файла) в компактный индекс `ProxyIndex`;
+- кандидаты проверяются конкурентно (`asyncio`), число одновременных соединений ограничено `concurrency`.
+  Проверка сама выполняет рукопожатие HTTP CONNECT / SOCKS4a / SOCKS5 и запрос к `check_url`;
+- для каждого прокси хранится оценка: экспоненциальное среднее успеха и задержки, которая со временем
+  затухает к нейтральному значению. Оценки сохраняются в `gs.path.tmp/proxy_scores.json`
+  и переживают перезапуск;
+- `get_proxy()` выдает лучшие прокси по кругу, прокси с ошибками уходят на карантин
+  с растущим временем.
+
+Если в пуле есть недавно проверенные прокси, `get_proxy()` возвращает прокси без сетевых запросов.
+
+Пример использования
+--------------------
+
+.. code-block:: python
+
+    pool = ProxyPool.default()
+    proxy = pool.get_proxy(protocols=('socks4', 'socks5'))   # {'protocol': 'socks5', 'host': ..., 'port': ...}
+    ...
+    pool.report(proxy, ok=False)                              # прокси не сработал - на карантин
+
+    working = await pool.validate(limit=500)                  # фоновая проверка кандидатов
+"""
+
+import asyncio
+import ipaddress
+import json
+import math
+import random
+import re
+import ssl
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import header
+from src import gs
+from src.logger.logger import logger
+from src.webdriver.proxy import download_proxies_list, proxies_list_path
+
+
+PROTOCOLS: Tuple[str, ...] = ('http', 'socks4', 'socks5')
+
+_PROXY_LINE = re.compile(r'^(http|socks4|socks5)://([\d\.]+):(\d+)')
+
+# Ошибки браузера, вызванные прокси (Chrome `net::ERR_*`, страницы ошибок Firefox `about:neterror?e=...`)
+_PROXY_ERROR = re.compile(r'ERR_PROXY_|ERR_TUNNEL_CONNECTION_FAILED|ERR_SOCKS_CONNECTION_FAILED|proxyConnectFailure|proxyResolveFailure')
+
+
+class ProxyIndex:
+    """Компактный индекс списка прокси: адреса, порты и протоколы хранятся в массивах `array`.
+
+    17 тыс. прокси занимают ~120 KB вместо ~17 тыс. словарей.
+    """
+
+    def __init__(self) -> None:
+        self.hosts: array = array('L')
+        self.ports: array = array('H')
+        self.protocols: bytearray = bytearray()
+
+    @classmethod
+    def parse(cls, lines: Iterable[str]) -> 'ProxyIndex':
+        index = cls()
+        seen: set = set()
+        for line in lines:
+            match = _PROXY_LINE.match(line.strip())
+            if not match:
+                continue
+            protocol, host, port = match.groups()
+            try:
+                key = (PROTOCOLS.index(protocol), int(ipaddress.IPv4Address(host)), int(port))
+            except ValueError:
+                continue
+            if key in seen:
+                continue
+            seen.add(key)
+            index.protocols.append(key[0])
+            index.hosts.append(key[1])
+            index.ports.append(key[2])
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ports)
+
+    def key(self, i: int) -> str:
+        """Ключ прокси `protocol://host:port`."""
+        return f'{PROTOCOLS[self.protocols[i]]}://{ipaddress.IPv4Address(self.hosts[i])}:{self.ports[i]}'
+
+    def keys(self, protocols: Iterable[str] = PROTOCOLS) -> List[str]:
+        codes = {PROTOCOLS.index(p) for p in protocols}
+        return [self.key(i) for i in range(len(self)) if self.protocols[i] in codes]
+
+
+@lru_cache(maxsize=4)
+def _load_index(path: str, mtime: float) -> ProxyIndex:
+    with open(path, 'r', encoding='utf-8') as file:
+        return ProxyIndex.parse(file)
+
+
+def load_index(path: Path = proxies_list_path, max_age: float = 24 * 3600) -> ProxyIndex:
+    """Возвращает индекс списка прокси. Файл скачивается, только если его нет или он старше `max_age` секунд,
+    и разбирается один раз на каждую версию файла.
+    """
+    path = Path(path)
+    if not path.exists() or time.time() - path.stat().st_mtime > max_age:
+        download_proxies_list(save_path=path)
+    if not path.exists():
+        return ProxyIndex()
+    return _load_index(str(path), path.stat().st_mtime)
+
+
+def parse_key(key: str) -> Dict[str, str]:
+    """`socks5://1.2.3.4:1080` -> `{'protocol': 'socks5', 'host': '1.2.3.4', 'port': '1080'}` (формат `get_proxies_dict()`)."""
+    parsed = urlparse(key)
+    return {'protocol': parsed.scheme, 'host': parsed.hostname, 'port': str(parsed.port)}
+
+
+def proxy_key(proxy: Dict | str) -> str:
+    return proxy if isinstance(proxy, str) else f"{proxy['protocol']}://{proxy['host']}:{proxy['port']}"
+
+
+@dataclass
+class ProxyScore:
+    """Оценка прокси.
+
+    Attributes:
+        success (float): Экспоненциальное среднее успешных проверок (0..1).
+        latency (float): Экспоненциальное среднее задержки (секунды).
+        checked (float): Время последней проверки (`time.time()`).
+        fails (int): Ошибок подряд.
+        quarantine_until (float): До этого времени прокси не выдается.
+    """
+
+    success: float = 0.5
+    latency: float = 5.0
+    checked: float = 0.0
+    fails: int = 0
+    quarantine_until: float = 0.0
+
+    def value(self, now: float, half_life: float) -> float:
+        """Оценка с учетом давности: успех затухает к 0.5 с периодом полураспада `half_life`."""
+        decay: float = 0.5 ** ((now - self.checked) / half_life) if self.checked else 0.0
+        success: float = 0.5 + (self.success - 0.5) * decay
+        return success / (1.0 + self.latency)
+
+
+class ProxyPool:
+    """Пул прокси.
+
+    Args:
+        path (Path): Файл списка прокси.
+        scores_path (Optional[Path]): Файл оценок. По умолчанию `gs.path.tmp/proxy_scores.json`.
+        check_url (str): URL проверки. Ответ `200` через прокси - успех.
+        timeout (float): Таймаут одной проверки (секунды).
+        concurrency (int): Максимум одновременных проверок (соединений).
+        alpha (float): Вес новой проверки в экспоненциальном среднем.
+        half_life (float): Период полураспада оценки (секунды).
+        fresh (float): Проверка младше `fresh` секунд считается актуальной - прокси выдается без повторной проверки.
+        quarantine (float): Базовое время карантина (секунды), растет квадратично с числом ошибок подряд.
+    """
+
+    _default: Optional['ProxyPool'] = None
+
+    def __init__(
+        self,
+        path: Path = proxies_list_path,
+        scores_path: Optional[Path] = None,
+        check_url: str = 'https://httpbin.org/ip',
+        timeout: float = 5,
+        concurrency: int = 200,
+        alpha: float = 0.3,
+        half_life: float = 6 * 3600,
+        fresh: float = 1800,
+        quarantine: float = 60,
+    ) -> None:
+        self.path = Path(path)
+        self.scores_path = Path(scores_path or Path(gs.path.tmp) / 'proxy_scores.json')
+        self.check_url = check_url
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.alpha = alpha
+        self.half_life = half_life
+        self.fresh = fresh
+        self.quarantine = quarantine
+        self.scores: Dict[str, ProxyScore] = self._load_scores()
+        self._rotation: int = 0
+        self._saved_at: float = time.time()
+
+    @classmethod
+    def default(cls) -> 'ProxyPool':
+        """Общий пул процесса."""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    # --------------------------------------------------------------------------
+    #                  Оценки
+    # --------------------------------------------------------------------------
+
+    def _load_scores(self) -> Dict[str, ProxyScore]:
+        if not self.scores_path.exists():
+            return {}
+        try:
+            data: dict = json.loads(self.scores_path.read_text(encoding='utf-8'))
+            return {key: ProxyScore(**value) for key, value in data.items()}
+        except Exception as ex:
+            logger.debug('Ошибка загрузки оценок прокси', ex, False)
+            return {}
+
+    def save(self) -> None:
+        """Сохраняет оценки. Оценки, затухшие до нейтральных и без карантина, не сохраняются."""
+        now: float = time.time()
+        data: dict = {
+            key: asdict(score) for key, score in self.scores.items()
+            if now - score.checked < 4 * self.half_life or score.quarantine_until > now
+        }
+        try:
+            self.scores_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp: Path = self.scores_path.with_suffix('.tmp')
+            tmp.write_text(json.dumps(data), encoding='utf-8')
+            tmp.replace(self.scores_path)
+            self._saved_at = now
+        except Exception as ex:
+            logger.debug('Ошибка сохранения оценок прокси', ex, False)
+
+    def report(self, proxy: Dict | str, ok: bool, latency: Optional[float] = None) -> None:
+        """Учитывает результат использования или проверки прокси.
+
+        Args:
+            proxy (Dict | str): Прокси (словарь `get_proxies_dict()` или ключ `protocol://host:port`).
+            ok (bool): Прокси сработал.
+            latency (Optional[float]): Задержка (секунды). Для ошибки - таймаут проверки.
+        """
+        key: str = proxy_key(proxy)
+        now: float = time.time()
+        score: ProxyScore = self.scores.setdefault(key, ProxyScore())
+        score.success = (1 - self.alpha) * score.success + self.alpha * (1.0 if ok else 0.0)
+        score.latency = (1 - self.alpha) * score.latency + self.alpha * (latency if latency is not None else self.timeout)
+        score.checked = now
+        if ok:
+            score.fails = 0
+            score.quarantine_until = 0.0
+        else:
+            score.fails += 1
+            score.quarantine_until = now + self.quarantine * score.fails ** 2
+        if now - self._saved_at > 30:
+            self.save()
+
+    def report_error(self, proxy: Optional[Dict | str], ex: BaseException) -> bool:
+        """Отправляет прокси на карантин, если ошибка браузера вызвана прокси.
+
+        Returns:
+            bool: Ошибка вызвана прокси.
+        """
+        if not proxy or not _PROXY_ERROR.search(str(ex)):
+            return False
+        logger.warning(f'Прокси {proxy_key(proxy)} не работает: на карантин')
+        self.report(proxy, ok=False)
+        return True
+
+    def ranked(self, protocols: Iterable[str] = PROTOCOLS, fresh_only: bool = False) -> List[str]:
+        """Прокси с оценками, лучшие первыми. Прокси на карантине не включаются."""
+        now: float = time.time()
+        prefixes: tuple = tuple(f'{p}://' for p in protocols)
+        candidates = [
+            (score.value(now, self.half_life), key) for key, score in self.scores.items()
+            if key.startswith(prefixes)
+            and score.quarantine_until <= now
+            and score.fails == 0
+            and (not fresh_only or now - score.checked < self.fresh)
+        ]
+        return [key for _, key in sorted(candidates, reverse=True)]
+
+    # --------------------------------------------------------------------------
+    #                  Выдача
+    # --------------------------------------------------------------------------
+
+    def best(self, protocols: Iterable[str] = PROTOCOLS, top: int = 10) -> Optional[Dict[str, str]]:
+        """Выдает один из `top` лучших актуальных прокси по кругу, без сетевых запросов."""
+        ranked: List[str] = self.ranked(protocols, fresh_only=True)[:top]
+        if not ranked:
+            return None
+        self._rotation += 1
+        return parse_key(ranked[self._rotation % len(ranked)])
+
+    async def get_proxy_async(self, protocols: Iterable[str] = PROTOCOLS, top: int = 10) -> Optional[Dict[str, str]]:
+        """Выдает рабочий прокси. Если актуальных проверенных прокси нет - проверяет кандидатов до первого успеха.
+
+        Returns:
+            Optional[Dict[str, str]]: Прокси `{'protocol', 'host', 'port'}` или `None`.
+        """
+        protocols = tuple(protocols)
+        proxy = self.best(protocols, top)
+        if proxy:
+            return proxy
+        await self.validate(protocols=protocols, stop_after=top)
+        return self.best(protocols, top)
+
+    def get_proxy(self, protocols: Iterable[str] = PROTOCOLS, top: int = 10) -> Optional[Dict[str, str]]:
+        """Синхронная версия `get_proxy_async()`. В работающем цикле событий выдает только уже проверенные прокси."""
+        try:
+            asyncio.get_running_loop()
+            return self.best(tuple(protocols), top)
+        except RuntimeError:
+            return asyncio.run(self.get_proxy_async(protocols, top))
+
+    # --------------------------------------------------------------------------
+    #                  Проверка
+    # --------------------------------------------------------------------------
+
+    def candidates(self, protocols: Iterable[str] = PROTOCOLS, limit: Optional[int] = None) -> List[str]:
+        """Кандидаты для проверки: сначала известные хорошие, затем непроверенные в случайном порядке.
+        Прокси на карантине пропускаются.
+        """
+        protocols = tuple(protocols)
+        now: float = time.time()
+        known: List[str] = self.ranked(protocols)
+        known_set: set = set(known)
+        unknown: List[str] = [
+            key for key in load_index(self.path).keys(protocols)
+            if key not in known_set and (key not in self.scores or self.scores[key].quarantine_until <= now)
+        ]
+        random.shuffle(unknown)
+        candidates: List[str] = known + unknown
+        return candidates[:limit] if limit else candidates
+
+    async def validate(
+        self,
+        candidates: Optional[Iterable[str]] = None,
+        protocols: Iterable[str] = PROTOCOLS,
+        limit: Optional[int] = None,
+        stop_after: Optional[int] = None,
+    ) -> List[str]:
+        """Проверяет прокси конкурентно и обновляет оценки.
+
+        Args:
+            candidates (Optional[Iterable[str]]): Ключи прокси. По умолчанию - `self.candidates()`.
+            protocols (Iterable[str]): Протоколы кандидатов по умолчанию.
+            limit (Optional[int]): Максимум проверяемых кандидатов.
+            stop_after (Optional[int]): Остановиться после стольких рабочих прокси (незавершенные проверки отменяются).
+
+        Returns:
+            List[str]: Рабочие прокси в порядке завершения проверки.
+        """
+        keys: List[str] = list(candidates) if candidates is not None else self.candidates(protocols, limit)
+        working: List[str] = []
+        checked: List[str] = []
+        if not keys:
+            return working
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for key in keys:
+            queue.put_nowait(key)
+        done = asyncio.Event()
+
+        async def worker() -> None:
+            while not done.is_set():
+                try:
+                    key: str = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                ok, latency = await self.check(key)
+                self.report(key, ok, latency)
+                checked.append(key)
+                if ok:
+                    working.append(key)
+                    if stop_after and len(working) >= stop_after:
+                        done.set()
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.concurrency, len(keys)))]
+        try:
+            await asyncio.wait(
+                [asyncio.ensure_future(done.wait()), asyncio.ensure_future(asyncio.gather(*workers))],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            done.set()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.save()
+
+        logger.info(f'Проверено прокси: {len(checked)} из {len(keys)}, рабочих: {len(working)}')
+        return working
+
+    async def check(self, proxy: Dict | str) -> Tuple[bool, float]:
+        """Проверяет прокси: туннель к хосту `check_url` и запрос `GET`. Успех - статус `200`.
+
+        Returns:
+            Tuple[bool, float]: Результат и задержка (секунды).
+        """
+        key: str = proxy_key(proxy)
+        start: float = time.monotonic()
+        try:
+            ok: bool = await asyncio.wait_for(self._check(key), self.timeout)
+        except Exception:
+            ok = False
+        return ok, time.monotonic() - start
+
+    async def _check(self, key: str) -> bool:
+        p = parse_key(key)
+        target = urlparse(self.check_url)
+        host: str = target.hostname
+        port: int = target.port or (443 if target.scheme == 'https' else 80)
+
+        reader, writer = await open_tunnel(p['protocol'], p['host'], int(p['port']), host, port)
+        try:
+            if target.scheme == 'https':
+                await writer.start_tls(ssl.create_default_context(), server_hostname=host)
+            path: str = target.path or '/'
+            if target.query:
+                path += f'?{target.query}'
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: Mozilla/5.0\r\nConnection: close\r\n\r\n'.encode())
+            await writer.drain()
+            status: bytes = await reader.readline()
+            return status.split(b' ')[1:2] == [b'200']
+        finally:
+            writer.close()
+
+
+async def open_tunnel(protocol: str, proxy_host: str, proxy_port: int, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Открывает соединение с `host:port` через прокси (HTTP CONNECT, SOCKS4a или SOCKS5 без авторизации).
+
+    Raises:
+        ConnectionError: Прокси отказал в соединении.
+    """
+    reader, writer = await asyncio.open_connection(proxy_host, proxy_port)
+    try:
+        if protocol == 'http':
+            writer.write(f'CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n'.encode())
+            await writer.drain()
+            status: bytes = await reader.readline()
+            if status.split(b' ')[1:2] != [b'200']:
+                raise ConnectionError(f'CONNECT: {status!r}')
+            while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                ...
+
+        elif protocol == 'socks4':
+            # SOCKS4a: адрес 0.0.0.1 и имя хоста после идентификатора пользователя
+            writer.write(b'\x04\x01' + port.to_bytes(2, 'big') + b'\x00\x00\x00\x01\x00' + host.encode() + b'\x00')
+            await writer.drain()
+            response: bytes = await reader.readexactly(8)
+            if response[1] != 0x5A:
+                raise ConnectionError(f'SOCKS4: {response[1]:#x}')
+
+        elif protocol == 'socks5':
+            writer.write(b'\x05\x01\x00')
+            await writer.drain()
+            if await reader.readexactly(2) != b'\x05\x00':
+                raise ConnectionError('SOCKS5: authentication required')
+            writer.write(b'\x05\x01\x00\x03' + bytes([len(host)]) + host.encode() + port.to_bytes(2, 'big'))
+            await writer.drain()
+            response = await reader.readexactly(4)
+            if response[1] != 0x00:
+                raise ConnectionError(f'SOCKS5: {response[1]:#x}')
+            address_length: int = {0x01: 4, 0x04: 16}.get(response[3]) or (await reader.readexactly(1))[0]
+            await reader.readexactly(address_length + 2)
+
+        else:
+            raise ConnectionError(f'Unknown proxy protocol: {protocol}')
+    except Exception:
+        writer.close()
+        raise
+    return reader, writer
+
+
+if __name__ == '__main__':
+    # Прогрев оценок: проверка кандидатов вне запуска браузера
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Проверка прокси и обновление оценок')
+    parser.add_argument('--limit', type=int, default=2000, help='Максимум проверяемых кандидатов')
+    parser.add_argument('--protocols', nargs='*', default=list(PROTOCOLS), help='Протоколы')
+    parser.add_argument('--concurrency', type=int, default=200, help='Одновременных проверок')
+    args = parser.parse_args()
+
+    pool = ProxyPool(concurrency=args.concurrency)
+    working = asyncio.run(pool.validate(protocols=args.protocols, limit=args.limit))
+    logger.info(f'Лучшие прокси: {pool.ranked(args.protocols)[:10]}')
@@ -0,0 +1,298 @@
+## \file /src/webdriver/readiness.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.readiness
+    :platform: Windows, Unix
+    :synopsis: Event-driven page readiness strategies.
+
+A readiness strategy decides when a freshly navigated page is ready to be grabbed.
+Every strategy is a small in-page script run with `execute_async_script`: the script subscribes
+to a browser event (`DOMContentLoaded`, `load`, network activity, DOM mutations) and calls back
+as soon as the condition holds. There is no polling loop and no fixed sleep on the Python side;
+the deadline is enforced in the page (`setTimeout`), the script calls back `false` when it passes.
+
+All in-page async scripts (readiness, `src.webdriver.waits`, category scroll rounds) share one session
+script timeout: `ensure_script_timeout()` raises it once per browser to a generous value and never lowers it,
+so concurrent scripts of a browser do not cut each other's deadlines.
+
+Built-in strategies:
+
+- ``'domcontentloaded'`` - the DOM is parsed.
+- ``'load'`` - the `load` event fired (all subresources are loaded).
+- ``'networkidle'`` - after `load`, no fetch/XHR is in flight and no resource finished for `idle_ms`.
+- ``'selector:<css>'`` - an element matching the CSS selector is present (`MutationObserver`).
+
+Several strategies may be combined with a list: the page is ready when all of them are satisfied.
+New strategies are added with `register_strategy()`.
+
+Note:
+    `driver.get()` itself blocks according to the browser `page_load_strategy`
+    (`normal` - until `load`, `eager` - until `DOMContentLoaded`). Use `eager` to let
+    `'domcontentloaded'` and `'selector:...'` return before the images and scripts are loaded.
+
+Example:
+    ```python
+    ok = wait_until(driver, 'selector:#product-title', timeout=15)
+    ok = await driver.navigate(url, until=['load', NetworkIdle(idle_ms=300)])
+    ```
+"""
+
+import asyncio
+import time
+import weakref
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import header
+from src.logger.logger import logger
+
+
+class ReadinessStrategy:
+    """Base class of a readiness strategy.
+
+    Attributes:
+        name (str): Strategy name used in `until=` strings.
+        script (str): Body of the async script. The last argument is the callback.
+    """
+
+    name: str = ''
+    script: str = ''
+
+    def args(self) -> Tuple:
+        """Arguments passed to `script` before the callback."""
+        return ()
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({", ".join(map(repr, self.args()))})'
+
+
+class DomContentLoaded(ReadinessStrategy):
+    """The document is parsed (`DOMContentLoaded`)."""
+
+    name = 'domcontentloaded'
+    script = """
+        const done = arguments[arguments.length - 1];
+        if (document.readyState !== 'loading') { done(true); return; }
+        document.addEventListener('DOMContentLoaded', () => done(true), {once: true});
+    """
+
+
+class Load(ReadinessStrategy):
+    """The `load` event fired."""
+
+    name = 'load'
+    script = """
+        const done = arguments[arguments.length - 1];
+        if (document.readyState === 'complete') { done(true); return; }
+        window.addEventListener('load', () => done(true), {once: true});
+    """
+
+
+class NetworkIdle(ReadinessStrategy):
+    """No network activity for `idle_ms` after the `load` event.
+
+    In-flight requests are counted by wrapping `fetch` and `XMLHttpRequest.send`;
+    finished subresources (images, scripts, beacons) are seen through a `PerformanceObserver`.
+    Every change restarts the idle timer.
+
+    Args:
+        idle_ms (int): Quiet period in milliseconds.
+        max_inflight (int): Number of requests that may stay open (long polling, analytics).
+    """
+
+    name = 'networkidle'
+    script = """
+        const [idleMs, maxInflight] = arguments;
+        const done = arguments[arguments.length - 1];
+        const t = window.__readiness || (window.__readiness = (() => {
+            const t = {inflight: 0, listeners: new Set()};
+            const notify = () => t.listeners.forEach(f => f());
+            const inc = () => { t.inflight++; notify(); };
+            const dec = () => { t.inflight = Math.max(0, t.inflight - 1); notify(); };
+            if (window.fetch) {
+                const fetch = window.fetch;
+                window.fetch = function () { inc(); return fetch.apply(this, arguments).finally(dec); };
+            }
+            const send = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.send = function () {
+                inc(); this.addEventListener('loadend', dec, {once: true});
+                return send.apply(this, arguments);
+            };
+            if (window.PerformanceObserver) {
+                new PerformanceObserver(notify).observe({type: 'resource'});
+            }
+            return t;
+        })());
+        let timer = null;
+        const check = () => {
+            clearTimeout(timer);
+            if (t.inflight <= maxInflight) {
+                timer = setTimeout(() => { t.listeners.delete(check); done(true); }, idleMs);
+            }
+        };
+        const start = () => { t.listeners.add(check); check(); };
+        if (document.readyState === 'complete') start();
+        else window.addEventListener('load', start, {once: true});
+    """
+
+    def __init__(self, idle_ms: int = 500, max_inflight: int = 0) -> None:
+        self.idle_ms = idle_ms
+        self.max_inflight = max_inflight
+
+    def args(self) -> Tuple:
+        return (self.idle_ms, self.max_inflight)
+
+
+class SelectorPresent(ReadinessStrategy):
+    """An element matching `selector` is in the DOM.
+
+    Args:
+        selector (str): CSS selector.
+    """
+
+    name = 'selector'
+    script = """
+        const [selector] = arguments;
+        const done = arguments[arguments.length - 1];
+        if (document.querySelector(selector)) { done(true); return; }
+        const observer = new MutationObserver(() => {
+            if (document.querySelector(selector)) { observer.disconnect(); done(true); }
+        });
+        observer.observe(document.documentElement || document, {childList: true, subtree: true});
+    """
+
+    def __init__(self, selector: str) -> None:
+        self.selector = selector
+
+    def args(self) -> Tuple:
+        return (self.selector,)
+
+
+# Session script timeout (seconds): a safety net only, every script enforces its own deadline in the page
+SCRIPT_TIMEOUT: float = 300
+
+_script_timeouts: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+# Runs the body of a strategy with an in-page deadline: `arguments` - strategy arguments, deadline (ms), callback.
+# Calls back the result of the strategy, or `false` when the deadline passes.
+_DEADLINE_SCRIPT: str = """
+const __done = arguments[arguments.length - 1];
+const __timer = setTimeout(() => __finish(false), arguments[arguments.length - 2]);
+let __finished = false;
+const __finish = (result) => { if (__finished) { return; } __finished = true; clearTimeout(__timer); __done(result); };
+(function () { /* strategy */ }).apply(this, Array.prototype.slice.call(arguments, 0, -2).concat([__finish]));
+"""
+
+
+def ensure_script_timeout(driver, timeout: float = SCRIPT_TIMEOUT) -> None:
+    """Raises the session script timeout of the browser to at least `timeout` (never lowers it).
+
+    The WebDriver call is made once per browser (and again only for a longer `timeout`).
+    It blocks - call it in a worker thread from async code.
+    """
+    browser = getattr(driver, 'driver', driver)
+    timeout = max(timeout, SCRIPT_TIMEOUT)
+    if _script_timeouts.get(browser, 0) >= timeout:
+        return
+    browser.set_script_timeout(timeout)
+    _script_timeouts[browser] = timeout
+
+
+Until = Union[str, ReadinessStrategy, Sequence[Union[str, ReadinessStrategy]]]
+
+STRATEGIES: Dict[str, Callable[..., ReadinessStrategy]] = {}
+
+
+def register_strategy(name: str, factory: Callable[..., ReadinessStrategy]) -> None:
+    """Registers a strategy for `until=` strings.
+
+    Args:
+        name (str): Strategy name. `'<name>:<arg>'` passes `<arg>` to the factory.
+        factory (Callable[..., ReadinessStrategy]): Class or function returning the strategy.
+    """
+    STRATEGIES[name.lower()] = factory
+
+
+for _strategy in (DomContentLoaded, Load, NetworkIdle, SelectorPresent):
+    register_strategy(_strategy.name, _strategy)
+
+
+def parse_until(until: Until) -> List[ReadinessStrategy]:
+    """Converts `until` to a list of strategies.
+
+    Args:
+        until: Strategy name (`'load'`, `'networkidle:300'`, `'selector:#title'`),
+            a strategy instance or a list of them.
+
+    Returns:
+        List[ReadinessStrategy]: Strategies to satisfy in order.
+
+    Raises:
+        ValueError: Unknown strategy name.
+    """
+    if isinstance(until, ReadinessStrategy):
+        return [until]
+    if isinstance(until, str):
+        name, _, arg = until.partition(':')
+        factory = STRATEGIES.get(name.strip().lower())
+        if factory is None:
+            raise ValueError(f'Unknown readiness strategy: {until!r}. Known: {", ".join(STRATEGIES)}')
+        if not arg:
+            return [factory()]
+        return [factory(int(arg) if arg.isdigit() else arg)]
+    strategies: List[ReadinessStrategy] = []
+    for item in until or ():
+        strategies.extend(parse_until(item))
+    return strategies
+
+
+def wait_until(driver, until: Until = 'load', timeout: float = 30) -> bool:
+    """Blocks until the page in `driver` satisfies all strategies of `until`.
+
+    If the page navigates away while a script is waiting (redirect, meta refresh), the strategy
+    is re-armed in the new document within the remaining time.
+
+    Args:
+        driver: Selenium WebDriver.
+        until: Strategies (see `parse_until()`).
+        timeout (float): Total time for all strategies, in seconds.
+
+    Returns:
+        bool: `True` if the page became ready within `timeout`.
+    """
+    deadline: float = time.monotonic() + timeout
+    ensure_script_timeout(driver, timeout + 5)
+    return _wait(driver, parse_until(until), deadline, timeout)
+
+
+def _wait(driver, strategies: List[ReadinessStrategy], deadline: float, timeout: float) -> bool:
+    for strategy in strategies:
+        while True:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.debug(f'Page is not ready: {strategy!r} timed out after {timeout}s', None, False)
+                return False
+            try:
+                if driver.execute_async_script(_DEADLINE_SCRIPT.replace('/* strategy */', strategy.script), *strategy.args(), int(remaining * 1000)) is False:
+                    logger.debug(f'Page is not ready: {strategy!r} timed out after {timeout}s', None, False)
+                    return False
+                break
+            except TimeoutException:
+                logger.debug(f'Page is not ready: {strategy!r} timed out after {timeout}s', None, False)
+                return False
+            except WebDriverException as ex:
+                if 'unload' in str(ex).lower() or 'navigat' in str(ex).lower():
+                    continue  # <- the document was replaced; wait again in the new one
+                logger.error(f'Error waiting for {strategy!r}', ex, False)
+                return False
+    return True
+
+
+async def wait_until_async(driver, until: Until = 'load', timeout: float = 30) -> bool:
+    """Async version of `wait_until()`. The blocking WebDriver call runs in a worker thread,
+    so the event loop keeps serving other pages.
+    """
+    return await asyncio.to_thread(wait_until, driver, until, timeout)
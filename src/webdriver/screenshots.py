@@ -0,0 +1,176 @@
+## \file /src/webdriver/screenshots.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.screenshots
+    :platform: Windows, Unix
+    :synopsis: Screenshots of many elements from a single page capture.
+
+`WebElement.screenshot_as_png` renders and PNG-encodes the page once per element. `capture_elements()` reads
+the bounding rects of all elements in one script call, captures the page once and crops every element
+in-process with Pillow:
+
+- Chrome: CDP `Page.captureScreenshot` of the region covering all elements (`captureBeyondViewport`),
+  no scrolling;
+- Firefox: the full-page screenshot of geckodriver;
+- other browsers: one viewport screenshot per band of elements that fits the viewport
+  (elements taller than the viewport fall back to `screenshot_as_png`).
+
+Example:
+    ```python
+    images = await capture_elements(driver, gallery_elements, image_format='webp')
+    ```
+"""
+
+import asyncio
+import base64
+import io
+from typing import List, Optional, Sequence
+
+from PIL import Image
+
+import header
+from src.logger.logger import logger
+
+
+# `arguments[0]` - elements. Rects are in CSS pixels of the document (not of the viewport).
+RECTS_SCRIPT: str = """
+const rects = arguments[0].map(el => {
+    if (!el || !el.getBoundingClientRect) { return null; }
+    const r = el.getBoundingClientRect();
+    return { x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height };
+});
+return {
+    rects: rects,
+    dpr: window.devicePixelRatio || 1,
+    viewport: { width: window.innerWidth, height: window.innerHeight },
+    scroll: { x: window.scrollX, y: window.scrollY },
+};
+"""
+
+
+async def capture_elements(
+    driver,
+    elements: Sequence,
+    image_format: str = 'png',
+    quality: int = 90,
+) -> List[Optional[bytes]]:
+    """Screenshots of `elements` from a single capture of the page.
+
+    Args:
+        driver: WebDriver instance.
+        elements (Sequence[WebElement]): Elements to capture.
+        image_format (str): `png` or `webp`.
+        quality (int): WebP quality.
+
+    Returns:
+        List[Optional[bytes]]: Image of every element (`None` for elements without size or on error).
+    """
+    if not elements:
+        return []
+    try:
+        layout: dict = await asyncio.to_thread(driver.execute_script, RECTS_SCRIPT, list(elements))
+    except Exception as ex:
+        logger.error('Error reading element rects', ex, False)
+        return [None] * len(elements)
+
+    rects: List[Optional[dict]] = [r if r and r['width'] >= 1 and r['height'] >= 1 else None for r in layout['rects']]
+    if not any(rects):
+        return [None] * len(elements)
+
+    try:
+        if hasattr(driver, 'execute_cdp_cmd'):
+            crops = await asyncio.to_thread(_capture_cdp, driver, rects, layout)
+        elif hasattr(driver, 'get_full_page_screenshot_as_png'):
+            crops = await asyncio.to_thread(_capture_full_page, driver, rects, layout)
+        else:
+            crops = await asyncio.to_thread(_capture_viewports, driver, elements, rects, layout)
+    except Exception as ex:
+        logger.error('Error capturing elements', ex, False)
+        return [None] * len(elements)
+
+    return [_encode(crop, image_format, quality) if crop is not None else None for crop in crops]
+
+
+def _crop(image: Image.Image, rect: dict, origin_x: float, origin_y: float, dpr: float) -> Image.Image:
+    """Crops a rect (document CSS pixels) from an image whose top left corner is at `origin` of the document."""
+    left: int = max(0, round((rect['x'] - origin_x) * dpr))
+    top: int = max(0, round((rect['y'] - origin_y) * dpr))
+    right: int = min(image.width, round((rect['x'] - origin_x + rect['width']) * dpr))
+    bottom: int = min(image.height, round((rect['y'] - origin_y + rect['height']) * dpr))
+    return image.crop((left, top, max(left + 1, right), max(top + 1, bottom)))
+
+
+def _capture_cdp(driver, rects: List[Optional[dict]], layout: dict) -> List[Optional[Image.Image]]:
+    """Chrome: one capture of the region covering all elements."""
+    present: List[dict] = [r for r in rects if r]
+    clip: dict = {
+        'x': min(r['x'] for r in present),
+        'y': min(r['y'] for r in present),
+        'scale': 1,
+    }
+    clip['width'] = max(r['x'] + r['width'] for r in present) - clip['x']
+    clip['height'] = max(r['y'] + r['height'] for r in present) - clip['y']
+    data: dict = driver.execute_cdp_cmd(
+        'Page.captureScreenshot',
+        {'format': 'png', 'clip': clip, 'captureBeyondViewport': True, 'fromSurface': True},
+    )
+    image = Image.open(io.BytesIO(base64.b64decode(data['data'])))
+    image.load()
+    # The capture has `clip * devicePixelRatio` pixels
+    dpr: float = image.width / clip['width'] if clip['width'] else layout['dpr']
+    return [_crop(image, r, clip['x'], clip['y'], dpr) if r else None for r in rects]
+
+
+def _capture_full_page(driver, rects: List[Optional[dict]], layout: dict) -> List[Optional[Image.Image]]:
+    """Firefox: one full-page capture."""
+    image = Image.open(io.BytesIO(driver.get_full_page_screenshot_as_png()))
+    image.load()
+    return [_crop(image, r, 0, 0, layout['dpr']) if r else None for r in rects]
+
+
+def _capture_viewports(driver, elements: Sequence, rects: List[Optional[dict]], layout: dict) -> List[Optional[Image.Image]]:
+    """Other browsers: one viewport capture per band of elements that fits the viewport."""
+    viewport_height: float = layout['viewport']['height']
+    dpr: float = layout['dpr']
+    crops: List[Optional[Image.Image]] = [None] * len(rects)
+    order: List[int] = sorted((i for i, r in enumerate(rects) if r), key=lambda i: rects[i]['y'])
+
+    band: List[int] = []
+
+    def flush() -> None:
+        if not band:
+            return
+        top: float = rects[band[0]]['y']
+        driver.execute_script('window.scrollTo(arguments[0], arguments[1]);', layout['scroll']['x'], top)
+        scroll_y: float = driver.execute_script('return window.scrollY;')  # <- the end of the page limits scrolling
+        image = Image.open(io.BytesIO(driver.get_screenshot_as_png()))
+        image.load()
+        for i in band:
+            crops[i] = _crop(image, rects[i], layout['scroll']['x'], scroll_y, dpr)
+        band.clear()
+
+    for i in order:
+        rect: dict = rects[i]
+        if rect['height'] > viewport_height:
+            try:
+                crops[i] = Image.open(io.BytesIO(elements[i].screenshot_as_png))
+            except Exception as ex:
+                logger.debug('Error capturing a tall element', ex, False)
+            continue
+        if band and rect['y'] + rect['height'] > rects[band[0]]['y'] + viewport_height:
+            flush()
+        band.append(i)
+    flush()
+    driver.execute_script('window.scrollTo(arguments[0], arguments[1]);', layout['scroll']['x'], layout['scroll']['y'])
+    return crops
+
+
+def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if image_format.lower() == 'webp':
+        image.save(buffer, format='WEBP', quality=quality)
+    else:
+        image.save(buffer, format='PNG')
+    return buffer.getvalue()
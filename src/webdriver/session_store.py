@@ -0,0 +1,282 @@
+## \file /src/webdriver/session_store.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.session_store
+    :platform: Windows, Unix
+    :synopsis: Per-supplier, per-profile store of browser sessions (cookies and localStorage).
+
+After a successful login the cookies and the `localStorage` of the current origin are saved to
+`gs.path.data/sessions/<supplier_prefix>/<profile>.json`. Saving merges into the saved session: cookies are
+replaced by `(domain, name, path)` and `localStorage` by origin, so the periodic save after a navigation
+keeps the cookies of other domains and the storage of other origins. A new or pooled browser restores them
+before its first navigation, so the supplier `login.py` flow runs only when the saved session has expired.
+
+A session is valid while it is younger than `max_age` and none of its `required_cookies`
+(the authentication cookies of the supplier) has expired. Expired cookies are never restored.
+
+Restoring does not navigate on Chrome: cookies are set with CDP `Network.setCookies` and `localStorage`
+is filled by a script that runs before the scripts of the page (`Page.addScriptToEvaluateOnNewDocument`).
+Other browsers open a lightweight URL of every cookie domain and set cookies with `add_cookie()`.
+
+Example:
+    ```python
+    store = SessionStore()
+    if not store.restore(driver, 'amazon'):       # <- no valid session
+        login(supplier)
+        store.save(driver, 'amazon')
+
+    driver = Driver(Chrome, session='amazon')     # <- restored before the first `get_url()`
+    ```
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import header
+from src import gs
+from src.logger.logger import logger
+
+
+LOCAL_STORAGE_SCRIPT: str = 'return Object.assign({}, window.localStorage);'
+
+# Fills localStorage of `origin` before the scripts of the page run. Keys set by the page itself are kept.
+RESTORE_LOCAL_STORAGE_SCRIPT: str = """
+(function (origin, items) {
+    if (location.origin !== origin) { return; }
+    try {
+        for (const [key, value] of Object.entries(items)) {
+            if (localStorage.getItem(key) === null) { localStorage.setItem(key, value); }
+        }
+    } catch (e) {}
+})(%s, %s);
+"""
+
+# `sameSite` values of WebDriver cookies -> CDP `Network.CookieSameSite`
+_SAME_SITE: Dict[str, str] = {'strict': 'Strict', 'lax': 'Lax', 'none': 'None'}
+
+
+class SessionStore:
+    """Store of saved browser sessions.
+
+    Args:
+        root (Optional[str | Path]): Store directory. Defaults to `gs.path.data / 'sessions'`.
+        max_age (Optional[float]): Maximum age of a saved session (seconds). Defaults to `SessionStore.max_age`.
+    """
+
+    max_age: float = 7 * 24 * 3600
+
+    def __init__(self, root: Optional[str | Path] = None, max_age: Optional[float] = None) -> None:
+        self.root = Path(root) if root else Path(gs.path.data) / 'sessions'
+        if max_age:
+            self.max_age = max_age
+
+    def path(self, supplier_prefix: str, profile: str = 'default') -> Path:
+        return self.root / supplier_prefix / f'{profile}.json'
+
+    # --------------------------------------------------------------------------
+    #                  Save / load
+    # --------------------------------------------------------------------------
+
+    def save(self, driver, supplier_prefix: str, profile: str = 'default', merge: bool = True) -> bool:
+        """Saves the cookies and the `localStorage` of the current origin of the browser.
+
+        Args:
+            driver: `Driver` or WebDriver instance.
+            supplier_prefix (str): Supplier prefix.
+            profile (str): Name of the session profile (e.g. the account).
+            merge (bool): Merge into the saved session (cookies by `(domain, name, path)`, `localStorage` by origin).
+                `False` replaces it.
+
+        Returns:
+            bool: `True` if the session was saved.
+        """
+        try:
+            cookies: List[dict] = driver.get_cookies()
+            if not cookies:
+                return False
+            local_storage: Dict[str, dict] = {}
+            origin: str = _origin(driver.current_url)
+            if origin:
+                try:
+                    local_storage[origin] = driver.execute_script(LOCAL_STORAGE_SCRIPT) or {}
+                except Exception as ex:
+                    logger.debug(f'Error reading localStorage of {origin}', ex, False)
+
+            saved: dict = self._read(supplier_prefix, profile) if merge else {}
+            now: float = time.time()
+            if now - saved.get('saved', 0) > self.max_age:
+                saved = {}  # <- expired session: its cookies are not carried over
+            merged: Dict[tuple, dict] = {
+                _cookie_key(c): c for c in saved.get('cookies', []) if not c.get('expiry') or c['expiry'] > now
+            }
+            merged.update((_cookie_key(c), c) for c in cookies)
+            session: dict = {
+                'saved': now,
+                'url': driver.current_url,
+                'cookies': list(merged.values()),
+                'local_storage': {**saved.get('local_storage', {}), **local_storage},
+            }
+
+            path: Path = self.path(supplier_prefix, profile)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp: Path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps(session, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp, path)
+            logger.debug(f'Session saved: {supplier_prefix}/{profile} ({len(session["cookies"])} cookies)', None, False)
+            return True
+        except Exception as ex:
+            logger.error(f'Error saving session {supplier_prefix}/{profile}', ex, False)
+            return False
+
+    def load(
+        self,
+        supplier_prefix: str,
+        profile: str = 'default',
+        required_cookies: Iterable[str] = (),
+    ) -> Optional[dict]:
+        """Loads a valid saved session.
+
+        Args:
+            supplier_prefix (str): Supplier prefix.
+            profile (str): Name of the session profile.
+            required_cookies (Iterable[str]): Names of cookies the session is not valid without
+                (e.g. the authentication cookies of the supplier).
+
+        Returns:
+            Optional[dict]: Session `{'saved', 'url', 'cookies', 'local_storage'}` without expired cookies,
+                or `None` if there is no valid session.
+        """
+        session: dict = self._read(supplier_prefix, profile)
+        if not session:
+            return None
+
+        now: float = time.time()
+        if now - session.get('saved', 0) > self.max_age:
+            logger.debug(f'Session {supplier_prefix}/{profile} is older than {self.max_age} s', None, False)
+            return None
+        session['cookies'] = [c for c in session.get('cookies', []) if not c.get('expiry') or c['expiry'] > now]
+        names: set = {c['name'] for c in session['cookies']}
+        missing: set = set(required_cookies) - names
+        if missing or not session['cookies']:
+            logger.debug(f'Session {supplier_prefix}/{profile} expired, missing cookies: {sorted(missing)}', None, False)
+            return None
+        return session
+
+    def _read(self, supplier_prefix: str, profile: str = 'default') -> dict:
+        """Saved session file as is, `{}` if there is none."""
+        path: Path = self.path(supplier_prefix, profile)
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except Exception as ex:
+            logger.debug(f'Error loading session {supplier_prefix}/{profile}', ex, False)
+            return {}
+
+    def delete(self, supplier_prefix: str, profile: str = 'default') -> None:
+        """Deletes a saved session (e.g. after the site rejected it)."""
+        self.path(supplier_prefix, profile).unlink(missing_ok=True)
+
+    # --------------------------------------------------------------------------
+    #                  Restore
+    # --------------------------------------------------------------------------
+
+    def restore(
+        self,
+        driver,
+        supplier_prefix: str,
+        profile: str = 'default',
+        required_cookies: Iterable[str] = (),
+    ) -> bool:
+        """Restores a saved session into the browser.
+
+        Args:
+            driver: `Driver` or WebDriver instance.
+            supplier_prefix (str): Supplier prefix.
+            profile (str): Name of the session profile.
+            required_cookies (Iterable[str]): See `load()`.
+
+        Returns:
+            bool: `True` if a valid session was restored.
+        """
+        session: Optional[dict] = self.load(supplier_prefix, profile, required_cookies)
+        if not session:
+            return False
+        browser = getattr(driver, 'driver', driver)
+        try:
+            if hasattr(browser, 'execute_cdp_cmd'):
+                self._restore_cdp(browser, session)
+            else:
+                self._restore_webdriver(browser, session)
+            logger.debug(f'Session restored: {supplier_prefix}/{profile} ({len(session["cookies"])} cookies)', None, False)
+            return True
+        except Exception as ex:
+            logger.error(f'Error restoring session {supplier_prefix}/{profile}', ex, False)
+            return False
+
+    @staticmethod
+    def _restore_cdp(browser, session: dict) -> None:
+        """Chrome: sets cookies and registers the localStorage script without navigation."""
+        cookies: List[dict] = []
+        for cookie in session['cookies']:
+            cdp_cookie: dict = {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'domain': cookie.get('domain'),
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False),
+            }
+            if cookie.get('expiry'):
+                cdp_cookie['expires'] = cookie['expiry']
+            if str(cookie.get('sameSite', '')).lower() in _SAME_SITE:
+                cdp_cookie['sameSite'] = _SAME_SITE[cookie['sameSite'].lower()]
+            cookies.append({k: v for k, v in cdp_cookie.items() if v is not None})
+        browser.execute_cdp_cmd('Network.enable', {})
+        browser.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+
+        for origin, items in session.get('local_storage', {}).items():
+            if items:
+                browser.execute_cdp_cmd(
+                    'Page.addScriptToEvaluateOnNewDocument',
+                    {'source': RESTORE_LOCAL_STORAGE_SCRIPT % (json.dumps(origin), json.dumps(items))},
+                )
+
+    @staticmethod
+    def _restore_webdriver(browser, session: dict) -> None:
+        """Other browsers: `add_cookie()` accepts cookies of the current domain only,
+        so a lightweight URL (`/robots.txt`) of every cookie domain is opened first."""
+        by_domain: Dict[str, List[dict]] = {}
+        for cookie in session['cookies']:
+            by_domain.setdefault(cookie.get('domain', '').lstrip('.'), []).append(cookie)
+        scheme: str = urlparse(session.get('url', '')).scheme or 'https'
+
+        for domain, cookies in by_domain.items():
+            if not domain:
+                continue
+            browser.get(f'{scheme}://{domain}/robots.txt')
+            for cookie in cookies:
+                try:
+                    browser.add_cookie({k: v for k, v in cookie.items() if k != 'sameSite' or v in ('Strict', 'Lax', 'None')})
+                except Exception as ex:
+                    logger.debug(f'Error restoring cookie {cookie.get("name")} of {domain}', ex, False)
+
+        for origin, items in session.get('local_storage', {}).items():
+            if items:
+                browser.get(f'{origin}/robots.txt')
+                browser.execute_script(RESTORE_LOCAL_STORAGE_SCRIPT % (json.dumps(origin), json.dumps(items)))
+
+
+def _cookie_key(cookie: dict) -> tuple:
+    return cookie.get('domain', ''), cookie['name'], cookie.get('path', '/')
+
+
+def _origin(url: str) -> Optional[str]:
+    parsed = urlparse(url or '')
+    return f'{parsed.scheme}://{parsed.netloc}' if parsed.scheme in ('http', 'https') and parsed.netloc else None
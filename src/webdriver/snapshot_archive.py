@@ -0,0 +1,163 @@
+## \file /src/webdriver/snapshot_archive.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.snapshot_archive
+    :platform: Windows, Unix
+    :synopsis: Content-addressed archive of compressed page snapshots.
+
+`Driver.get_url()`/`fetch_html()` (and `HttpDriver`) store the `page_source` of every visited page
+when the driver has a `snapshot_archive`. Pages are stored once per content: the HTML is gzip-compressed
+into `objects/<sha256[:2]>/<sha256>.html.gz`, and every visit appends a line `{url, ts, sha256, size}`
+to `index.jsonl`. Revisiting an unchanged page costs one index line.
+
+The archive is replayed offline by `src.suppliers.reextract` with the lxml locator engine.
+
+Example:
+    ```python
+    archive = SnapshotArchive()                       # gs.path.data / 'snapshots'
+    driver = Driver(Chrome, snapshot_archive=archive)
+    driver.get_url(url)                               # <- page_source archived
+
+    for entry in archive.entries(url_contains='amazon.com', latest_only=True):
+        html = archive.read(entry['sha256'])
+    ```
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import header
+from src import gs
+from src.logger.logger import logger
+
+
+class SnapshotArchive:
+    """Content-addressed store of page snapshots.
+
+    Args:
+        root (Optional[str | Path]): Archive directory. Defaults to `gs.path.data / 'snapshots'`.
+        compresslevel (int): gzip compression level.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None, compresslevel: int = 6) -> None:
+        self.root = Path(root) if root else Path(gs.path.data) / 'snapshots'
+        self.objects = self.root / 'objects'
+        self.index_path = self.root / 'index.jsonl'
+        self.compresslevel = compresslevel
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.objects / sha256[:2] / f'{sha256}.html.gz'
+
+    def put(self, url: str, page_source: str, **meta) -> Optional[str]:
+        """Archives a snapshot of `url`.
+
+        Args:
+            url (str): URL of the page.
+            page_source (str): HTML of the page.
+            **meta: Extra fields of the index entry (e.g. `supplier_prefix`).
+
+        Returns:
+            Optional[str]: SHA-256 of the snapshot, or `None` on error.
+        """
+        if not page_source:
+            return None
+        try:
+            data: bytes = page_source.encode('utf-8')
+            sha256: str = hashlib.sha256(data).hexdigest()
+            path: Path = self._object_path(sha256)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp: Path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')  # <- `put()` runs in worker threads too
+                tmp.write_bytes(gzip.compress(data, compresslevel=self.compresslevel))
+                os.replace(tmp, path)  # <- readers never see a partially written object
+
+            entry: dict = {
+                'url': url,
+                'ts': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'sha256': sha256,
+                'size': len(data),
+                **meta,
+            }
+            line: bytes = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+            fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)  # <- one append per entry, safe for concurrent processes
+            finally:
+                os.close(fd)
+            return sha256
+        except Exception as ex:
+            logger.error(f'Error archiving snapshot of {url}', ex, False)
+            return None
+
+    def read(self, sha256: str) -> Optional[str]:
+        """Returns the HTML of a snapshot.
+
+        Args:
+            sha256 (str): SHA-256 of the snapshot.
+
+        Returns:
+            Optional[str]: HTML, or `None` if the snapshot is not in the archive.
+        """
+        path: Path = self._object_path(sha256)
+        if not path.exists():
+            return None
+        return gzip.decompress(path.read_bytes()).decode('utf-8')
+
+    def entries(
+        self,
+        url_contains: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        latest_only: bool = True,
+    ) -> List[Dict]:
+        """Index entries, oldest first.
+
+        Args:
+            url_contains (Optional[str]): Only URLs containing this string (e.g. the supplier domain).
+            since (Optional[str]): Only snapshots taken at or after this ISO timestamp.
+            until (Optional[str]): Only snapshots taken before this ISO timestamp.
+            latest_only (bool): Only the latest snapshot of every URL.
+
+        Returns:
+            List[Dict]: Entries `{url, ts, sha256, size, ...}`.
+        """
+        selected: List[Dict] = [
+            entry for entry in self._iter_index()
+            if (not url_contains or url_contains in entry['url'])
+            and (not since or entry['ts'] >= since)
+            and (not until or entry['ts'] < until)
+        ]
+        if latest_only:
+            latest: Dict[str, Dict] = {}
+            for entry in selected:
+                if entry['url'] not in latest or entry['ts'] >= latest[entry['url']]['ts']:
+                    latest[entry['url']] = entry
+            selected = list(latest.values())
+        return sorted(selected, key=lambda entry: entry['ts'])
+
+    def latest(self, url: str) -> Optional[str]:
+        """HTML of the latest snapshot of `url`."""
+        found: List[Dict] = [entry for entry in self._iter_index() if entry['url'] == url]
+        return self.read(max(found, key=lambda entry: entry['ts'])['sha256']) if found else None
+
+    def _iter_index(self) -> Iterator[Dict]:
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as index:
+            for line in index:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # <- incomplete line of a process killed while writing
@@ -0,0 +1,227 @@
+## \file /src/webdriver/waits.py
+# -*- coding: utf-8 -*-
+#! .pyenv/bin/python3
+
+"""
+.. module:: src.webdriver.waits
+    :platform: Windows, Unix
+    :synopsis: Event-driven element waits multiplexed per page.
+
+`WebDriverWait(driver, timeout).until(...)` in `asyncio.to_thread()` holds an executor thread for the whole wait
+and polls the browser every 500 ms. With many concurrent waits (e.g. all fields of `Graber.grab_page_async()`)
+the default executor saturates, and every wait costs a WebDriver round-trip per poll.
+
+`ElementWaiter` keeps one waiter per browser. All waits registered on it are sent to the page in a single
+`execute_async_script` call: the script checks every pending selector, installs one `MutationObserver`
+and returns as soon as at least one selector is present (or visible) - with the matched elements, so no
+extra `find_elements` call is needed. Satisfied waits resolve, the rest are sent again in the next call.
+A browser therefore occupies at most one thread, however many waits are pending on it.
+
+Every wait has its own deadline. A script call never outlives the nearest deadline (nor `max_slice`):
+the script enforces it in the page (`timeoutMs`), so timeouts are accurate. The session script timeout
+is raised once to the shared generous value (`readiness.ensure_script_timeout()`) and never changed per call. WebDriver runs the commands of a session one at a time, so a wait registered
+while a call is in flight joins the next call, at most `max_slice` later.
+
+Example:
+    ```python
+    elements = await wait_for_elements(driver, By.CSS_SELECTOR, '#price', timeout=10, visible=True)
+
+    # many waits on one page - one script call in flight
+    name, price = await asyncio.gather(
+        wait_for_elements(driver, By.XPATH, '//h1', timeout=5),
+        wait_for_elements(driver, By.CSS_SELECTOR, '.price', timeout=5),
+    )
+    ```
+"""
+
+import asyncio
+import itertools
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException
+
+import header
+from src.logger.logger import logger
+from src.webdriver.locator import BY_CONSTANTS
+from src.webdriver.readiness import ensure_script_timeout
+
+
+# `arguments[0]` - pending waits `{id, by, selector, visible}`, `arguments[1]` - maximum duration (ms).
+# Returns `{id: [elements]}` of satisfied waits; `{}` when the duration passed without any.
+WAIT_SCRIPT: str = """
+const [specs, timeoutMs, done] = [arguments[0], arguments[1], arguments[arguments.length - 1]];
+const find = (by, selector) => {
+    switch (by) {
+        case 'xpath': {
+            const r = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const a = [];
+            for (let i = 0; i < r.snapshotLength; i++) { a.push(r.snapshotItem(i)); }
+            return a;
+        }
+        case 'css selector': return Array.from(document.querySelectorAll(selector));
+        case 'id': return Array.from(document.querySelectorAll('#' + CSS.escape(selector)));
+        case 'name': return Array.from(document.getElementsByName(selector));
+        case 'class name': return Array.from(document.getElementsByClassName(selector));
+        case 'tag name': return Array.from(document.getElementsByTagName(selector));
+        case 'link text': return Array.from(document.links).filter(a => a.innerText.trim() === selector);
+        case 'partial link text': return Array.from(document.links).filter(a => a.innerText.includes(selector));
+    }
+    return [];
+};
+const isVisible = (el) => {
+    if (el.nodeType !== 1) { return false; }
+    const style = getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none' && el.getClientRects().length > 0;
+};
+const check = () => {
+    const out = {};
+    let found = false;
+    for (const spec of specs) {
+        let els;
+        try { els = find(spec.by, spec.selector).filter(el => el.nodeType === 1); } catch (e) { continue; }
+        if (!els.length || (spec.visible && !els.every(isVisible))) { continue; }
+        out[spec.id] = els;
+        found = true;
+    }
+    return found ? out : null;
+};
+let finished = false, timer = null, scheduled = false;
+const finish = (result) => {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(result || {});
+};
+const observer = new MutationObserver(() => {
+    if (scheduled) { return; }
+    scheduled = true;
+    setTimeout(() => { scheduled = false; const r = check(); if (r) { finish(r); } }, 16);  // <- one check per burst of mutations
+});
+const first = check();
+if (first) {
+    finish(first);
+} else {
+    observer.observe(document.documentElement, { childList: true, subtree: true, attributes: true, characterData: false });
+    timer = setTimeout(() => finish(check()), timeoutMs);
+}
+"""
+
+
+@dataclass
+class _Wait:
+    id: int
+    by: str
+    selector: str
+    visible: bool
+    deadline: float
+    future: asyncio.Future = field(repr=False)
+
+    def spec(self) -> dict:
+        return {'id': str(self.id), 'by': self.by, 'selector': self.selector, 'visible': self.visible}
+
+
+class ElementWaiter:
+    """Waits for elements of one browser; all pending waits share one in-page script call.
+
+    Args:
+        driver: WebDriver (or `Driver`) instance.
+        max_slice (float): Maximum duration of one script call (seconds).
+    """
+
+    _waiters: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+    _ids = itertools.count(1)
+
+    def __init__(self, driver, max_slice: float = 1.0) -> None:
+        self.driver = driver
+        self.max_slice = max_slice
+        self._pending: Dict[int, _Wait] = {}
+        self._pump: Optional[asyncio.Task] = None
+
+    @classmethod
+    def for_driver(cls, driver) -> 'ElementWaiter':
+        """Shared waiter of the browser."""
+        browser = getattr(driver, 'driver', driver)
+        waiter: Optional[ElementWaiter] = cls._waiters.get(browser)
+        if waiter is None:
+            waiter = cls._waiters[browser] = cls(browser)
+        return waiter
+
+    async def wait(self, by: str, selector: str, timeout: float, visible: bool = False) -> List:
+        """Waits until the elements of a locator are present (or all of them are visible).
+
+        Args:
+            by (str): `By` constant (or a locator file value, e.g. `XPATH`).
+            selector (str): Selector.
+            timeout (float): Timeout (seconds).
+            visible (bool): Wait until all matched elements are visible.
+
+        Returns:
+            List[WebElement]: Matched elements.
+
+        Raises:
+            TimeoutException: The elements did not appear within `timeout`.
+        """
+        loop = asyncio.get_running_loop()
+        by = BY_CONSTANTS.get(str(by).lower(), str(by).lower())
+        wait = _Wait(next(self._ids), by, selector, visible, time.monotonic() + timeout, loop.create_future())
+        self._pending[wait.id] = wait
+        if self._pump is None or self._pump.done() or self._pump.get_loop() is not loop:
+            self._pump = loop.create_task(self._run())
+        try:
+            return await wait.future
+        finally:
+            self._pending.pop(wait.id, None)
+
+    async def _run(self) -> None:
+        """Sends pending waits to the page until none is left."""
+        await asyncio.sleep(0)  # <- waits registered in the same tick (e.g. by `asyncio.gather`) join the first call
+        try:
+            await asyncio.to_thread(ensure_script_timeout, self.driver, self.max_slice + 5)
+        except Exception as ex:
+            logger.debug('Error setting the script timeout', ex, False)
+        while self._pending:
+            now: float = time.monotonic()
+            for wait in list(self._pending.values()):
+                if wait.deadline <= now:
+                    self._resolve(wait, exception=TimeoutException(f'Timeout waiting for {wait.by}={wait.selector!r}'))
+            waits: List[_Wait] = [w for w in self._pending.values() if not w.future.done()]
+            if not waits:
+                break
+
+            slice_s: float = max(0.05, min(self.max_slice, min(w.deadline for w in waits) - now))
+            try:
+                found: dict = await asyncio.to_thread(
+                    self.driver.execute_async_script, WAIT_SCRIPT, [w.spec() for w in waits], int(slice_s * 1000)
+                ) or {}
+            except Exception as ex:
+                # Navigation unloaded the page under the script, or the session is gone
+                logger.debug('Element wait script interrupted', ex, False)
+                if not getattr(self.driver, 'session_id', True):
+                    for wait in waits:
+                        self._resolve(wait, exception=ex)
+                    break
+                await asyncio.sleep(0.05)
+                continue
+
+            for wait in waits:
+                elements = found.get(str(wait.id))
+                if elements:
+                    self._resolve(wait, result=elements)
+
+    @staticmethod
+    def _resolve(wait: _Wait, result: Optional[List] = None, exception: Optional[BaseException] = None) -> None:
+        if wait.future.done():
+            return
+        if exception is not None:
+            wait.future.set_exception(exception)
+        else:
+            wait.future.set_result(result)
+
+
+async def wait_for_elements(driver, by: str, selector: str, timeout: float, visible: bool = False) -> List:
+    """Waits for the elements of a locator on the page of `driver` (see `ElementWaiter.wait()`)."""
+    return await ElementWaiter.for_driver(driver).wait(by, selector, timeout, visible)